@@ -0,0 +1,252 @@
+"""
+Benchmark the crawl engines against a synthetic local site.
+
+    python benchmarks/run_benchmarks.py --pages 200 --latency-ms 50 --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json
+
+Each run reports pages/sec, p50/p95/p99 page latency, peak RSS of this
+process and its descendants (Chromium included) and bytes written, and
+stores them as JSON so runs can be compared.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from synthetic_site import SiteConfig, SyntheticSite  # noqa: E402
+from crawler import Crawler  # noqa: E402
+from pdf_generator import PDFGenerator  # noqa: E402
+from process_memory import tree_rss  # noqa: E402
+from web_to_pdf_converter import WebToPDFConverter  # noqa: E402
+
+BENCHMARKS = ("converter", "crawler", "pdf_generator", "pdf_generator_many")
+
+# Bumped whenever peak RSS is measured differently; figures from another method are not compared.
+# 2: descendants forked by any thread are counted, not only those of the main thread (Chromium's helpers).
+RSS_METHOD = 2
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty sample."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class TreeRSSSampler:
+    """
+    Samples the summed RSS of this process and all its descendants.
+
+    Needs /proc; elsewhere falls back to getrusage, which reports the
+    largest single process rather than the sum.
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if os.path.exists("/proc/self/statm"):
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        if not self.peak:
+            # ru_maxrss is in KiB on Linux, bytes on macOS.
+            scale = 1 if sys.platform == "darwin" else 1024
+            self.peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+
+
+def _bytes_written(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names)
+
+
+class _TimedConverter(WebToPDFConverter):
+    """Records navigation start to finished PDF (or, when only crawling, to loaded page) for every page."""
+
+    def __init__(self, latencies: List[float], **kwargs):
+        super().__init__(**kwargs)
+        self._latencies = latencies
+        self._started: Dict[str, float] = {}
+
+    async def _navigate(self, page, url, location=None):
+        self._started[url] = time.perf_counter()
+        return await super()._navigate(page, url, location)
+
+    async def _render_page(self, page, url, ready, output_dir, css_selector):
+        await super()._render_page(page, url, ready, output_dir, css_selector)
+        self._latencies.append(time.perf_counter() - self._started.pop(url))
+
+
+class _TimedCrawler(Crawler):
+    def __init__(self, latencies: List[float], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._latencies = latencies
+
+    def _converter(self):
+        return _TimedConverter(self._latencies, **self._converter_options())
+
+
+def bench_converter(site: SyntheticSite, output_dir: str, latencies: List[float], options: dict) -> int:
+    async def run():
+        async with _TimedConverter(latencies, **options) as converter:
+            return await converter.crawl_and_convert(site.url, output_dir)
+    return len(asyncio.run(run()))
+
+
+def bench_crawler(site: SyntheticSite, output_dir: str, latencies: List[float], options: dict) -> int:
+    concurrency = options.get("concurrency_limit", 5)
+    return len(_TimedCrawler(latencies, site.url, rate_limit=0, concurrency_limit=concurrency).crawl())
+
+
+def bench_pdf_generator(site: SyntheticSite, output_dir: str, latencies: List[float], options: dict) -> int:
+    count = 0
+    with PDFGenerator() as generator:
+        for index, url in enumerate(site.page_urls()):
+            start = time.perf_counter()
+            count += generator.generate_pdf(url, os.path.join(output_dir, f"page_{index}.pdf"))
+            latencies.append(time.perf_counter() - start)
+    return count
+
+
+def bench_pdf_generator_many(site: SyntheticSite, output_dir: str, latencies: List[float], options: dict) -> int:
+    # Only the batch total is observable from outside, so no per-page latencies here.
+    with PDFGenerator() as generator:
+        results = generator.generate_many(site.page_urls(), output_dir, **options)
+    return sum(1 for path in results.values() if path)
+
+
+_RUNNERS: Dict[str, Callable[[SyntheticSite, str, List[float], dict], int]] = {
+    "converter": bench_converter,
+    "crawler": bench_crawler,
+    "pdf_generator": bench_pdf_generator,
+    "pdf_generator_many": bench_pdf_generator_many,
+}
+
+
+def run_benchmark(name: str, site: SyntheticSite, options: dict) -> dict:
+    latencies: List[float] = []
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as output_dir:
+        with TreeRSSSampler() as sampler:
+            start = time.perf_counter()
+            pages = _RUNNERS[name](site, output_dir, latencies, options)
+            elapsed = time.perf_counter() - start
+        written = _bytes_written(output_dir)
+    return {
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 3) if elapsed else 0.0,
+        "latency_p50": round(percentile(latencies, 50), 4),
+        "latency_p95": round(percentile(latencies, 95), 4),
+        "latency_p99": round(percentile(latencies, 99), 4),
+        "peak_rss_mb": round(sampler.peak / (1024 * 1024), 1),
+        "bytes_written": written,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """List benchmarks whose throughput fell more than tolerance below the baseline."""
+    regressions = []
+    rss_comparable = baseline.get("rss_method") == current["rss_method"]
+    if not rss_comparable:
+        print("Baseline peak RSS was measured with an older method that missed most browser processes; "
+              "re-record the baseline to compare memory")
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before["pages_per_sec"]:
+            continue
+        change = result["pages_per_sec"] / before["pages_per_sec"] - 1
+        print(f"{name}: {before['pages_per_sec']} -> {result['pages_per_sec']} pages/sec ({change:+.1%}), "
+              f"p95 {before['latency_p95']} -> {result['latency_p95']}s, "
+              f"peak RSS {before['peak_rss_mb'] if rss_comparable else 'n/a'} -> {result['peak_rss_mb']} MB")
+        if change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crawling and PDF rendering against a synthetic site")
+    parser.add_argument("--pages", type=int, default=200, help="Pages in the synthetic site")
+    parser.add_argument("--fanout", type=int, default=5, help="Child links per page")
+    parser.add_argument("--page-kb", type=int, default=20, help="Approximate text weight per page")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Latency injected into every response")
+    parser.add_argument("--js-fraction", type=float, default=0.0, help="Share of pages rendered by JavaScript")
+    parser.add_argument("--only", action="append", choices=BENCHMARKS, help="Run only these benchmarks (repeatable)")
+    parser.add_argument("--concurrency", "-c", type=int, default=5, help="Converter concurrency")
+    parser.add_argument("--rate", "-r", type=float, default=1000.0, help="Converter requests per second")
+    parser.add_argument("--converter-option", action="append", default=[], metavar="KEY=JSON",
+                        help="Extra WebToPDFConverter option, e.g. pipeline=true (repeatable)")
+    parser.add_argument("--output", "-o", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed throughput drop before failing --compare")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    config = SiteConfig(args.pages, args.fanout, args.page_kb, args.latency_ms, args.js_fraction)
+    options = dict(concurrency_limit=args.concurrency, rate_limit=args.rate)
+    for option in args.converter_option:
+        key, _, value = option.partition("=")
+        options[key] = json.loads(value)
+
+    results = {}
+    with SyntheticSite(config) as site:
+        for name in args.only or BENCHMARKS:
+            results[name] = run_benchmark(name, site, options)
+            print(f"{name}: {json.dumps(results[name])}")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "rss_method": RSS_METHOD,
+        "site": config._asdict(),
+        "converter_options": options,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.tolerance)
+        if regressions:
+            print(f"Throughput regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
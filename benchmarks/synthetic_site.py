@@ -0,0 +1,99 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+# Deterministic filler so page weight does not depend on a random seed.
+_FILLER = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+           "incididunt ut labore et dolore magna aliqua. ")
+
+
+class SiteConfig(NamedTuple):
+    pages: int = 200
+    fanout: int = 5
+    page_kb: int = 20
+    latency_ms: int = 0
+    js_fraction: float = 0.0
+
+    def is_js(self, index: int) -> bool:
+        """Whether a page builds its links and content in the browser (stable per index)."""
+        digest = hashlib.blake2b(str(index).encode(), digest_size=2).digest()
+        return int.from_bytes(digest, "big") / 0xFFFF < self.js_fraction
+
+
+def _children(config: SiteConfig, index: int):
+    first = index * config.fanout + 1
+    return [child for child in range(first, first + config.fanout) if child < config.pages]
+
+
+def render_page(config: SiteConfig, index: int) -> bytes:
+    """
+    HTML of page index; pages form a tree where page n links to its fanout
+    children, its parent and the home page.
+    """
+    links = [0] + ([(index - 1) // config.fanout] if index else []) + _children(config, index)
+    hrefs = [f"/page/{link}" for link in links]
+    paragraphs = max(1, config.page_kb * 1024 // len(_FILLER) // 4)
+    text = "".join(f"<p>Page {index}. {_FILLER * 4}</p>" for _ in range(paragraphs))
+    if config.is_js(index):
+        body = (f"<div id=app></div><script>"
+                f"const app = document.getElementById('app');"
+                f"app.innerHTML = {text!r};"
+                f"for (const href of {hrefs!r}) {{"
+                f"  const a = document.createElement('a'); a.href = href; a.textContent = href; app.appendChild(a);"
+                f"}}</script>")
+    else:
+        body = text + "".join(f'<a href="{href}">{href}</a> ' for href in hrefs)
+    return f"<!doctype html><html><head><title>Page {index}</title></head><body>{body}</body></html>".encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    config = SiteConfig()
+
+    def do_GET(self):
+        if self.config.latency_ms:
+            time.sleep(self.config.latency_ms / 1000)
+        path = self.path.split("?", 1)[0].rstrip("/")
+        index = 0 if path == "" else None
+        if path.startswith("/page/") and path[len("/page/"):].isdigit():
+            index = int(path[len("/page/"):])
+        if index is None or index >= self.config.pages:
+            self.send_error(404)
+            return
+        body = render_page(self.config, index)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SyntheticSite:
+    """Serves a generated site on a local port from a background thread."""
+
+    def __init__(self, config: SiteConfig, host: str = "127.0.0.1", port: int = 0):
+        handler = type("SiteHandler", (_Handler,), {"config": config})
+        self.config = config
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def page_urls(self):
+        return [f"{self.url}page/{index}" for index in range(self.config.pages)]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
@@ -30,6 +30,9 @@ setup(
         "beautifulsoup4",
         "pdfkit",
     ],
+    extras_require={
+        "merge": ["pypdf"],
+    },
     entry_points={
         "console_scripts": [
             "web_to_pdf=main:main",
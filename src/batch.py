@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+import threading
+import time
+from typing import Iterator, Optional
+
+# Result statuses, one per input URL.
+RESULT_STATUSES = ("ok", "failed", "unchanged", "duplicate", "skipped")
+
+
+def is_url_list(value: str) -> bool:
+    """Whether a URL argument names a URL list ("-" for stdin, or an existing file) rather than a URL."""
+    if value == "-":
+        return True
+    return "://" not in value and os.path.isfile(value)
+
+
+def iter_urls(source: str) -> Iterator[str]:
+    """
+    Stream URLs from a file, one per line, without reading it all in.
+
+    Blank lines and lines starting with # are ignored.
+
+    :param source: Path of the list, or "-" for stdin
+    """
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+class ResultLog:
+    """Appends one JSON line per processed URL: url, status, output or error, and a timestamp."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, url: str, status: str, output: Optional[str] = None, **details):
+        entry = {"url": url, "status": status, "time": round(time.time(), 3)}
+        if output is not None:
+            entry["output"] = output
+        entry.update(details)
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class DeadLetters:
+    """
+    URLs that failed for good, written as a URL list so the file can be fed straight back in.
+
+    Each URL is preceded by a comment line with its error. The list is
+    built next to the target and moved into place on close, so a run may
+    read its input from the previous run's dead letters.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def write(self, url: str, error: str, kind: str, attempts: int):
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path + ".tmp", "w", encoding="utf-8")
+                self._file.write(f"# URLs that failed on {time.strftime('%Y-%m-%d %H:%M:%S')}; "
+                                 f"pass this file as the URL to retry them\n")
+            # Keep each entry on two lines whatever the error text contains.
+            error = " ".join(error.split())
+            self._file.write(f"# {kind} after {attempts} attempt{'s' if attempts != 1 else ''}: {error}\n{url}\n")
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        """Replace the previous list; a run without failures leaves no stale entries behind."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                os.replace(self.path + ".tmp", self.path)
+                self._file = None
+            elif os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,145 @@
+"""
+Long-lived Chromium that CLI runs attach to instead of launching their own.
+
+    python src/main.py --browser-daemon            # start (foreground; run it under systemd, supervisord, ...)
+    python src/main.py https://example.com --connect
+    python src/main.py --browser-daemon --stop
+
+The daemon publishes its Chrome DevTools Protocol endpoint in a small JSON
+file; converters given --connect read it and attach with connect_over_cdp.
+
+The CDP port is unauthenticated: any local user can connect to it and drive
+the browser, reading its pages and cookies. Only run the daemon on machines
+whose local users you trust.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Optional
+from playwright.async_api import async_playwright
+
+DEFAULT_PORT = 9222
+DEFAULT_ENDPOINT_FILE = os.path.join(os.path.expanduser("~"), ".cache", "web_to_pdf", "browser.json")
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows; a stale endpoint just fails to connect.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_endpoint(path: str, endpoint: str):
+    """Publish the endpoint atomically, so readers never see a half-written file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"endpoint": endpoint, "pid": os.getpid(), "started": time.time()}, f)
+    os.replace(path + ".tmp", path)
+
+
+def read_endpoint(path: str = DEFAULT_ENDPOINT_FILE) -> Optional[dict]:
+    """
+    Read the daemon's endpoint file.
+
+    :return: The file's content (endpoint, pid, started), or None when no daemon is running
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(info, dict) or "endpoint" not in info or not _pid_alive(int(info.get("pid", 0))):
+        return None
+    return info
+
+
+def resolve_endpoint(value: str, endpoint_file: str = DEFAULT_ENDPOINT_FILE) -> Optional[str]:
+    """Turn a --connect value into a CDP endpoint: "auto" means the running daemon's, anything else is used as is."""
+    if value != "auto":
+        return value
+    info = read_endpoint(endpoint_file)
+    return info["endpoint"] if info else None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def serve(port: int = DEFAULT_PORT, endpoint_file: str = DEFAULT_ENDPOINT_FILE, headless: bool = True):
+    """
+    Run a browser with a CDP endpoint on 127.0.0.1 until SIGINT/SIGTERM or until the browser dies.
+
+    :param port: CDP port (0 picks a free one)
+    :param endpoint_file: Where to publish the endpoint
+    :param headless: Run Chromium headless
+    """
+    port = port or _free_port()
+    endpoint = f"http://127.0.0.1:{port}"
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=headless, args=[f"--remote-debugging-port={port}"])
+        browser.on("disconnected", lambda _: stop.set())
+        write_endpoint(endpoint_file, endpoint)
+        logging.info(f"Browser {browser.version} listening on {endpoint} (endpoint file {endpoint_file})")
+        try:
+            await stop.wait()
+        finally:
+            info = read_endpoint(endpoint_file)
+            # Another daemon may have taken over the file meanwhile; leave its entry alone.
+            if info is not None and info.get("pid") == os.getpid():
+                os.remove(endpoint_file)
+            if browser.is_connected():
+                await browser.close()
+    logging.info("Browser daemon stopped")
+
+
+def stop_daemon(endpoint_file: str = DEFAULT_ENDPOINT_FILE) -> bool:
+    """Ask the running daemon to shut down; False when none is running."""
+    info = read_endpoint(endpoint_file)
+    if info is None:
+        return False
+    os.kill(int(info["pid"]), signal.SIGTERM)
+    return True
+
+
+def daemon_main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(
+        description="Keep a browser running for web_to_pdf runs to attach to",
+        epilog="The CDP port has no authentication: any local user can connect to it and drive the browser. "
+               "Only run the daemon on machines whose local users you trust.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="CDP port on 127.0.0.1 (0 picks a free one)")
+    parser.add_argument("--endpoint-file", default=DEFAULT_ENDPOINT_FILE, help="Where to publish the endpoint")
+    parser.add_argument("--headed", action="store_false", dest="headless", help="Show the browser window")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    args = parser.parse_args(argv)
+    if args.stop:
+        if not stop_daemon(args.endpoint_file):
+            logging.info("No browser daemon is running")
+        return
+    asyncio.run(serve(args.port, args.endpoint_file, args.headless))
+
+
+if __name__ == "__main__":
+    daemon_main()
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from playwright.async_api import Browser, BrowserContext, Page
+from request_filter import RequestFilter
+from response_cache import ResponseCache
+
+
+class _PooledPage:
+    """A page together with the isolated context that owns it."""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.crashed = False
+        page.on("crash", self._on_crash)
+
+    def _on_crash(self, *_):
+        self.crashed = True
+
+    def is_healthy(self) -> bool:
+        return not self.crashed and not self.page.is_closed()
+
+
+class PagePool:
+    """
+    Fixed-size pool of pre-created browser contexts and pages.
+
+    Each pooled page lives in its own context so cookies and storage never
+    leak between URLs. Pages are reset to about:blank when returned, and
+    crashed or closed pages are replaced before being handed out again.
+    drain() and restart() move the pool to a new browser without losing
+    any borrower: pages in use are waited for, new borrowers wait.
+    """
+
+    def __init__(self, browser: Browser, size: int = 5, context_options: Optional[dict] = None,
+                 request_filter: Optional[RequestFilter] = None, response_cache: Optional[ResponseCache] = None):
+        """
+        Initialize the PagePool.
+
+        :param browser: Launched Playwright browser
+        :param size: Number of contexts/pages to keep warm
+        :param context_options: Keyword arguments for browser.new_context
+        :param request_filter: Filter installed on every pooled context
+        :param response_cache: Cache serving every pooled context's requests
+        """
+        self.browser = browser
+        self.size = size
+        self.context_options = context_options or {}
+        self.request_filter = request_filter
+        self.response_cache = response_cache
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._slots: List[_PooledPage] = []
+        self._open = asyncio.Event()
+        self._open.set()
+
+    async def start(self):
+        """Create all pooled contexts and pages up front."""
+        slots = await asyncio.gather(*(self._create_slot() for _ in range(self.size)))
+        for slot in slots:
+            self._slots.append(slot)
+            self._idle.put_nowait(slot)
+
+    async def close(self):
+        """Close every pooled context, idle or not."""
+        for slot in self._slots:
+            try:
+                await slot.context.close()
+            except Exception as e:
+                logging.debug(f"Error closing pooled context: {str(e)}")
+        self._slots.clear()
+
+    async def drain(self):
+        """Stop lending pages, wait until every borrowed page is back, then close all contexts."""
+        self._open.clear()
+        for _ in range(len(self._slots)):
+            await self._idle.get()
+        await self.close()
+
+    async def restart(self, browser: Browser):
+        """Refill a drained pool from a new browser and resume lending."""
+        self.browser = browser
+        await self.start()
+        self._open.set()
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrow a healthy page for the duration of the block."""
+        slot = await self._acquire()
+        try:
+            yield slot.page
+        finally:
+            await self._release(slot)
+
+    async def _create_slot(self) -> _PooledPage:
+        context = await self.browser.new_context(**self.context_options)
+        # Route handlers run last-registered first: filter, then cache.
+        if self.response_cache is not None:
+            await self.response_cache.install(context)
+        if self.request_filter is not None:
+            await self.request_filter.install(context)
+        page = await context.new_page()
+        return _PooledPage(context, page)
+
+    async def _acquire(self) -> _PooledPage:
+        await self._open.wait()
+        slot = await self._idle.get()
+        if not slot.is_healthy():
+            try:
+                slot = await self._replace(slot)
+            except Exception:
+                self._idle.put_nowait(slot)
+                raise
+        return slot
+
+    async def _release(self, slot: _PooledPage):
+        try:
+            if slot.is_healthy():
+                await self._reset(slot)
+            else:
+                slot = await self._replace(slot)
+        except Exception as e:
+            # Replaced lazily on the next acquire.
+            logging.warning(f"Resetting pooled page failed: {str(e)}")
+            slot.crashed = True
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def _reset(self, slot: _PooledPage):
+        await slot.page.goto("about:blank")
+        await slot.context.clear_cookies()
+
+    async def _replace(self, slot: _PooledPage) -> _PooledPage:
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        new_slot = await self._create_slot()
+        self._slots[self._slots.index(slot)] = new_slot
+        return new_slot
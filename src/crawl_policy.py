@@ -0,0 +1,133 @@
+import re
+import time
+from typing import Callable, Iterable, Optional, Sequence
+from urllib.parse import urlsplit
+
+# Crawl orders selectable on the command line.
+PRIORITY_MODES = ("bfs", "sitemap", "path")
+
+# Sitemap priority of URLs that do not state one, per the sitemaps.org protocol.
+DEFAULT_SITEMAP_PRIORITY = 0.5
+
+# Returns the sort key of a URL given its link depth and sitemap priority; smaller keys are crawled first.
+Scorer = Callable[[str, int, Optional[float]], tuple]
+
+
+def _compile(patterns: Optional[Iterable[str]]) -> Optional["re.Pattern"]:
+    patterns = list(patterns or ())
+    if not patterns:
+        return None
+    # One alternation, so matching a URL is a single regex search however many patterns there are.
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class UrlRules:
+    """Include/exclude regular expressions, searched anywhere in the URL."""
+
+    def __init__(self, include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None):
+        """
+        :param include: When given, only URLs matching one of these are crawled
+        :param exclude: URLs matching one of these are never crawled
+        """
+        self._include = _compile(include)
+        self._exclude = _compile(exclude)
+
+    def allows(self, url: str) -> bool:
+        if self._include is not None and not self._include.search(url):
+            return False
+        return self._exclude is None or not self._exclude.search(url)
+
+
+def bfs_score(url: str, depth: int, sitemap_priority: Optional[float] = None) -> tuple:
+    """Breadth-first: shallow pages first, in discovery order."""
+    return (depth,)
+
+
+def sitemap_score(url: str, depth: int, sitemap_priority: Optional[float] = None) -> tuple:
+    """Highest sitemap <priority> first, then breadth-first."""
+    priority = sitemap_priority if sitemap_priority is not None else DEFAULT_SITEMAP_PRIORITY
+    return (-priority, depth)
+
+
+def path_prefix_scorer(prefixes: Sequence[str]) -> Scorer:
+    """
+    Pages under the given path prefixes first, in the order the prefixes are listed, then the rest;
+    breadth-first within each group.
+    """
+    prefixes = list(prefixes)
+
+    def score(url: str, depth: int, sitemap_priority: Optional[float] = None) -> tuple:
+        path = urlsplit(url).path or "/"
+        for rank, prefix in enumerate(prefixes):
+            if path.startswith(prefix):
+                return (rank, depth)
+        return (len(prefixes), depth)
+
+    return score
+
+
+def build_scorer(mode: str = "bfs", prefixes: Optional[Sequence[str]] = None) -> Scorer:
+    """
+    Build the scorer for a --priority mode.
+
+    :param mode: One of PRIORITY_MODES
+    :param prefixes: Path prefixes crawled first in "path" mode
+    """
+    if mode == "sitemap":
+        return sitemap_score
+    if mode == "path":
+        if not prefixes:
+            raise ValueError("path priority needs at least one path prefix")
+        return path_prefix_scorer(prefixes)
+    if mode != "bfs":
+        raise ValueError(f"Unknown priority mode: {mode}")
+    return bfs_score
+
+
+class CrawlPolicy:
+    """
+    What the frontier admits and in which order, and when the crawl ends.
+
+    Depth and URL rules are checked when a link is queued; the page and
+    time budgets when the next URL is taken, so pages already in flight
+    always finish.
+    """
+
+    def __init__(self, max_depth: Optional[int] = None, max_pages: Optional[int] = None,
+                 time_budget: Optional[float] = None, rules: Optional[UrlRules] = None,
+                 scorer: Scorer = bfs_score, clock: Callable[[], float] = time.monotonic):
+        """
+        :param max_depth: Links followed from the start URL (0 crawls only the start URL)
+        :param max_pages: Pages handed to workers before the crawl stops
+        :param time_budget: Seconds after which no new page is started
+        :param rules: Include/exclude URL rules
+        :param scorer: Sort key of each URL; smaller is crawled first
+        :param clock: Monotonic clock, replaceable in tests
+        """
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.time_budget = time_budget
+        self.rules = rules or UrlRules()
+        self.scorer = scorer
+        self.clock = clock
+        self.started = clock()
+
+    def start(self):
+        """Start the time budget from now."""
+        self.started = self.clock()
+
+    def admits(self, url: str, depth: int) -> bool:
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        return self.rules.allows(url)
+
+    def score(self, url: str, depth: int, sitemap_priority: Optional[float] = None) -> tuple:
+        return self.scorer(url, depth, sitemap_priority)
+
+    def exhausted(self, pages_started: int) -> Optional[str]:
+        """Why no further page may start, or None while the budgets allow it."""
+        if self.max_pages is not None and pages_started >= self.max_pages:
+            return f"page budget of {self.max_pages} reached"
+        if self.time_budget is not None and self.clock() - self.started >= self.time_budget:
+            return f"time budget of {self.time_budget:g}s used up"
+        return None
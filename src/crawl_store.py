@@ -0,0 +1,138 @@
+import sqlite3
+import time
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+# Known from an earlier crawl but not (yet) discovered in the current one.
+STALE = "stale"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    output_path TEXT,
+    content_hash TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    error TEXT,
+    updated_at REAL
+)
+"""
+
+# Columns added after the first release, created on open when missing.
+_ADDED_COLUMNS = {
+    "ready_strategy": "TEXT",
+    "time_to_ready": "REAL",
+    "depth": "INTEGER",
+    # URL as discovered, when it is spelled differently from its canonical key.
+    "location": "TEXT",
+}
+
+
+class PageRecord(NamedTuple):
+    url: str
+    status: str
+    output_path: Optional[str]
+    content_hash: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    updated_at: Optional[float] = None
+
+
+class CrawlStore:
+    """
+    On-disk crawl state backed by SQLite.
+
+    Holds the frontier (pending URLs), per-URL status and the validators
+    needed to skip re-rendering unchanged pages on the next run. Every
+    write is committed immediately, so an interrupted crawl can resume from
+    the last finished page.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create a crawl store.
+
+        :param path: Path of the SQLite database file
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        for column, column_type in _ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE pages ADD COLUMN {column} {column_type}")
+
+    def close(self):
+        self._conn.close()
+
+    def begin(self, resume: bool = False):
+        """
+        Prepare the store for a crawl.
+
+        A fresh crawl keeps every row's validators but marks it stale, so
+        pages are rediscovered from the seed. A resumed crawl keeps the
+        frontier exactly as the previous run left it.
+
+        :param resume: Continue the previous crawl instead of starting over
+        """
+        if not resume:
+            self._conn.execute("UPDATE pages SET status = ?", (STALE,))
+
+    def enqueue(self, url: str, depth: Optional[int] = None, location: Optional[str] = None) -> bool:
+        """
+        Add a URL to the persistent frontier.
+
+        :param url: Canonical URL to add
+        :param depth: Link depth from the start URL, kept for resumed crawls
+        :param location: URL to load, when it differs from the canonical one
+        :return: True if the URL was not already part of the current crawl
+        """
+        cursor = self._conn.execute(
+            "INSERT INTO pages (url, status, updated_at, depth, location) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at, "
+            "depth = excluded.depth, location = excluded.location WHERE pages.status = ?",
+            (url, PENDING, time.time(), depth, location, STALE),
+        )
+        return cursor.rowcount > 0
+
+    def get(self, url: str) -> Optional[PageRecord]:
+        row = self._conn.execute(
+            "SELECT url, status, output_path, content_hash, etag, last_modified, updated_at FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        return PageRecord(*row) if row else None
+
+    def mark_done(self, url: str, output_path: Optional[str], content_hash: Optional[str],
+                  etag: Optional[str] = None, last_modified: Optional[str] = None,
+                  ready_strategy: Optional[str] = None, time_to_ready: Optional[float] = None):
+        self._conn.execute(
+            "UPDATE pages SET status = ?, output_path = ?, content_hash = ?, etag = ?, last_modified = ?, "
+            "ready_strategy = ?, time_to_ready = ?, error = NULL, updated_at = ? WHERE url = ?",
+            (DONE, output_path, content_hash, etag, last_modified, ready_strategy, time_to_ready, time.time(), url),
+        )
+
+    def mark_failed(self, url: str, error: str):
+        self._conn.execute(
+            "UPDATE pages SET status = ?, error = ?, updated_at = ? WHERE url = ?",
+            (FAILED, error, time.time(), url),
+        )
+
+    def pending_entries(self) -> Iterator[Tuple[str, Optional[int], Optional[str]]]:
+        """Yield (url, depth, location) of every pending URL."""
+        yield from self._conn.execute(
+            "SELECT url, depth, location FROM pages WHERE status = ?", (PENDING,)).fetchall()
+
+    def processed_urls(self) -> Iterator[str]:
+        """Yield every URL of the current crawl that is finished, rendered or failed."""
+        for (url,) in self._conn.execute(
+                "SELECT url FROM pages WHERE status IN (?, ?)", (DONE, FAILED)).fetchall():
+            yield url
+
+    def crawl_urls(self) -> Iterator[str]:
+        """Yield every URL already part of the current crawl, in any state."""
+        for (url,) in self._conn.execute("SELECT url FROM pages WHERE status != ?", (STALE,)).fetchall():
+            yield url
@@ -1,39 +1,67 @@
-from playwright.sync_api import sync_playwright
-from urllib.parse import urljoin, urlparse
-from typing import List, Set
-import logging
-import time
+from urllib.parse import urlparse
+from typing import Iterable, List, Optional, Set
+from readiness import ReadinessPolicy
+from request_filter import RequestFilter
+from response_cache import ResponseCache
+from web_to_pdf_converter import WebToPDFConverter, run_sync
+
+# Stand-in for "no pause between requests"; the engine's limiter needs a finite rate.
+_UNLIMITED_RATE = 1000.0
 
 class Crawler:
-    def __init__(self, base_url: str, rate_limit: float = 1.0):
+    """
+    Synchronous site crawler: lists every in-scope page without printing it.
+
+    A thin wrapper over the async engine in web_to_pdf_converter with
+    rendering switched off, so pages load concurrently from pooled pages of
+    one browser, with the engine's retries and rate limiting.
+    """
+
+    def __init__(self, base_url: str, rate_limit: float = 1.0, strip_params: Optional[Iterable[str]] = None,
+                 readiness: Optional[ReadinessPolicy] = None, request_filter: Optional[RequestFilter] = None,
+                 response_cache: Optional[ResponseCache] = None, adaptive: bool = False, max_rate: float = 10.0,
+                 concurrency_limit: int = 5):
+        """
+        :param base_url: The starting URL for crawling
+        :param rate_limit: Seconds between requests (0 for no pause)
+        :param strip_params: Query parameter patterns dropped when canonicalizing URLs
+        :param readiness: Decides when a loaded page is ready
+        :param request_filter: Filter for crawled pages (defaults to the discovery profile)
+        :param response_cache: HTTP cache shared with other crawls
+        :param adaptive: Adapt rate and concurrency per host (AIMD), starting from rate_limit
+        :param max_rate: Per-host ceiling on requests per second in adaptive mode
+        :param concurrency_limit: Pages loaded at the same time
+        """
         self.base_url = base_url
+        self.readiness = readiness or ReadinessPolicy()
+        # Crawling only needs links, so skip images, media and fonts by default.
+        self.request_filter = request_filter or RequestFilter.discovery_profile()
+        self.response_cache = response_cache
         self.rate_limit = rate_limit
+        self.adaptive = adaptive
+        self.max_rate = max_rate
+        self.concurrency_limit = concurrency_limit
+        self.strip_params = strip_params
         self.visited: Set[str] = set()
-        self.to_visit: Set[str] = set([base_url])
         self.domain = urlparse(base_url).netloc
 
     def crawl(self) -> List[str]:
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page()
-
-            while self.to_visit:
-                url = self.to_visit.pop()
-                try:
-                    time.sleep(self.rate_limit)
-                    page.goto(url, wait_until="networkidle")
-                    self.visited.add(url)
-                    logging.info("Crawled: %s", url)
-                    
-                    # Extract links from the rendered page
-                    links = page.eval_on_selector_all("a[href]", "elements => elements.map(el => el.href)")
-                    for link in links:
-                        full_url = urljoin(url, link)
-                        if self.domain in full_url and full_url not in self.visited:
-                            self.to_visit.add(full_url)
-                except Exception as e:
-                    logging.error(f"Error crawling {url}: {e}")
-
-            browser.close()
-        
-        return list(self.visited)
\ No newline at end of file
+        """Crawl the site and return the URLs of every page that loaded."""
+        self.visited = set(run_sync(self._crawl()))
+        return list(self.visited)
+
+    def _converter_options(self) -> dict:
+        return dict(
+            concurrency_limit=self.concurrency_limit,
+            rate_limit=1.0 / self.rate_limit if self.rate_limit > 0 else _UNLIMITED_RATE,
+            strip_params=self.strip_params, readiness=self.readiness, request_filter=self.request_filter,
+            response_cache=self.response_cache, adaptive=self.adaptive, max_rate=self.max_rate, render=False,
+        )
+
+    def _converter(self) -> WebToPDFConverter:
+        return WebToPDFConverter(**self._converter_options())
+
+    async def _crawl(self) -> List[str]:
+        async with self._converter() as converter:
+            # Nothing is written without rendering, so the output directory is never created.
+            return await converter.crawl_and_convert(self.base_url, "")
@@ -0,0 +1,118 @@
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+DEDUP_MODES = ("exact", "near")
+
+# Page text as the reader sees it; hidden and script content is left out.
+PAGE_TEXT_JS = "() => document.body ? document.body.innerText : ''"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# sha256 of the normalized text, and its simhash in near mode.
+Fingerprint = Tuple[str, Optional[int]]
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so trivial layout changes do not alter fingerprints."""
+    return " ".join(text.lower().split())
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """
+    64-bit simhash over word shingles.
+
+    Texts that share most of their shingles end up a few bits apart.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)]
+    weights = [0] * 64
+    for gram in grams:
+        value = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+class ContentDeduplicator:
+    """
+    Remembers the text of rendered pages and spots pages that repeat one.
+
+    Exact duplicates are found by a hash of the normalized text. In near
+    mode, simhashes within max_distance bits also match; they are looked up
+    by splitting the 64 bits into max_distance + 1 bands, at least one of
+    which must agree exactly for any match (pigeonhole), so lookups never
+    scan every page.
+    """
+
+    def __init__(self, near: bool = False, max_distance: int = 3):
+        """
+        :param near: Also match near-duplicates by simhash
+        :param max_distance: Largest Hamming distance between simhashes treated as duplicates
+        """
+        self.near = near
+        self.max_distance = max_distance
+        self._exact: Dict[str, str] = {}
+        self._bands = max_distance + 1
+        self._band_bits = 64 // self._bands
+        self._band_index: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(self._bands)]
+        self.duplicates = 0
+
+    def _band_keys(self, value: int) -> List[int]:
+        mask = (1 << self._band_bits) - 1
+        return [value >> (band * self._band_bits) & mask for band in range(self._bands)]
+
+    def fingerprint(self, text: str) -> Optional[Fingerprint]:
+        """
+        Fingerprint a page's visible text.
+
+        :return: The fingerprint, or None for a text-less page, which is never treated as a copy
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        return (hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+                simhash(normalized) if self.near else None)
+
+    def find(self, fingerprint: Fingerprint) -> Optional[str]:
+        """URL of a registered page the fingerprint duplicates, or None."""
+        digest, value = fingerprint
+        original = self._exact.get(digest)
+        if original is None and value is not None:
+            for band, key in enumerate(self._band_keys(value)):
+                for other, other_url in self._band_index[band].get(key, ()):
+                    if bin(value ^ other).count("1") <= self.max_distance:
+                        original = other_url
+                        break
+                if original is not None:
+                    break
+        if original is not None:
+            self.duplicates += 1
+        return original
+
+    def add(self, url: str, fingerprint: Fingerprint):
+        """Register a page as the original of its content; only once its PDF exists."""
+        digest, value = fingerprint
+        self._exact.setdefault(digest, url)
+        if value is not None:
+            for band, key in enumerate(self._band_keys(value)):
+                self._band_index[band].setdefault(key, []).append((value, url))
+
+    def check(self, url: str, text: str) -> Optional[str]:
+        """
+        Register a page's text unless it duplicates an earlier page.
+
+        :param url: URL of the page
+        :param text: Visible text of the page
+        :return: URL of the page it duplicates, or None if it is new
+        """
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None:
+            return None
+        original = self.find(fingerprint)
+        if original is None:
+            self.add(url, fingerprint)
+        return original
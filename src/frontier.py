@@ -0,0 +1,256 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from crawl_policy import CrawlPolicy
+from crawl_store import CrawlStore
+from url_utils import SeenSet
+
+
+class Frontier:
+    """
+    Priority-queue crawl frontier shared by the converter's worker tasks.
+
+    Check-and-add on the enqueued set never awaits, so tracking is race-free
+    within a single event loop: a URL is queued at most once per crawl.
+    With a CrawlStore attached, every queued URL is also persisted so the
+    crawl can be resumed. URLs are expected to be canonical already; they
+    are the keys of the crawl, while a page is loaded from its location,
+    the URL as it was discovered.
+
+    URLs come out smallest score first (breadth-first without a policy),
+    in discovery order among equal scores. Once a policy budget runs out
+    the queue is dropped; with a store, dropped URLs stay pending for a
+    resumed crawl.
+    """
+
+    # Whether workers should extract and queue links from processed pages.
+    follows_links = True
+
+    def __init__(self, store: Optional[CrawlStore] = None, bloom_capacity: Optional[int] = None,
+                 policy: Optional[CrawlPolicy] = None):
+        """
+        :param store: Persistent crawl state
+        :param bloom_capacity: Expected URL count; tracks queued URLs in a Bloom filter
+        :param policy: Depth, scope and budget limits and crawl order; starts its time budget now
+        """
+        # Items are (score, sequence, url, depth, enqueued at, location); the sequence keeps equal scores FIFO.
+        self._queue: asyncio.Queue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self.policy = policy
+        if policy is not None:
+            policy.start()
+        self.enqueued = SeenSet(bloom_capacity)
+        self.store = store
+        self.visited_count = 0
+        # Only needed to list visited URLs without a store, which records them anyway.
+        self.visited: Optional[Set[str]] = set() if store is None else None
+        # Only kept when output needs the crawl tree; costs one entry per URL.
+        self.parents: Optional[Dict[str, str]] = None
+        # Depth of each URL taken but not yet done; links found on it are one deeper.
+        self._in_flight: Dict[str, int] = {}
+        # Locations of URLs in flight that were discovered under another spelling.
+        self._locations: Dict[str, str] = {}
+        self.pages_started = 0
+        self.stopped: Optional[str] = None
+        # URLs waiting out a retry backoff; join() waits for them too.
+        self._retries: Set[asyncio.Task] = set()
+        self._retrying: Set[str] = set()
+        self._retries_idle = asyncio.Event()
+        self._retries_idle.set()
+
+    def track_parents(self):
+        """Remember which page each URL was first discovered on."""
+        if self.parents is None:
+            self.parents = {}
+
+    def parent_of(self, url: str) -> Optional[str]:
+        return self.parents.get(url) if self.parents is not None else None
+
+    def restore(self):
+        """Reload the frontier of an interrupted crawl from the store."""
+        self.enqueued.update(self.store.crawl_urls())
+        for url, depth, location in self.store.pending_entries():
+            self._put(url, depth or 0, location=location)
+
+    def depth_for(self, parent: Optional[str]) -> int:
+        """Depth of a link found on parent (0 for seeds)."""
+        return self._in_flight.get(parent, 0) + 1 if parent is not None else 0
+
+    def location(self, url: str) -> str:
+        """URL to load for a URL in flight: as discovered, which the server may tell apart from the canonical one."""
+        return self._locations.get(url, url)
+
+    def add(self, url: str, parent: Optional[str] = None, depth: Optional[int] = None,
+            sitemap_priority: Optional[float] = None, location: Optional[str] = None) -> bool:
+        """
+        Queue a URL unless it has already been queued or the policy rules it out.
+
+        :param url: Canonical URL to add
+        :param parent: URL of the page the link was found on
+        :param depth: Link depth, when not derived from parent
+        :param sitemap_priority: Priority the site's sitemap gives the URL
+        :param location: URL as discovered, loaded instead of url (e.g. with its trailing slash)
+        :return: True if the URL was newly queued
+        """
+        if location == url:
+            location = None
+        if depth is None:
+            depth = self.depth_for(parent)
+        if self.policy is not None and not self.policy.admits(url, depth):
+            return False
+        if not self.enqueued.add(url):
+            return False
+        if self.parents is not None and parent is not None:
+            self.parents[url] = parent
+        if self.store is not None:
+            self.store.enqueue(url, depth, location)
+        if self.stopped is not None:
+            # Left pending in the store for a resumed crawl.
+            return False
+        self._put(url, depth, sitemap_priority, location)
+        return True
+
+    def _item(self, url: str, depth: int, sitemap_priority: Optional[float] = None,
+              location: Optional[str] = None) -> tuple:
+        score = self.policy.score(url, depth, sitemap_priority) if self.policy is not None else (depth,)
+        return score, next(self._sequence), url, depth, time.monotonic(), location
+
+    def _put(self, url: str, depth: int = 0, sitemap_priority: Optional[float] = None,
+             location: Optional[str] = None):
+        self._queue.put_nowait(self._item(url, depth, sitemap_priority, location))
+
+    def mark_visited(self, url: str):
+        self.visited_count += 1
+        if self.visited is not None:
+            self.visited.add(url)
+
+    def retry_later(self, url: str, delay: float):
+        """
+        Queue a URL again after delay seconds.
+
+        Call before task_done() of the failed attempt, so the frontier never
+        looks drained while the URL is waiting.
+        """
+        self._retries_idle.clear()
+        task = asyncio.ensure_future(self._requeue(url, self._in_flight.get(url, 0), self._locations.get(url), delay))
+        self._retries.add(task)
+        task.add_done_callback(self._retry_finished)
+
+    async def _requeue(self, url: str, depth: int, location: Optional[str], delay: float):
+        await asyncio.sleep(delay)
+        self._retrying.add(url)
+        await self._queue.put(self._item(url, depth, location=location))
+
+    def _retry_finished(self, task: asyncio.Task):
+        self._retries.discard(task)
+        if not self._retries:
+            self._retries_idle.set()
+
+    def cancel_retries(self):
+        for task in list(self._retries):
+            task.cancel()
+
+    async def get(self) -> str:
+        return (await self.get_timed())[0]
+
+    async def get_timed(self) -> Tuple[str, float]:
+        """Take the next URL along with the seconds it spent queued."""
+        while True:
+            _, _, url, depth, enqueued, location = await self._queue.get()
+            retry = url in self._retrying
+            self._retrying.discard(url)
+            if not retry and self.policy is not None and self.stopped is None:
+                reason = self.policy.exhausted(self.pages_started)
+                if reason is not None:
+                    self.stop(reason)
+            if self.stopped is not None:
+                self.task_done(url)
+                continue
+            if not retry:
+                self.pages_started += 1
+            self._in_flight[url] = depth
+            if location is not None:
+                self._locations[url] = location
+            return url, time.monotonic() - enqueued
+
+    def stop(self, reason: str):
+        """
+        Hand out no further URLs; pages in flight still finish.
+
+        Queued URLs are dropped, so join() returns once the pages in flight
+        are done. With a store they stay pending for a resumed crawl.
+
+        :param reason: Why the crawl stops, for the log
+        """
+        if self.stopped is None:
+            self.stopped = reason
+            logging.info(f"Stopping the crawl: {reason}; {len(self)} queued URLs are not crawled")
+        self._drop_queued()
+
+    def _drop_queued(self):
+        while not self._queue.empty():
+            url = self._queue.get_nowait()[2]
+            self._retrying.discard(url)
+            self.task_done(url)
+
+    def task_done(self, url: Optional[str] = None):
+        """Mark a URL taken with get() as finished."""
+        self._in_flight.pop(url, None)
+        self._locations.pop(url, None)
+        self._queue.task_done()
+
+    async def join(self):
+        """Wait until the queue is empty, every fetched URL is marked done and no retry is pending."""
+        while True:
+            await self._queue.join()
+            if not self._retries:
+                return
+            await self._retries_idle.wait()
+
+    def visited_urls(self) -> List[str]:
+        """URLs visited by this crawl; read back from the store when there is one."""
+        if self.visited is None:
+            return list(self.store.processed_urls())
+        return list(self.visited)
+
+    @property
+    def in_flight(self) -> int:
+        """URLs taken but not yet done."""
+        return len(self._in_flight)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+
+class BatchFrontier(Frontier):
+    """
+    Bounded frontier for a fixed list of URLs.
+
+    Links are never followed and nothing is remembered per URL, so an input
+    of millions of lines needs no more memory than the queue bound; feed()
+    blocks while the queue is full.
+    """
+
+    follows_links = False
+
+    def __init__(self, store: Optional[CrawlStore] = None, maxsize: int = 1000):
+        """
+        :param store: Persistent crawl state
+        :param maxsize: URLs read ahead of the workers
+        """
+        super().__init__(store)
+        self._queue = asyncio.Queue(maxsize)
+        self.processed = 0
+
+    async def feed(self, url: str):
+        if self.store is not None:
+            self.store.enqueue(url)
+        await self._queue.put(self._item(url, 0))
+
+    def add(self, url: str, parent: Optional[str] = None) -> bool:
+        return False
+
+    def mark_visited(self, url: str):
+        self.processed += 1
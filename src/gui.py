@@ -7,6 +7,9 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSettings
 from PyQt6.QtGui import QIcon
 import asyncio
+import logging
+import threading
+from progress import LogBuffer, install_log_buffer
 from web_to_pdf_converter import WebToPDFConverter, main as converter_main
 
 class WebToPDFConverterGUI(QMainWindow):
@@ -77,6 +80,8 @@ class WebToPDFConverterGUI(QMainWindow):
         # Progress Bar
         self.progress_bar = QProgressBar()
         main_layout.addWidget(self.progress_bar)
+        self.status_label = QLabel()
+        main_layout.addWidget(self.status_label)
 
         # Log Output
         self.log_output = QTextEdit()
@@ -97,6 +102,7 @@ class WebToPDFConverterGUI(QMainWindow):
         self.setUIEnabled(False)
         self.cancel_button.setEnabled(True)
         self.progress_bar.setValue(0)
+        self.status_label.clear()
         self.log_output.clear()
 
         url = self.url_input.text()
@@ -112,13 +118,15 @@ class WebToPDFConverterGUI(QMainWindow):
         self.converter_thread.start()
 
     def cancelConversion(self):
+        # The thread reports conversionComplete once pages in flight are done and the browser is closed.
+        self.cancel_button.setEnabled(False)
         if hasattr(self, 'converter_thread'):
             self.converter_thread.stop()
-        self.updateLog("Conversion cancelled by user.")
-        self.conversionFinished()
+        self.updateLog("Cancelling: finishing the pages in flight...")
 
-    def updateProgress(self, value):
-        self.progress_bar.setValue(value)
+    def updateProgress(self, snapshot):
+        self.progress_bar.setValue(int(snapshot.fraction * 100))
+        self.status_label.setText(snapshot.summary())
 
     def updateLog(self, message):
         self.log_output.append(message)
@@ -151,7 +159,14 @@ class WebToPDFConverterGUI(QMainWindow):
         settings.setValue("css_selector", self.css_selector_input.text())
 
 class ConverterThread(QThread):
-    progressUpdate = pyqtSignal(int)
+    """
+    Runs a conversion on its own event loop.
+
+    The engine reports a few progress snapshots per second; log lines are
+    buffered and sent along with them as one block, so a large crawl does
+    not flood the Qt event loop with a signal per page.
+    """
+    progressUpdate = pyqtSignal(object)
     logUpdate = pyqtSignal(str)
     conversionComplete = pyqtSignal()
 
@@ -162,28 +177,40 @@ class ConverterThread(QThread):
         self.concurrency = concurrency
         self.rate_limit = rate_limit
         self.css_selector = css_selector
-        self.running = True
+        self.cancel_event = threading.Event()
+        self.log_buffer = LogBuffer()
 
     def run(self):
-        asyncio.run(self.run_conversion())
+        root = install_log_buffer(self.log_buffer)
+        try:
+            asyncio.run(self.run_conversion())
+        finally:
+            root.removeHandler(self.log_buffer)
 
     async def run_conversion(self):
         try:
             await converter_main(self.url, self.output_dir, self.concurrency, self.rate_limit, self.css_selector,
-                                 progress_callback=self.update_progress, log_callback=self.update_log)
+                                 progress=self.update_progress, cancel_event=self.cancel_event)
         except Exception as e:
-            self.logUpdate.emit(f"Conversion error: {str(e)}")
+            logging.error(f"Conversion error: {str(e)}")
         finally:
+            self.flush_log()
+            if self.cancel_event.is_set():
+                self.logUpdate.emit("Conversion cancelled by user.")
             self.conversionComplete.emit()
 
-    def update_progress(self, value):
-        self.progressUpdate.emit(value)
+    def update_progress(self, snapshot):
+        self.progressUpdate.emit(snapshot)
+        self.flush_log()
 
-    def update_log(self, message):
-        self.logUpdate.emit(message)
+    def flush_log(self):
+        lines = self.log_buffer.drain()
+        if lines:
+            self.logUpdate.emit("\n".join(lines))
 
     def stop(self):
-        self.running = False
+        """Ask the conversion to wind down; conversionComplete follows once the browser is closed."""
+        self.cancel_event.set()
 
 def main():
     app = QApplication(sys.argv)
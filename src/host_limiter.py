@@ -0,0 +1,169 @@
+import asyncio
+import contextlib
+import email.utils
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+# Responses that mean the host wants us to slow down.
+BACKOFF_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease request rate and concurrency for one host.
+
+    Every healthy response nudges the rate up by about increase requests per
+    second per second and the concurrency up by about one slot per window.
+    A 429/503, an error or a response slower than latency_target halves
+    both, at most once per round trip so a burst of failures from the same
+    window counts once. Retry-After pauses the host outright. Neither value
+    ever exceeds its ceiling.
+    """
+
+    def __init__(self, initial_rate: float = 1.0, max_rate: float = 10.0, min_rate: float = 0.05,
+                 max_concurrency: int = 5, latency_target: float = 5.0, increase: float = 0.5,
+                 decrease: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        """
+        :param initial_rate: Starting requests per second
+        :param max_rate: Politeness ceiling on requests per second
+        :param min_rate: Floor the rate never drops below
+        :param max_concurrency: Ceiling on requests in flight to the host
+        :param latency_target: Response time in seconds above which the host counts as overloaded
+        :param increase: Additive rate step
+        :param decrease: Multiplicative factor applied on congestion
+        :param clock: Monotonic clock, replaceable in tests
+        """
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = min(initial_rate, max_rate)
+        self.max_concurrency = max_concurrency
+        self.concurrency = 1.0
+        self.latency_target = latency_target
+        self.increase = increase
+        self.decrease = decrease
+        self.clock = clock
+        self.in_flight = 0
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._last_decrease = float("-inf")
+
+    @property
+    def slots(self) -> int:
+        return max(1, int(self.concurrency))
+
+    def reserve(self) -> float:
+        """
+        Claim the next send slot.
+
+        :return: Seconds the caller has to wait before sending
+        """
+        now = self.clock()
+        start = max(now, self._next_slot, self._paused_until)
+        self._next_slot = start + 1.0 / self.rate
+        return start - now
+
+    def record(self, latency: Optional[float] = None, status: Optional[int] = None,
+               retry_after: Optional[float] = None, error: bool = False):
+        """
+        Adapt to the outcome of a request.
+
+        :param latency: Seconds until the response started, if known
+        :param status: HTTP status of the response
+        :param retry_after: Seconds requested by a Retry-After header
+        :param error: The request failed or timed out
+        """
+        now = self.clock()
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        congested = error or status in BACKOFF_STATUSES or (latency is not None and latency > self.latency_target)
+        if congested:
+            # One decrease per round trip: requests already in flight saw the same conditions.
+            if now - self._last_decrease >= max(1.0 / self.rate, latency or 0.0):
+                self._last_decrease = now
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.concurrency = max(1.0, self.concurrency * self.decrease)
+        else:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+            self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / self.concurrency)
+
+
+class HostLimiters:
+    """
+    Per-host AIMD limiters for the converter's workers.
+
+    Hosts are tracked independently, so a slow or throttling host only
+    slows down its own requests.
+    """
+
+    def __init__(self, **controller_options):
+        """
+        :param controller_options: AIMDController options applied to every host
+        """
+        self.controller_options = controller_options
+        self.controllers: Dict[str, AIMDController] = {}
+        self._conditions: Dict[str, asyncio.Condition] = {}
+
+    @staticmethod
+    def host(url: str) -> str:
+        return (urlsplit(url).hostname or "").lower()
+
+    def controller(self, url: str) -> AIMDController:
+        host = self.host(url)
+        if host not in self.controllers:
+            self.controllers[host] = AIMDController(**self.controller_options)
+        return self.controllers[host]
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str):
+        """Hold one of the host's concurrency slots, entered no sooner than its rate allows."""
+        controller = self.controller(url)
+        condition = self._conditions.setdefault(self.host(url), asyncio.Condition())
+        async with condition:
+            await condition.wait_for(lambda: controller.in_flight < controller.slots)
+            controller.in_flight += 1
+        try:
+            await asyncio.sleep(controller.reserve())
+            yield controller
+        finally:
+            async with condition:
+                controller.in_flight -= 1
+                condition.notify_all()
+
+    def record(self, url: str, response=None, latency: Optional[float] = None, error: bool = False):
+        """
+        Feed the outcome of a navigation back to its host's limiter.
+
+        :param url: URL that was requested
+        :param response: Playwright response of the main resource, if any
+        :param latency: Seconds until the response started, if known
+        :param error: The navigation failed
+        """
+        status = retry_after = None
+        if response is not None:
+            status = response.status
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+        self.controller(url).record(latency, status, retry_after, error)
+
+
+def response_latency(response) -> Optional[float]:
+    """Time to first byte of a Playwright response, in seconds, when the browser reported it."""
+    try:
+        response_start = response.request.timing["responseStart"]
+        return response_start / 1000 if response_start >= 0 else None
+    except Exception:
+        return None
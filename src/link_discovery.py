@@ -0,0 +1,134 @@
+import logging
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+from playwright.async_api import APIRequestContext, Playwright
+
+DISCOVERY_MODES = ("browser", "http", "auto")
+
+# Pages with less visible text than this and at least one script are
+# assumed to be rendered client-side.
+MIN_STATIC_TEXT = 200
+
+
+class LinkExtractor(HTMLParser):
+    """Single-pass HTML scanner collecting links and a few rendering hints."""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links: List[str] = []
+        self.scripts = 0
+        self.text_length = 0
+        self.noscript_mentions_js = False
+        self._skip_depth = 0
+        self._in_noscript = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+        elif tag == "base":
+            href = dict(attrs).get("href")
+            if href:
+                self.base_url = urljoin(self.base_url, href)
+        elif tag == "script":
+            self.scripts += 1
+            self._skip_depth += 1
+        elif tag == "style":
+            self._skip_depth += 1
+        elif tag == "noscript":
+            self._in_noscript = True
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "noscript":
+            self._in_noscript = False
+
+    def handle_data(self, data):
+        if self._in_noscript:
+            self.noscript_mentions_js = self.noscript_mentions_js or "javascript" in data.lower()
+        elif not self._skip_depth:
+            self.text_length += len(data.strip())
+
+    def absolute_links(self) -> List[str]:
+        return [urljoin(self.base_url, link) for link in self.links]
+
+    def looks_js_rendered(self) -> bool:
+        """Heuristic: an app shell with scripts but next to no server-rendered text."""
+        if self.noscript_mentions_js:
+            return True
+        return self.scripts > 0 and self.text_length < MIN_STATIC_TEXT
+
+
+def extract_links(html: str, base_url: str) -> Tuple[List[str], bool]:
+    """
+    Extract absolute link URLs from an HTML document.
+
+    :param html: Document source
+    :param base_url: URL the document was fetched from
+    :return: Tuple of (links, looks_js_rendered)
+    """
+    extractor = LinkExtractor(base_url)
+    try:
+        extractor.feed(html)
+        extractor.close()
+    except Exception as e:
+        logging.debug(f"HTML parse error on {base_url}: {str(e)}")
+    return extractor.absolute_links(), extractor.looks_js_rendered()
+
+
+class HttpLinkDiscoverer:
+    """
+    Discovers links over plain HTTP, without a browser navigation.
+
+    Uses Playwright's APIRequestContext, a pooled keep-alive HTTP client
+    that shares the browser's network stack settings.
+    """
+
+    def __init__(self, mode: str = "auto", timeout: float = 30.0):
+        """
+        :param mode: "http" trusts the fetched HTML; "auto" defers JS-rendered pages to the browser
+        :param timeout: Per-request timeout in seconds
+        """
+        if mode not in ("http", "auto"):
+            raise ValueError(f"Unsupported HTTP discovery mode: {mode}")
+        self.mode = mode
+        self.timeout = timeout
+        self.request: Optional[APIRequestContext] = None
+
+    async def start(self, playwright: Playwright):
+        self.request = await playwright.request.new_context()
+
+    async def close(self):
+        if self.request is not None:
+            await self.request.dispose()
+            self.request = None
+
+    async def discover(self, url: str) -> Optional[List[str]]:
+        """
+        Fetch a page and return its links.
+
+        :param url: URL to fetch
+        :return: Absolute links, or None when the browser must extract them instead
+        """
+        try:
+            response = await self.request.get(url, timeout=self.timeout * 1000)
+            # The request context holds every body until disposed, which is only at teardown otherwise.
+            try:
+                if not response.ok:
+                    return None
+                if "html" not in response.headers.get("content-type", ""):
+                    return []
+                links, js_rendered = extract_links(await response.text(), response.url)
+            finally:
+                await response.dispose()
+        except Exception as e:
+            logging.debug(f"HTTP discovery failed for {url}: {str(e)}")
+            return None
+        if js_rendered and self.mode == "auto":
+            logging.debug(f"Page looks JS-rendered, using browser discovery: {url}")
+            return None
+        return links
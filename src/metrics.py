@@ -0,0 +1,238 @@
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Stages of a page's life, in order; pipeline mode adds render_queue_wait.
+STAGES = ("queue_wait", "semaphore_wait", "rate_wait", "page_wait", "goto", "links", "render_queue_wait",
+          "pdf_render", "file_write")
+
+COUNTERS = ("pages_ok", "pages_failed", "pages_unchanged", "pages_duplicate", "bytes_written", "retries",
+            "browser_restarts")
+
+
+class Span(NamedTuple):
+    url: str
+    stage: str
+    start: float
+    duration: float
+    worker: str
+
+
+def _worker_name() -> str:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task.get_name() if task is not None else threading.current_thread().name
+
+
+class MetricsSink:
+    """
+    Receives spans and counters from Metrics.
+
+    Subclass and override what you need; every hook is a no-op by default.
+    """
+
+    def attach(self, metrics: "Metrics"):
+        pass
+
+    def on_span(self, span: Span):
+        pass
+
+    def close(self, metrics: "Metrics"):
+        pass
+
+
+class Metrics:
+    """
+    Per-page stage spans and crawl counters.
+
+    Stage totals and counters are always aggregated in memory; spans are
+    also forwarded to the configured sinks as they finish.
+    """
+
+    def __init__(self, sinks: Iterable[MetricsSink] = ()):
+        self.sinks: List[MetricsSink] = list(sinks)
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.stage_counts: Dict[str, int] = defaultdict(int)
+        self.started = time.time()
+        for sink in self.sinks:
+            sink.attach(self)
+
+    @classmethod
+    def from_options(cls, trace_path: Optional[str] = None, chrome_trace_path: Optional[str] = None,
+                     metrics_port: Optional[int] = None) -> "Metrics":
+        """
+        Build metrics with the sinks selected on the command line.
+
+        :param trace_path: JSON-lines file receiving every span
+        :param chrome_trace_path: Chrome trace-event file (open in chrome://tracing or Perfetto)
+        :param metrics_port: Port serving Prometheus text format on /metrics
+        """
+        sinks = []
+        if trace_path:
+            sinks.append(JsonlTraceSink(trace_path))
+        if chrome_trace_path:
+            sinks.append(ChromeTraceSink(chrome_trace_path))
+        if metrics_port:
+            sinks.append(PrometheusSink(metrics_port))
+        return cls(sinks)
+
+    def record(self, url: str, stage: str, start: float, duration: float):
+        """
+        Record a finished stage.
+
+        :param url: Page the stage belongs to
+        :param stage: Stage name, one of STAGES
+        :param start: Wall-clock start time (time.time())
+        :param duration: Seconds spent in the stage
+        """
+        self.stage_seconds[stage] += duration
+        self.stage_counts[stage] += 1
+        if self.sinks:
+            span = Span(url, stage, start, duration, _worker_name())
+            for sink in self.sinks:
+                sink.on_span(span)
+
+    @contextlib.contextmanager
+    def span(self, url: str, stage: str):
+        """Time the enclosed block as one stage of url; works around awaits too."""
+        start = time.time()
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(url, stage, start, time.perf_counter() - begin)
+
+    @contextlib.asynccontextmanager
+    async def waiting(self, url: str, stage: str, manager):
+        """Enter an async context manager, timing only how long entering it took."""
+        start = time.time()
+        begin = time.perf_counter()
+        async with manager as value:
+            self.record(url, stage, start, time.perf_counter() - begin)
+            yield value
+
+    def count(self, name: str, value: float = 1):
+        self.counters[name] += value
+
+    def snapshot(self) -> dict:
+        return {
+            "elapsed": time.time() - self.started,
+            "counters": {name: self.counters.get(name, 0) for name in COUNTERS},
+            "stages": {stage: {"count": self.stage_counts[stage], "seconds": round(self.stage_seconds[stage], 6)}
+                       for stage in STAGES if self.stage_counts.get(stage)},
+        }
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close(self)
+
+
+class JsonlTraceSink(MetricsSink):
+    """Writes one JSON object per span, then a final summary line."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def on_span(self, span: Span):
+        with self._lock:
+            self._file.write(json.dumps(span._asdict()) + "\n")
+
+    def close(self, metrics: Metrics):
+        with self._lock:
+            self._file.write(json.dumps({"summary": metrics.snapshot()}) + "\n")
+            self._file.close()
+
+
+class ChromeTraceSink(MetricsSink):
+    """
+    Writes spans as Chrome trace events, one track per worker.
+
+    Uses the JSON array format, which tolerates a missing closing bracket,
+    so the file stays loadable when a crawl is killed.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self._tids: Dict[str, int] = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _write(self, event: dict):
+        self._file.write(json.dumps(event) + ",\n")
+
+    def on_span(self, span: Span):
+        with self._lock:
+            tid = self._tids.get(span.worker)
+            if tid is None:
+                tid = self._tids[span.worker] = len(self._tids) + 1
+                self._write({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                             "args": {"name": span.worker}})
+            self._write({"name": span.stage, "cat": "page", "ph": "X", "pid": self._pid, "tid": tid,
+                         "ts": int(span.start * 1e6), "dur": int(span.duration * 1e6), "args": {"url": span.url}})
+
+    def close(self, metrics: Metrics):
+        with self._lock:
+            for name, value in metrics.snapshot()["counters"].items():
+                self._write({"name": name, "ph": "C", "pid": self._pid, "ts": int(time.time() * 1e6),
+                             "args": {name: value}})
+            self._file.write("{}]\n")
+            self._file.close()
+
+
+def prometheus_text(metrics: Metrics) -> str:
+    """Render counters and stage timings in the Prometheus text exposition format."""
+    lines = []
+    for name in COUNTERS:
+        lines.append(f"# TYPE webtopdf_{name}_total counter")
+        lines.append(f"webtopdf_{name}_total {metrics.counters.get(name, 0):g}")
+    lines.append("# TYPE webtopdf_stage_seconds summary")
+    for stage in STAGES:
+        if metrics.stage_counts.get(stage):
+            lines.append(f'webtopdf_stage_seconds_sum{{stage="{stage}"}} {metrics.stage_seconds[stage]:.6f}')
+            lines.append(f'webtopdf_stage_seconds_count{{stage="{stage}"}} {metrics.stage_counts[stage]}')
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusSink(MetricsSink):
+    """Serves the live counters on http://<host>:<port>/metrics for Prometheus to scrape."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.metrics: Optional[Metrics] = None
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics" or sink.metrics is None:
+                    self.send_error(404)
+                    return
+                body = prometheus_text(sink.metrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def attach(self, metrics: Metrics):
+        self.metrics = metrics
+
+    def close(self, metrics: Metrics):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,21 +1,93 @@
 from playwright.sync_api import sync_playwright
-from typing import Optional
+from typing import Dict, Iterable, Optional
 import logging
+from readiness import ReadinessPolicy
+from request_filter import RequestFilter
+from response_cache import ResponseCache
+from web_to_pdf_converter import WebToPDFConverter, run_sync
 
 class PDFGenerator:
-    def __init__(self, options: Optional[dict] = None):
+    def __init__(self, options: Optional[dict] = None, readiness: Optional[ReadinessPolicy] = None,
+                 request_filter: Optional[RequestFilter] = None, response_cache: Optional[ResponseCache] = None):
         self.options = options or {}
+        self.readiness = readiness or ReadinessPolicy()
+        self.request_filter = request_filter or RequestFilter.render_profile()
+        self.response_cache = response_cache
+        self._playwright = None
+        self._browser = None
+        self._page = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get_page(self):
+        """Return the reusable page, launching the browser on first use."""
+        if self._browser is None:
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch()
+        if self._page is None or self._page.is_closed():
+            self._page = self._browser.new_page()
+            if self.response_cache is not None:
+                self.response_cache.install_sync(self._page)
+            self.request_filter.install_sync(self._page)
+        return self._page
+
+    def _discard_page(self):
+        if self._page is not None:
+            try:
+                self._page.close()
+            except Exception:
+                pass
+            self._page = None
 
     def generate_pdf(self, url: str, output_path: str) -> bool:
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch()
-                page = browser.new_page()
-                page.goto(url, wait_until="networkidle")
-                page.pdf(path=output_path, **self.options)
-                browser.close()
+            page = self._get_page()
+            self.readiness.navigate_sync(page, url)
+            page.pdf(path=output_path, **self.options)
             logging.info(f"Generated PDF for {url} at {output_path}")
             return True
         except Exception as e:
             logging.error(f"Error generating PDF for {url}: {e}")
-            return False
\ No newline at end of file
+            # Start the next call from a fresh page rather than a broken one.
+            self._discard_page()
+            return False
+
+    def generate_many(self, urls: Iterable[str], output_dir: str, **converter_options) -> Dict[str, Optional[str]]:
+        """
+        Print many URLs concurrently through the async engine.
+
+        The batch shares one browser and a pool of reused pages; generate_pdf()
+        would print them one at a time. Files are named after the URL path.
+
+        :param urls: URLs to print, consumed lazily
+        :param output_dir: Directory to save PDF files
+        :param converter_options: WebToPDFConverter options, e.g. concurrency_limit or rate_limit
+        :return: Path of the PDF per URL, None for URLs that failed
+        """
+        results: Dict[str, Optional[str]] = {}
+
+        def on_outcome(url: str, status: str, output_path: Optional[str]):
+            results[url] = output_path if status != "failed" else None
+
+        async def convert():
+            async with WebToPDFConverter(readiness=self.readiness, request_filter=self.request_filter,
+                                         response_cache=self.response_cache, pdf_options=self.options,
+                                         on_outcome=on_outcome, **converter_options) as converter:
+                await converter.convert_urls(urls, output_dir)
+
+        run_sync(convert())
+        return results
+
+    def close(self):
+        """Close the shared browser. Safe to call more than once."""
+        self._discard_page()
+        if self._browser is not None:
+            self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
@@ -0,0 +1,211 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Callable, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+MANIFEST_SUFFIX = ".manifest.jsonl"
+
+
+def output_filename(url: str) -> str:
+    """
+    File name of a page's PDF in one-file-per-page mode.
+
+    URLs differing only by query string get distinct names, so they no
+    longer overwrite each other.
+    """
+    parsed = urlparse(url)
+    name = parsed.path.strip("/").replace("/", "_") or "index"
+    if parsed.query:
+        name += "_" + hashlib.blake2b(parsed.query.encode("utf-8"), digest_size=4).hexdigest()
+    return f"{name}.pdf"
+
+
+def _load_pypdf():
+    try:
+        import pypdf
+    except ImportError:
+        raise RuntimeError("Merged PDF output requires pypdf: pip install pypdf")
+    return pypdf
+
+
+class PdfOutput:
+    """
+    One PDF file per page, plus a manifest mapping each URL to its output.
+
+    The manifest is written as JSON lines next to the PDFs, one object per
+    page: {"url", "file", "first_page", "last_page"}, or {"url", "alias_of"}
+    for pages whose content duplicates an earlier one.
+    """
+
+    merged = False
+    # Per-page PDFs from earlier runs stay valid, so their manifest entries are kept.
+    manifest_mode = "a"
+
+    def __init__(self, output_dir: str, name: str = "site"):
+        """
+        :param output_dir: Directory to save PDF files
+        :param name: Base name of the manifest (and of volumes, when merging)
+        """
+        self.output_dir = output_dir
+        self.name = name
+        os.makedirs(output_dir, exist_ok=True)
+        self._manifest = open(os.path.join(output_dir, name + MANIFEST_SUFFIX), self.manifest_mode,
+                              encoding="utf-8")
+        self._lock = threading.RLock()
+
+    def path_for(self, url: str) -> str:
+        return os.path.join(self.output_dir, output_filename(url))
+
+    def record(self, url: str, path: str, first_page: Optional[int] = None, last_page: Optional[int] = None):
+        """Add a rendered page to the manifest."""
+        self._write_entry({"url": url, "file": os.path.basename(path), "first_page": first_page,
+                           "last_page": last_page})
+
+    def alias(self, url: str, alias_of: str):
+        """Record a page that was not rendered because it duplicates alias_of."""
+        self._write_entry({"url": url, "alias_of": alias_of})
+
+    def _write_entry(self, entry: dict):
+        with self._lock:
+            self._manifest.write(json.dumps(entry) + "\n")
+            self._manifest.flush()
+
+    def close(self):
+        self._manifest.close()
+
+
+class _SpooledPage(NamedTuple):
+    url: str
+    parent: Optional[str]
+    title: str
+    path: str
+    pages: int
+
+
+class MergedPdfOutput(PdfOutput):
+    """
+    Merges rendered pages into size-capped volumes with one bookmark per page.
+
+    Page PDFs are spooled to disk as they arrive and only combined when a
+    volume is full, so memory use is bounded by a single volume. Within a
+    volume pages are ordered depth-first along the crawl tree and each
+    page's bookmark is nested under its parent's when both share the volume.
+    """
+
+    merged = True
+    # Every run rewrites the volumes from <name>-0001.pdf, so earlier page ranges no longer apply.
+    manifest_mode = "w"
+
+    def __init__(self, output_dir: str, name: str = "site", max_pages: Optional[int] = None,
+                 max_bytes: Optional[int] = 256 * 1024 * 1024,
+                 parent_of: Optional[Callable[[str], Optional[str]]] = None):
+        """
+        :param output_dir: Directory to save the volumes
+        :param name: Volume base name; volumes are <name>-0001.pdf, <name>-0002.pdf, ...
+        :param max_pages: Start a new volume once this many PDF pages are spooled
+        :param max_bytes: Start a new volume once this many PDF bytes are spooled
+        :param parent_of: Returns the URL a page was discovered on, for bookmark nesting
+        """
+        self._pypdf = _load_pypdf()
+        super().__init__(output_dir, name)
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.parent_of = parent_of or (lambda url: None)
+        self.volumes: List[str] = []
+        self._spool_dir = tempfile.mkdtemp(prefix=f".{name}-spool-", dir=output_dir)
+        self._spooled: List[_SpooledPage] = []
+        self._spooled_pages = 0
+        self._spooled_bytes = 0
+
+    def _volume_path(self, index: int) -> str:
+        return os.path.join(self.output_dir, f"{self.name}-{index:04d}.pdf")
+
+    def _full_with(self, pages: int, size: int) -> bool:
+        if not self._spooled:
+            return False
+        if self.max_pages is not None and self._spooled_pages + pages > self.max_pages:
+            return True
+        return self.max_bytes is not None and self._spooled_bytes + size > self.max_bytes
+
+    def add(self, url: str, data: bytes, title: Optional[str] = None) -> str:
+        """
+        Spool a rendered page into the current volume.
+
+        Blocks while a full volume is written out; call it from an executor.
+
+        :param url: URL of the page
+        :param data: The page's PDF bytes
+        :param title: Bookmark title (defaults to the URL)
+        :return: Path of the volume the page will appear in
+        """
+        pages = len(self._pypdf.PdfReader(io.BytesIO(data)).pages)
+        with self._lock:
+            if self._full_with(pages, len(data)):
+                self._write_volume()
+            fd, path = tempfile.mkstemp(suffix=".pdf", dir=self._spool_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self._spooled.append(_SpooledPage(url, self.parent_of(url), title or url, path, pages))
+            self._spooled_pages += pages
+            self._spooled_bytes += len(data)
+            return self._volume_path(len(self.volumes) + 1)
+
+    @staticmethod
+    def _tree_order(spooled: List[_SpooledPage]) -> List[_SpooledPage]:
+        """Order pages depth-first along the crawl tree, keeping arrival order among siblings."""
+        in_volume = {page.url for page in spooled}
+        children = defaultdict(list)
+        roots = []
+        for page in spooled:
+            if page.parent in in_volume:
+                children[page.parent].append(page)
+            else:
+                roots.append(page)
+        ordered = []
+        stack = list(reversed(roots))
+        while stack:
+            page = stack.pop()
+            ordered.append(page)
+            stack.extend(reversed(children[page.url]))
+        return ordered
+
+    def _write_volume(self):
+        path = self._volume_path(len(self.volumes) + 1)
+        writer = self._pypdf.PdfWriter()
+        bookmarks = {}
+        entries = []
+        page_number = 0
+        for page in self._tree_order(self._spooled):
+            writer.append(page.path, import_outline=False)
+            bookmarks[page.url] = writer.add_outline_item(page.title, page_number,
+                                                          parent=bookmarks.get(page.parent))
+            entries.append((page.url, page_number + 1, page_number + page.pages))
+            page_number += page.pages
+        tmp_path = path + ".part"
+        with open(tmp_path, "wb") as f:
+            writer.write(f)
+        os.replace(tmp_path, path)
+        for url, first_page, last_page in entries:
+            self.record(url, path, first_page, last_page)
+        for page in self._spooled:
+            os.remove(page.path)
+        logging.info(f"Wrote {path}: {len(self._spooled)} URLs, {page_number} pages")
+        self.volumes.append(path)
+        self._spooled = []
+        self._spooled_pages = 0
+        self._spooled_bytes = 0
+
+    def close(self):
+        """Write out the last volume and the manifest."""
+        with self._lock:
+            if self._spooled:
+                self._write_volume()
+        shutil.rmtree(self._spool_dir, ignore_errors=True)
+        super().close()
@@ -0,0 +1,51 @@
+import os
+from typing import List, Optional
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _children(pid: int) -> List[int]:
+    # Each thread lists only the children it forked itself; Chromium forks its helpers off the main thread.
+    try:
+        threads = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return []
+    children = set()
+    for tid in threads:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.update(int(child) for child in f.read().split())
+        except OSError:
+            # The thread exited meanwhile.
+            continue
+    return sorted(children)
+
+
+def descendant_pids(pid: int) -> List[int]:
+    """PIDs of every descendant of a process; empty where /proc is unavailable."""
+    children = _children(pid)
+    return children + [grandchild for child in children for grandchild in descendant_pids(child)]
+
+
+def rss_bytes(pid: int) -> int:
+    """Resident set size of one process, 0 if it cannot be read."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def tree_rss(pid: Optional[int] = None, include_self: bool = True) -> int:
+    """
+    Summed RSS of a process and all its descendants.
+
+    For this process, the descendants are the Playwright driver and the
+    browsers it launched.
+
+    :param pid: Root process (defaults to this process)
+    :param include_self: Count the root process itself
+    """
+    pid = pid if pid is not None else os.getpid()
+    pids = descendant_pids(pid) + ([pid] if include_self else [])
+    return sum(rss_bytes(p) for p in pids)
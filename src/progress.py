@@ -0,0 +1,124 @@
+import collections
+import logging
+import threading
+import time
+from typing import Callable, Deque, List, NamedTuple, Optional, Tuple
+
+
+class ProgressSnapshot(NamedTuple):
+    done: int
+    failed: int
+    queued: int
+    in_flight: int
+    pages_per_second: float
+    elapsed: float
+    last_url: Optional[str] = None
+    finished: bool = False
+
+    @property
+    def fraction(self) -> float:
+        """Share of the URLs known so far that are finished; grows and shrinks as a crawl discovers links."""
+        total = self.done + self.queued + self.in_flight
+        return self.done / total if total else (1.0 if self.finished else 0.0)
+
+    def summary(self) -> str:
+        return (f"{self.done} pages ({self.failed} failed), {self.pages_per_second:.1f} pages/s, "
+                f"{self.queued} queued, {self.in_flight} in flight")
+
+
+class ProgressReporter:
+    """
+    Coalesces page outcomes into periodic snapshots.
+
+    record() only bumps counters, so it is cheap enough to call per page;
+    the callback sees at most one snapshot per interval however fast pages
+    finish. Throughput is measured over a sliding window rather than the
+    whole run, so it follows slowdowns and recoveries.
+    """
+
+    def __init__(self, callback: Callable[[ProgressSnapshot], None], interval: float = 0.25, window: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param callback: Receives each snapshot
+        :param interval: Seconds between snapshots
+        :param window: Seconds of history the pages/s figure covers
+        :param clock: Monotonic clock, replaceable in tests
+        """
+        self.callback = callback
+        self.interval = interval
+        self.window = window
+        self.clock = clock
+        self.started = clock()
+        self.done = 0
+        self.failed = 0
+        self.last_url: Optional[str] = None
+        self._samples: Deque[Tuple[float, int]] = collections.deque([(self.started, 0)])
+
+    def record(self, url: str, status: str, output_path: Optional[str] = None):
+        """Count a finished URL; has the signature of the converter's on_outcome hook."""
+        self.done += 1
+        if status == "failed":
+            self.failed += 1
+        self.last_url = url
+
+    def snapshot(self, queued: int = 0, in_flight: int = 0, finished: bool = False) -> ProgressSnapshot:
+        now = self.clock()
+        self._samples.append((now, self.done))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+        since, done_since = self._samples[0]
+        rate = (self.done - done_since) / (now - since) if now > since else 0.0
+        return ProgressSnapshot(self.done, self.failed, queued, in_flight, rate, now - self.started,
+                                self.last_url, finished)
+
+    def emit(self, queued: int = 0, in_flight: int = 0, finished: bool = False):
+        self.callback(self.snapshot(queued, in_flight, finished))
+
+
+class LogBuffer(logging.Handler):
+    """
+    Collects log lines for a UI to pick up in batches.
+
+    Only the newest max_lines are kept between two drains; a busy crawl
+    would otherwise hand the UI more lines than it can draw.
+    """
+
+    def __init__(self, max_lines: int = 200, level: int = logging.INFO):
+        super().__init__(level)
+        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        self._lines: Deque[str] = collections.deque(maxlen=max_lines)
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord):
+        line = self.format(record)
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append(line)
+
+    def drain(self) -> List[str]:
+        """Take the lines collected since the last drain, noting how many older ones were skipped."""
+        with self._lock:
+            lines = list(self._lines)
+            if self._dropped:
+                lines.insert(0, f"... {self._dropped} earlier lines skipped")
+            self._lines.clear()
+            self._dropped = 0
+        return lines
+
+
+def install_log_buffer(buffer: LogBuffer) -> logging.Logger:
+    """
+    Attach a LogBuffer to the root logger and let INFO records through.
+
+    Once the root logger has a handler, logging.basicConfig() no longer
+    lowers its level from WARNING, so the progress lines would never arrive.
+
+    :return: The root logger, to remove the buffer from afterwards
+    """
+    root = logging.getLogger()
+    root.addHandler(buffer)
+    if root.getEffectiveLevel() > buffer.level:
+        root.setLevel(buffer.level)
+    return root
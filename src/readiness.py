@@ -0,0 +1,211 @@
+import re
+import time
+from typing import List, NamedTuple, Optional, Tuple
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Resolves once no resource has finished loading for quietMs, or after maxMs.
+_QUIET_WINDOW_JS = """
+({quietMs, maxMs}) => new Promise(resolve => {
+    let timer = setTimeout(() => resolve(true), quietMs);
+    const observer = new PerformanceObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(() => { observer.disconnect(); resolve(true); }, quietMs);
+    });
+    observer.observe({type: 'resource'});
+    setTimeout(() => { observer.disconnect(); resolve(false); }, maxMs);
+})
+"""
+
+
+class ReadinessResult(NamedTuple):
+    response: object
+    strategy: str
+    time_to_ready: float
+    timed_out: bool
+
+
+class ReadinessStrategy:
+    """
+    Decides when a navigated page is ready to be printed.
+
+    A strategy is a goto wait_until event plus an optional settle step.
+    settle() issues a single page call, so one strategy serves both the sync
+    and the async Playwright APIs.
+    """
+
+    wait_until = "load"
+
+    @property
+    def name(self) -> str:
+        return self.wait_until
+
+    def settle(self, page, timeout_ms: float):
+        """
+        Issue the post-navigation wait.
+
+        :return: None when there is nothing to wait for, else the page call's
+            result (an awaitable on async pages); a result of False means the
+            wait ran out of time
+        """
+        return None
+
+
+class LoadState(ReadinessStrategy):
+    """Wait for a Playwright load state: commit, domcontentloaded, load or networkidle."""
+
+    def __init__(self, state: str = "load"):
+        self.state = state
+        # networkidle is awaited separately so a stalled network only costs the budget, not the page.
+        self.wait_until = "load" if state == "networkidle" else state
+
+    @property
+    def name(self) -> str:
+        return self.state
+
+    def settle(self, page, timeout_ms: float):
+        if self.state == "networkidle":
+            return page.wait_for_load_state("networkidle", timeout=timeout_ms)
+        return None
+
+
+class WaitForSelector(ReadinessStrategy):
+    """Wait for DOMContentLoaded, then for an element to be attached."""
+
+    wait_until = "domcontentloaded"
+
+    def __init__(self, selector: str):
+        self.selector = selector
+
+    @property
+    def name(self) -> str:
+        return f"selector:{self.selector}"
+
+    def settle(self, page, timeout_ms: float):
+        return page.wait_for_selector(self.selector, state="attached", timeout=timeout_ms)
+
+
+class FontsReady(ReadinessStrategy):
+    """Wait for the load event, then until document.fonts reports every face loaded."""
+
+    wait_until = "load"
+
+    @property
+    def name(self) -> str:
+        return "fonts"
+
+    def settle(self, page, timeout_ms: float):
+        return page.wait_for_function("() => document.fonts.status === 'loaded'", timeout=timeout_ms)
+
+
+class QuietWindow(ReadinessStrategy):
+    """
+    Wait for DOMContentLoaded, then until no resource finishes for quiet_ms.
+
+    Unlike networkidle, hanging requests (beacons, long polls, websockets)
+    do not hold the page open.
+    """
+
+    wait_until = "domcontentloaded"
+
+    def __init__(self, quiet_ms: int = 500):
+        self.quiet_ms = quiet_ms
+
+    @property
+    def name(self) -> str:
+        return f"quiet:{self.quiet_ms}"
+
+    def settle(self, page, timeout_ms: float):
+        return page.evaluate(_QUIET_WINDOW_JS, {"quietMs": self.quiet_ms, "maxMs": timeout_ms})
+
+
+def parse_strategy(spec: str) -> ReadinessStrategy:
+    """
+    Build a strategy from its CLI spelling.
+
+    Accepts commit, domcontentloaded, load, networkidle, fonts,
+    selector:<css> and quiet[:<ms>].
+    """
+    kind, _, arg = spec.partition(":")
+    if kind in ("commit", "domcontentloaded", "load", "networkidle") and not arg:
+        return LoadState(kind)
+    if kind == "fonts" and not arg:
+        return FontsReady()
+    if kind == "selector" and arg:
+        return WaitForSelector(arg)
+    if kind == "quiet":
+        return QuietWindow(int(arg) if arg else 500)
+    raise ValueError(f"Unknown readiness strategy: {spec}")
+
+
+class ReadinessPolicy:
+    """
+    Maps URL patterns to readiness strategies under a hard per-page time budget.
+
+    Navigation failures still raise. When the settle step exceeds what is
+    left of the budget, the page is treated as ready with timed_out set.
+    """
+
+    def __init__(self, default: Optional[ReadinessStrategy] = None,
+                 rules: Optional[List[Tuple[str, ReadinessStrategy]]] = None, budget: float = 30.0):
+        """
+        :param default: Strategy for URLs no rule matches (defaults to networkidle)
+        :param rules: (regex, strategy) pairs; the first pattern found in the URL wins
+        :param budget: Seconds allowed from navigation start to ready
+        """
+        self.default = default or LoadState("networkidle")
+        self.rules = [(re.compile(pattern), strategy) for pattern, strategy in rules or []]
+        self.budget = budget
+
+    @classmethod
+    def from_specs(cls, default: Optional[str] = None, rules: Optional[List[str]] = None,
+                   budget: float = 30.0) -> "ReadinessPolicy":
+        """
+        Build a policy from CLI strings.
+
+        :param default: Default strategy spec
+        :param rules: "regex=strategy" specs
+        :param budget: Seconds allowed from navigation start to ready
+        """
+        parsed = []
+        for rule in rules or []:
+            pattern, sep, spec = rule.rpartition("=")
+            if not sep:
+                raise ValueError(f"Readiness rule must look like PATTERN=STRATEGY: {rule}")
+            parsed.append((pattern, parse_strategy(spec)))
+        return cls(parse_strategy(default) if default else None, parsed, budget)
+
+    def strategy_for(self, url: str) -> ReadinessStrategy:
+        for pattern, strategy in self.rules:
+            if pattern.search(url):
+                return strategy
+        return self.default
+
+    async def navigate(self, page, url: str) -> ReadinessResult:
+        """Navigate an async Playwright page and wait until it is ready."""
+        strategy = self.strategy_for(url)
+        start = time.monotonic()
+        response = await page.goto(url, wait_until=strategy.wait_until, timeout=self.budget * 1000)
+        timed_out = False
+        pending = strategy.settle(page, self._remaining_ms(start))
+        if pending is not None:
+            try:
+                timed_out = await pending is False
+            except PlaywrightTimeoutError:
+                timed_out = True
+        return ReadinessResult(response, strategy.name, time.monotonic() - start, timed_out)
+
+    def navigate_sync(self, page, url: str) -> ReadinessResult:
+        """Navigate a sync Playwright page and wait until it is ready."""
+        strategy = self.strategy_for(url)
+        start = time.monotonic()
+        response = page.goto(url, wait_until=strategy.wait_until, timeout=self.budget * 1000)
+        timed_out = False
+        try:
+            timed_out = strategy.settle(page, self._remaining_ms(start)) is False
+        except PlaywrightTimeoutError:
+            timed_out = True
+        return ReadinessResult(response, strategy.name, time.monotonic() - start, timed_out)
+
+    def _remaining_ms(self, start: float) -> float:
+        # Playwright treats a timeout of 0 as "no timeout".
+        return max(1.0, (self.budget - (time.monotonic() - start)) * 1000)
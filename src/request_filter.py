@@ -0,0 +1,101 @@
+import fnmatch
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+# Ad, analytics and tracking hosts; a pattern also matches its subdomains.
+DEFAULT_BLOCKED_HOSTS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "connect.facebook.net",
+    "scorecardresearch.com",
+    "hotjar.com",
+    "segment.io",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+)
+
+# Playwright resource types skipped when printing pages.
+RENDER_BLOCKED_TYPES = ("media",)
+# Link discovery never needs anything visual.
+DISCOVERY_BLOCKED_TYPES = ("image", "media", "font")
+
+
+class RequestFilter:
+    """
+    Aborts subresource requests by resource type or host pattern.
+
+    Installed as a catch-all route on a page or context. Allowed requests
+    fall back to any other route handlers, so the filter composes with
+    later interception layers. Navigation requests are never blocked.
+    """
+
+    def __init__(self, blocked_types: Iterable[str] = (), blocked_hosts: Iterable[str] = ()):
+        """
+        :param blocked_types: Playwright resource types to abort (image, media, font, stylesheet, ...)
+        :param blocked_hosts: Host patterns to abort; fnmatch wildcards allowed, subdomains always match
+        """
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.blocked = 0
+
+    @classmethod
+    def render_profile(cls, extra_types: Iterable[str] = (), extra_hosts: Iterable[str] = ()) -> "RequestFilter":
+        return cls(RENDER_BLOCKED_TYPES + tuple(extra_types), DEFAULT_BLOCKED_HOSTS + tuple(extra_hosts))
+
+    @classmethod
+    def discovery_profile(cls, extra_types: Iterable[str] = (), extra_hosts: Iterable[str] = ()) -> "RequestFilter":
+        return cls(DISCOVERY_BLOCKED_TYPES + tuple(extra_types), DEFAULT_BLOCKED_HOSTS + tuple(extra_hosts))
+
+    def _host_blocked(self, host: str) -> bool:
+        for pattern in self.blocked_hosts:
+            if host == pattern or host.endswith("." + pattern) or fnmatch.fnmatchcase(host, pattern):
+                return True
+        return False
+
+    def should_block(self, request) -> bool:
+        if request.is_navigation_request():
+            return False
+        if request.resource_type in self.blocked_types:
+            return True
+        return self._host_blocked((urlsplit(request.url).hostname or "").lower())
+
+    async def install(self, target):
+        """Route every request of an async page or context through the filter."""
+        await target.route("**/*", self._handle)
+
+    def install_sync(self, target):
+        """Route every request of a sync page or context through the filter."""
+        target.route("**/*", self._handle_sync)
+
+    async def _handle(self, route):
+        if self.should_block(route.request):
+            self.blocked += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    def _handle_sync(self, route):
+        if self.should_block(route.request):
+            self.blocked += 1
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()
+
+
+def build_filter(profile: str, extra_types: Optional[Iterable[str]] = None,
+                 extra_hosts: Optional[Iterable[str]] = None) -> RequestFilter:
+    """
+    Build a filter for a crawl stage.
+
+    :param profile: "render" or "discovery"
+    :param extra_types: Resource types to block on top of the profile
+    :param extra_hosts: Host patterns to block on top of the profile
+    """
+    factory = RequestFilter.discovery_profile if profile == "discovery" else RequestFilter.render_profile
+    return factory(extra_types or (), extra_hosts or ())
@@ -0,0 +1,379 @@
+import asyncio
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS variants (
+    url TEXT PRIMARY KEY,
+    vary TEXT NOT NULL
+);
+"""
+
+CACHEABLE_STATUSES = (200, 203, 301, 404, 410)
+
+# The body handed to route.fulfill is already decoded and re-framed.
+_DROPPED_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive")
+
+
+class CacheEntry(NamedTuple):
+    key: str
+    status: int
+    headers: Dict[str, str]
+    body_hash: str
+    expires_at: float
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str], now: float) -> Optional[float]:
+    """
+    Seconds a response may be served without revalidation, per Cache-Control.
+
+    :return: None if the response must not be stored at all
+    """
+    directives = _parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name) is not None:
+            try:
+                return max(0.0, float(directives[name]))
+            except ValueError:
+                return 0.0
+    expires = _http_date(headers.get("expires"))
+    if expires is not None:
+        return max(0.0, expires - (_http_date(headers.get("date")) or now))
+    last_modified = _http_date(headers.get("last-modified"))
+    if last_modified is not None:
+        # Heuristic freshness: a tenth of the time since the last change (RFC 9111, 4.2.2).
+        return max(0.0, ((_http_date(headers.get("date")) or now) - last_modified) / 10)
+    return 0.0
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk HTTP cache served through request interception.
+
+    Entries are keyed by URL plus the request headers named in the
+    response's Vary header; bodies are stored once per content hash. Fresh
+    entries are fulfilled from disk, stale ones are revalidated with
+    If-None-Match/If-Modified-Since, and the least recently used entries
+    are evicted once the cache outgrows max_bytes. A directory can be shared
+    by the crawler, the PDF generator and concurrent processes.
+
+    Redirects are not followed when fetching: the 3xx itself is cached and
+    fulfilled, so the browser follows its Location and the target page
+    keeps its own URL, which relative links on it resolve against.
+
+    The size of the stored bodies is tracked in memory rather than summed
+    per store; since other processes sharing the directory add to it too,
+    it is recounted from the index once it passes max_bytes, and eviction
+    then frees a tenth of the cap so the recount stays rare. The async
+    handler reads and writes bodies in the default executor, keeping file
+    I/O off the event loop.
+
+    Route handlers may run on another thread than the one that opened the
+    cache (run_sync moves to a helper thread under Playwright's sync API),
+    so the index connection is shared between threads behind a lock.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30):
+        """
+        :param directory: Cache directory, created if missing
+        :param max_bytes: Size cap for stored bodies
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_size = self._stored_size()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stored = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = self._stored_size()
+        return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated,
+                "stored": self.stored, "bytes": size}
+
+    def _stored_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    # Index and body storage
+
+    def _key(self, url: str, vary: list, request_headers: Dict[str, str]) -> str:
+        material = url + "".join(f"\n{name}:{request_headers.get(name, '')}" for name in vary)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self.directory, "objects", body_hash[:2], body_hash)
+
+    def _find(self, url: str, request_headers: Dict[str, str]) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute("SELECT vary FROM variants WHERE url = ?", (url,)).fetchone()
+            vary = json.loads(row[0]) if row else []
+            row = self._conn.execute(
+                "SELECT key, status, headers, body_hash, expires_at FROM entries WHERE key = ?",
+                (self._key(url, vary, request_headers),)
+            ).fetchone()
+        return CacheEntry(row[0], row[1], json.loads(row[2]), row[3], row[4]) if row else None
+
+    def _touch(self, entry: CacheEntry):
+        with self._lock:
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), entry.key))
+
+    def lookup(self, url: str, request_headers: Dict[str, str]) -> Optional[CacheEntry]:
+        entry = self._find(url, request_headers)
+        if entry is None or not os.path.exists(self._body_path(entry.body_hash)):
+            return None
+        self._touch(entry)
+        return entry
+
+    async def _lookup_async(self, url: str, request_headers: Dict[str, str]) -> Optional[CacheEntry]:
+        entry = self._find(url, request_headers)
+        loop = asyncio.get_running_loop()
+        if entry is None or not await loop.run_in_executor(None, os.path.exists, self._body_path(entry.body_hash)):
+            return None
+        self._touch(entry)
+        return entry
+
+    def read_body(self, entry: CacheEntry) -> bytes:
+        with open(self._body_path(entry.body_hash), "rb") as f:
+            return f.read()
+
+    def _write_body(self, body: bytes) -> str:
+        """Write a body under its content hash, unless it is stored already, and return the hash."""
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._body_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        return body_hash
+
+    @staticmethod
+    def _remove_bodies(paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _storable(status: int, headers: Dict[str, str], now: float) -> Optional[Tuple[float, List[str]]]:
+        """Freshness lifetime and Vary header names of a response, or None if it must not be stored."""
+        lifetime = freshness_lifetime(headers, now)
+        vary = [name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()]
+        if lifetime is None or status not in CACHEABLE_STATUSES or "*" in vary:
+            return None
+        if lifetime == 0 and not (headers.get("etag") or headers.get("last-modified")):
+            return None
+        return lifetime, vary
+
+    def store(self, url: str, request_headers: Dict[str, str], status: int, headers: Dict[str, str], body: bytes):
+        """Store a response if its status and Cache-Control allow it."""
+        now = time.time()
+        storable = self._storable(status, headers, now)
+        if storable is None:
+            return
+        body_hash = self._write_body(body)
+        self._remove_bodies(self._index(url, request_headers, status, headers, body_hash, len(body), now, *storable))
+
+    async def _store_async(self, url: str, request_headers: Dict[str, str], status: int, headers: Dict[str, str],
+                           body: bytes):
+        now = time.time()
+        storable = self._storable(status, headers, now)
+        if storable is None:
+            return
+        loop = asyncio.get_running_loop()
+        body_hash = await loop.run_in_executor(None, self._write_body, body)
+        evicted = self._index(url, request_headers, status, headers, body_hash, len(body), now, *storable)
+        if evicted:
+            await loop.run_in_executor(None, self._remove_bodies, evicted)
+
+    def _index(self, url: str, request_headers: Dict[str, str], status: int, headers: Dict[str, str],
+               body_hash: str, size: int, now: float, lifetime: float, vary: List[str]) -> List[str]:
+        """
+        Record a stored body in the index.
+
+        :return: Paths of bodies evicted to make room, for the caller to delete
+        """
+        key = self._key(url, vary, request_headers)
+        kept = {name: value for name, value in headers.items() if name.lower() not in _DROPPED_HEADERS}
+        with self._lock:
+            replaced = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO variants (url, vary) VALUES (?, ?)", (url, json.dumps(vary)))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, status, headers, body_hash, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(kept), body_hash, size, now + lifetime, now),
+            )
+            self._total_size += size - (replaced[0] if replaced else 0)
+            self.stored += 1
+            return self._evict()
+
+    def refresh(self, entry: CacheEntry, headers: Dict[str, str]):
+        """Extend a revalidated entry's lifetime from a 304 response."""
+        merged = dict(entry.headers)
+        merged.update({name: value for name, value in headers.items() if name.lower() not in _DROPPED_HEADERS})
+        lifetime = freshness_lifetime(merged, time.time()) or 0.0
+        with self._lock:
+            self._conn.execute("UPDATE entries SET headers = ?, expires_at = ? WHERE key = ?",
+                               (json.dumps(merged), time.time() + lifetime, entry.key))
+
+    def _evict(self) -> List[str]:
+        """
+        Drop least recently used entries once over max_bytes; called with the lock held.
+
+        :return: Paths of bodies no longer used by any entry
+        """
+        if self._total_size <= self.max_bytes:
+            return []
+        # Count what other processes sharing the directory have stored, or evicted, meanwhile.
+        self._total_size = self._stored_size()
+        if self._total_size <= self.max_bytes:
+            return []
+        target = self.max_bytes - self.max_bytes // 10
+        orphaned = []
+        for key, body_hash, size in self._conn.execute(
+                "SELECT key, body_hash, size FROM entries ORDER BY last_access").fetchall():
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            shared = self._conn.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone()
+            if not shared:
+                orphaned.append(self._body_path(body_hash))
+            self._total_size -= size
+            if self._total_size <= target:
+                break
+        return orphaned
+
+    # Request interception
+
+    @staticmethod
+    def _cacheable_request(request) -> bool:
+        return request.method == "GET" and "authorization" not in request.headers
+
+    @staticmethod
+    def _conditional_headers(entry: CacheEntry, request_headers: Dict[str, str]) -> Dict[str, str]:
+        headers = dict(request_headers)
+        if entry.headers.get("etag"):
+            headers["if-none-match"] = entry.headers["etag"]
+        if entry.headers.get("last-modified"):
+            headers["if-modified-since"] = entry.headers["last-modified"]
+        return headers
+
+    async def install(self, target):
+        """Serve every request of an async page or context through the cache."""
+        await target.route("**/*", self._handle)
+
+    def install_sync(self, target):
+        """Serve every request of a sync page or context through the cache."""
+        target.route("**/*", self._handle_sync)
+
+    async def _handle(self, route):
+        request = route.request
+        if not self._cacheable_request(request):
+            await route.fallback()
+            return
+        request_headers = request.headers
+        loop = asyncio.get_running_loop()
+        entry = await self._lookup_async(request.url, request_headers)
+        if entry is not None and entry.expires_at > time.time():
+            self.hits += 1
+            body = await loop.run_in_executor(None, self.read_body, entry)
+            await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+            return
+        fetch_headers = self._conditional_headers(entry, request_headers) if entry else request_headers
+        try:
+            response = await route.fetch(headers=fetch_headers, max_redirects=0)
+        except Exception as e:
+            logging.debug(f"Cache fetch failed for {request.url}: {str(e)}")
+            await route.fallback()
+            return
+        if response.status == 304 and entry is not None:
+            self.revalidated += 1
+            self.refresh(entry, response.headers)
+            body = await loop.run_in_executor(None, self.read_body, entry)
+            await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+            return
+        self.misses += 1
+        body = await response.body()
+        await self._store_async(request.url, request_headers, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    def _handle_sync(self, route):
+        request = route.request
+        if not self._cacheable_request(request):
+            route.fallback()
+            return
+        request_headers = request.headers
+        entry = self.lookup(request.url, request_headers)
+        if entry is not None and entry.expires_at > time.time():
+            self.hits += 1
+            route.fulfill(status=entry.status, headers=entry.headers, body=self.read_body(entry))
+            return
+        fetch_headers = self._conditional_headers(entry, request_headers) if entry else request_headers
+        try:
+            response = route.fetch(headers=fetch_headers, max_redirects=0)
+        except Exception as e:
+            logging.debug(f"Cache fetch failed for {request.url}: {str(e)}")
+            route.fallback()
+            return
+        if response.status == 304 and entry is not None:
+            self.revalidated += 1
+            self.refresh(entry, response.headers)
+            route.fulfill(status=entry.status, headers=entry.headers, body=self.read_body(entry))
+            return
+        self.misses += 1
+        body = response.body()
+        self.store(request.url, request_headers, response.status, response.headers, body)
+        route.fulfill(response=response, body=body)
@@ -0,0 +1,164 @@
+import random
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+# Responses worth asking for again: throttling and server-side trouble.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Responses meaning the host itself is down or overloaded, not just the page.
+HOST_DOWN_STATUSES = (502, 503, 504)
+
+# Chromium net:: errors and Playwright messages, by what they say about a retry.
+_PERMANENT_ERRORS = ("ERR_NAME_NOT_RESOLVED", "ERR_CERT_", "ERR_SSL_", "ERR_INVALID_", "ERR_UNKNOWN_URL_SCHEME",
+                     "ERR_ABORTED", "ERR_BLOCKED_BY", "ERR_TOO_MANY_REDIRECTS", "ERR_UNSAFE_")
+_HOST_ERRORS = ("ERR_NAME_NOT_RESOLVED", "ERR_CONNECTION_REFUSED", "ERR_CONNECTION_RESET", "ERR_CONNECTION_CLOSED",
+                "ERR_CONNECTION_TIMED_OUT", "ERR_CONNECTION_FAILED", "ERR_ADDRESS_UNREACHABLE", "ERR_TIMED_OUT",
+                "ERR_EMPTY_RESPONSE", "ERR_CERT_", "ERR_SSL_", "Timeout ")
+
+
+class ErrorClass(NamedTuple):
+    kind: str
+    retryable: bool
+    host_failure: bool
+
+
+def classify(message: str, status: Optional[int] = None) -> ErrorClass:
+    """
+    Classify a failed navigation.
+
+    :param message: Error message, usually carrying Chromium's net::ERR_* code
+    :param status: HTTP status, when the server answered
+    :return: Kind ("http", "timeout", "network" or "permanent"), whether another
+             attempt may succeed and whether the failure counts against the host
+    """
+    if status is not None:
+        return ErrorClass("http", status in RETRY_STATUSES, status in HOST_DOWN_STATUSES)
+    host_failure = any(code in message for code in _HOST_ERRORS)
+    if any(code in message for code in _PERMANENT_ERRORS):
+        return ErrorClass("permanent", False, host_failure)
+    if "Timeout " in message or "ERR_TIMED_OUT" in message:
+        return ErrorClass("timeout", True, host_failure)
+    # Unknown errors (crashed pages, reset connections, ...) usually pass.
+    return ErrorClass("network", True, host_failure)
+
+
+class RetryPolicy:
+    """
+    How often and how soon to retry a URL.
+
+    Delays grow exponentially with "equal jitter": half of the backoff is
+    fixed, the other half random, so workers that failed together do not
+    retry together yet never retry immediately.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 60.0,
+                 rng: Callable[[], float] = random.random):
+        """
+        :param max_attempts: Attempts per URL, including the first one
+        :param base_delay: Backoff before the first retry
+        :param max_delay: Cap on the backoff
+        :param rng: Returns a float in [0, 1), replaceable in tests
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng
+
+    def should_retry(self, error: ErrorClass, attempt: int) -> bool:
+        return error.retryable and attempt < self.max_attempts
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait after a failed attempt.
+
+        :param attempt: Number of the attempt that just failed, from 1
+        :param retry_after: Seconds the server asked for; honoured even beyond max_delay
+        """
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = backoff / 2 + self.rng() * backoff / 2
+        return max(delay, retry_after or 0.0)
+
+
+class _Circuit:
+    __slots__ = ("failures", "opened_at", "probe_started")
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started: Optional[float] = None
+
+
+class CircuitBreakers:
+    """
+    Per-host circuit breakers.
+
+    After failure_threshold consecutive host failures the circuit opens and
+    the host gets no requests for reset_timeout seconds. Then a single probe
+    request is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param failure_threshold: Consecutive failures that open a host's circuit
+        :param reset_timeout: Seconds an open circuit waits before probing the host
+        :param clock: Monotonic clock, replaceable in tests
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._circuits: Dict[str, _Circuit] = {}
+
+    @staticmethod
+    def host(url: str) -> str:
+        return (urlsplit(url).hostname or "").lower()
+
+    def _circuit(self, url: str) -> _Circuit:
+        host = self.host(url)
+        if host not in self._circuits:
+            self._circuits[host] = _Circuit()
+        return self._circuits[host]
+
+    def is_open(self, url: str) -> bool:
+        circuit = self._circuits.get(self.host(url))
+        return circuit is not None and circuit.opened_at is not None
+
+    def allow(self, url: str) -> bool:
+        """Whether a request to url's host may be sent now; claims the probe of a half-open circuit."""
+        circuit = self._circuit(url)
+        if circuit.opened_at is None:
+            return True
+        now = self.clock()
+        if now - circuit.opened_at < self.reset_timeout:
+            return False
+        # A probe that never reported back (its page failed elsewhere) expires like an open circuit.
+        if circuit.probe_started is not None and now - circuit.probe_started < self.reset_timeout:
+            return False
+        circuit.probe_started = now
+        return True
+
+    def retry_in(self, url: str) -> float:
+        """Seconds until url's host may be tried again."""
+        circuit = self._circuits.get(self.host(url))
+        if circuit is None or circuit.opened_at is None:
+            return 0.0
+        since = circuit.probe_started if circuit.probe_started is not None else circuit.opened_at
+        return max(0.0, since + self.reset_timeout - self.clock())
+
+    def record(self, url: str, host_failure: bool):
+        """
+        Feed back the outcome of a request.
+
+        :param url: URL that was requested
+        :param host_failure: The host failed to answer (as opposed to answering with a page or a page-level error)
+        """
+        circuit = self._circuit(url)
+        if not host_failure:
+            circuit.failures = 0
+            circuit.opened_at = circuit.probe_started = None
+            return
+        circuit.failures += 1
+        if circuit.opened_at is not None or circuit.failures >= self.failure_threshold:
+            circuit.opened_at = self.clock()
+            circuit.probe_started = None
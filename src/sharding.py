@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+from typing import Callable, Iterable, List, Optional, Sequence
+from urllib.parse import urldefrag, urlparse
+from crawl_policy import CrawlPolicy, UrlRules
+from crawl_store import CrawlStore
+from frontier import Frontier
+from sitemaps import RobotsPolicy, SitemapEntry, sitemap_seeds, unchanged_since_render
+from url_utils import SeenSet, canonicalize_url, is_in_scope
+from web_to_pdf_converter import WebToPDFConverter
+
+
+def shard_for(url: str, shards: int) -> int:
+    """
+    Return the shard that owns a URL.
+
+    Uses a stable digest rather than hash(), which is salted per process.
+
+    :param url: URL to place
+    :param shards: Number of shards
+    :return: Shard index in [0, shards)
+    """
+    canonical = canonicalize_url(url)
+    digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards
+
+
+class ShardFrontier(Frontier):
+    """
+    Frontier of a single shard process.
+
+    URLs arrive from the coordinator; discovered links, visits and
+    completions are reported back instead of being queued locally. Links and
+    retries are always reported before the completion of the page they came
+    from, so the coordinator never sees the crawl as finished too early.
+    Retries stay in the shard that owns the URL. Depth and URL rules are
+    checked before a link is reported; the page budget is the coordinator's.
+    """
+
+    def __init__(self, outbox, policy: Optional[CrawlPolicy] = None):
+        super().__init__(policy=policy)
+        self.outbox = outbox
+        # Visits are reported to the coordinator instead.
+        self.visited = None
+
+    def feed(self, url: str, parent: Optional[str] = None, depth: int = 0, location: Optional[str] = None):
+        if self.parents is not None and parent is not None:
+            self.parents[url] = parent
+        self._put(url, depth, location=location)
+
+    def add(self, url: str, parent: Optional[str] = None, depth: Optional[int] = None,
+            sitemap_priority: Optional[float] = None, location: Optional[str] = None) -> bool:
+        if depth is None:
+            depth = self.depth_for(parent)
+        if self.policy is not None and not self.policy.admits(url, depth):
+            return False
+        self.outbox.put(("link", (url, parent, depth, location if location != url else None)))
+        return True
+
+    def mark_visited(self, url: str):
+        super().mark_visited(url)
+        self.outbox.put(("visited", url))
+
+    def retry_later(self, url: str, delay: float):
+        # Counted as another pending URL, so the coordinator keeps waiting for it.
+        self.outbox.put(("retry", url))
+        super().retry_later(url, delay)
+
+    def task_done(self, url: Optional[str] = None):
+        self.outbox.put(("done", None))
+        super().task_done(url)
+
+
+async def _feed_shard(frontier: ShardFrontier, inbox):
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await loop.run_in_executor(None, inbox.get)
+        if item is None:
+            break
+        frontier.feed(*item)
+    await frontier.join()
+
+
+async def _run_shard(index: int, inbox, outbox, domain: str, output_dir: str, css_selector: Optional[str],
+                     state_path: Optional[str], converter_kwargs: dict):
+    # Each shard writes its own manifest, volumes, traces, result log and dead letters,
+    # and serves metrics on its own port.
+    converter_kwargs = dict(converter_kwargs, output_name=f"{converter_kwargs.get('output_name', 'site')}-shard{index}")
+    for option in ("trace_path", "chrome_trace_path", "result_log", "dead_letters"):
+        if converter_kwargs.get(option):
+            root, ext = os.path.splitext(converter_kwargs[option])
+            converter_kwargs[option] = f"{root}-shard{index}{ext}"
+    if converter_kwargs.get("metrics_port"):
+        converter_kwargs["metrics_port"] += index
+    # The coordinator owns the frontier rows; shards only record page results.
+    store = CrawlStore(state_path) if state_path else None
+    try:
+        async with WebToPDFConverter(store=store, **converter_kwargs) as converter:
+            frontier = ShardFrontier(outbox, converter.crawl_policy)
+            await converter._run_workers(frontier, domain, output_dir, css_selector, until=_feed_shard(frontier, inbox))
+    finally:
+        if store is not None:
+            store.close()
+
+
+def _shard_main(index: int, inbox, outbox, domain: str, output_dir: str, css_selector: Optional[str],
+                state_path: Optional[str], converter_kwargs: dict):
+    logging.basicConfig(level=logging.INFO, format=f'%(asctime)s - shard {index} - %(levelname)s - %(message)s')
+    asyncio.run(_run_shard(index, inbox, outbox, domain, output_dir, css_selector, state_path, converter_kwargs))
+
+
+def _coordinate(base_url: str, inboxes: Sequence, outbox, alive: Callable[[], bool],
+                store: Optional[CrawlStore] = None, resume: bool = False,
+                bloom_capacity: Optional[int] = None, seeds: Sequence[SitemapEntry] = (),
+                skip_unchanged: bool = False, max_pages: Optional[int] = None,
+                strip_params: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Route URLs to shards until every routed URL has been reported done.
+
+    :param base_url: Seed URL, loaded as given
+    :param inboxes: One inbox queue per shard
+    :param outbox: Queue shared by all shards for reporting back
+    :param alive: Returns False once any shard process has died
+    :param store: Persistent crawl state recording the frontier
+    :param resume: Continue the crawl recorded in the store
+    :param bloom_capacity: Expected URL count; dedupes through a Bloom filter
+    :param seeds: Sitemap entries routed after the seed URL, in order
+    :param skip_unchanged: Mark seeds whose lastmod predates their stored PDF as done without routing them
+    :param max_pages: URLs routed before the rest are only recorded as pending for a resumed crawl
+    :param strip_params: Query parameter patterns dropped when canonicalizing the seed URLs
+    :return: List of visited URLs; read back from the store when there is one
+    """
+    seen = SeenSet(bloom_capacity)
+    # Without a store, the only record of visited URLs.
+    visited: Optional[List[str]] = [] if store is None else None
+    pending = routed = 0
+
+    def route(url: str, parent: Optional[str] = None, depth: int = 0, location: Optional[str] = None,
+              force: bool = False):
+        nonlocal pending, routed
+        if not seen.add(url) and not force:
+            return
+        if store is not None:
+            store.enqueue(url, depth, location)
+        if max_pages is not None and routed >= max_pages:
+            return
+        routed += 1
+        pending += 1
+        inboxes[shard_for(url, len(inboxes))].put((url, parent, depth, location))
+
+    def seed(location: str, depth: int):
+        location = urldefrag(location.strip())[0]
+        url = canonicalize_url(location, strip_params)
+        route(url, depth=depth, location=location if location != url else None)
+
+    if store is not None:
+        store.begin(resume)
+        if resume:
+            seen.update(store.crawl_urls())
+            for url, depth, location in store.pending_entries():
+                route(url, depth=depth or 0, location=location, force=True)
+    seed(base_url, 0)
+    for entry in seeds:
+        url = canonicalize_url(entry.url, strip_params)
+        record = store.get(url) if skip_unchanged and store is not None and url not in seen else None
+        if unchanged_since_render(record, entry.lastmod):
+            seen.add(url)
+            store.enqueue(url)
+            store.mark_done(url, record.output_path, record.content_hash, record.etag, record.last_modified)
+            continue
+        seed(entry.url, 1)
+    while pending:
+        try:
+            kind, payload = outbox.get(timeout=1.0)
+        except queue.Empty:
+            if not alive():
+                raise RuntimeError("A shard process exited before the crawl finished")
+            continue
+        if kind == "link":
+            route(*payload)
+        elif kind == "retry":
+            pending += 1
+        elif kind == "visited" and visited is not None:
+            visited.append(payload)
+        elif kind == "done":
+            pending -= 1
+    return visited if visited is not None else list(store.processed_urls())
+
+
+def crawl_sharded(base_url: str, output_dir: str, processes: int, css_selector: Optional[str] = None,
+                  state_path: Optional[str] = None, resume: bool = False, **converter_kwargs) -> List[str]:
+    """
+    Crawl and convert using several processes, each driving its own browser.
+
+    The frontier is partitioned by a hash of the URL; this process acts as
+    coordinator, deduplicating discovered links and routing them to the
+    owning shard. The rate limit (and the adaptive rate ceiling) is split
+    evenly so the site sees the same total request rate as a single-process
+    run. robots.txt and sitemaps are read once, here, and the rules handed
+    to every shard. The page budget is enforced here, across all shards.
+
+    :param base_url: The starting URL for crawling
+    :param output_dir: Directory to save PDF files
+    :param processes: Number of shard processes
+    :param css_selector: CSS selector for selective rendering
+    :param state_path: SQLite crawl store shared by the coordinator and shards
+    :param resume: Continue the crawl recorded in the store
+    :param converter_kwargs: WebToPDFConverter options applied to every shard
+    :return: List of processed URLs
+    """
+    strip_params = converter_kwargs.get("strip_params")
+    domain = urlparse(canonicalize_url(base_url, strip_params)).netloc
+    rate_limit = converter_kwargs.get("rate_limit", 1.0)
+    max_rate = converter_kwargs.get("max_rate", 10.0)
+    max_pages = converter_kwargs.pop("max_pages", None)
+    scope = CrawlPolicy(converter_kwargs.get("max_depth"),
+                        rules=UrlRules(converter_kwargs.get("include"), converter_kwargs.get("exclude")))
+    seeds = []
+    if converter_kwargs.get("sitemaps") or converter_kwargs.get("obey_robots"):
+        robots = converter_kwargs["robots"] = RobotsPolicy.load(base_url)
+        if robots.crawl_delay:
+            rate_limit = min(rate_limit, 1.0 / robots.crawl_delay)
+            max_rate = min(max_rate, 1.0 / robots.crawl_delay)
+        if converter_kwargs.get("sitemaps"):
+            seeds = [entry for entry in sitemap_seeds(base_url, robots)
+                     for url in [canonicalize_url(entry.url, strip_params)]
+                     if is_in_scope(url, domain) and scope.admits(url, 1)]
+            logging.info(f"Sitemaps: {len(seeds)} URLs in scope")
+    converter_kwargs["rate_limit"] = rate_limit / processes
+    if converter_kwargs.get("adaptive"):
+        converter_kwargs["max_rate"] = max_rate / processes
+    ctx = multiprocessing.get_context("spawn")
+    inboxes = [ctx.Queue() for _ in range(processes)]
+    outbox = ctx.Queue()
+    workers = [
+        ctx.Process(
+            target=_shard_main,
+            args=(i, inboxes[i], outbox, domain, output_dir, css_selector, state_path, converter_kwargs),
+            daemon=True,
+        )
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    store = CrawlStore(state_path) if state_path else None
+    try:
+        skip_unchanged = bool(converter_kwargs.get("incremental")) and not converter_kwargs.get("merge")
+        return _coordinate(base_url, inboxes, outbox, lambda: all(w.is_alive() for w in workers), store, resume,
+                           converter_kwargs.get("bloom_capacity"), seeds, skip_unchanged, max_pages, strip_params)
+    finally:
+        if store is not None:
+            store.close()
+        for inbox in inboxes:
+            inbox.put(None)
+        for worker in workers:
+            worker.join(timeout=30)
+            if worker.is_alive():
+                worker.terminate()
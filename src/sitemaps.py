@@ -0,0 +1,182 @@
+import gzip
+import io
+import logging
+import os
+import urllib.request
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from crawl_store import PageRecord
+
+USER_AGENT = "web_to_pdf"
+
+# Guards against sitemap-index loops and runaway indexes.
+MAX_SITEMAPS = 10000
+
+
+class SitemapEntry(NamedTuple):
+    url: str
+    lastmod: Optional[float]
+    priority: Optional[float] = None
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """Timestamp of a W3C datetime (2024-05-01, 2024-05-01T10:00:00Z, ...), or None."""
+    if not value:
+        return None
+    value = value.strip().replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_priority(value: Optional[str]) -> Optional[float]:
+    """A <priority> value clamped to [0, 1], or None when missing or malformed."""
+    try:
+        return min(1.0, max(0.0, float(value.strip())))
+    except (AttributeError, ValueError):
+        return None
+
+
+def fetch(url: str, timeout: float = 30.0) -> Optional[bytes]:
+    """GET a URL and return its body, decompressed if gzipped; None on any failure."""
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = response.read()
+    except Exception as e:
+        logging.debug(f"Fetching {url} failed: {str(e)}")
+        return None
+    # Covers both Content-Encoding: gzip and .xml.gz files.
+    if data[:2] == b"\x1f\x8b":
+        try:
+            data = gzip.decompress(data)
+        except OSError as e:
+            logging.warning(f"Bad gzip data in {url}: {str(e)}")
+            return None
+    return data
+
+
+class RobotsPolicy:
+    """robots.txt rules for one site: which URLs may be fetched and how fast."""
+
+    def __init__(self, robots_url: str, lines: Iterable[str] = (), user_agent: str = USER_AGENT):
+        """
+        :param robots_url: URL the rules were read from
+        :param lines: robots.txt content; no lines means everything is allowed
+        :param user_agent: Product token matched against User-agent groups
+        """
+        self.robots_url = robots_url
+        self.user_agent = user_agent
+        self._parser = RobotFileParser(robots_url)
+        self._parser.parse(list(lines))
+
+    @classmethod
+    def load(cls, base_url: str, timeout: float = 30.0, user_agent: str = USER_AGENT) -> "RobotsPolicy":
+        parts = urlsplit(base_url)
+        robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        data = fetch(robots_url, timeout)
+        lines = data.decode("utf-8", errors="replace").splitlines() if data else []
+        return cls(robots_url, lines, user_agent)
+
+    def allowed(self, url: str) -> bool:
+        return self._parser.can_fetch(self.user_agent, url)
+
+    @property
+    def crawl_delay(self) -> Optional[float]:
+        delay = self._parser.crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+    @property
+    def sitemaps(self) -> List[str]:
+        return list(self._parser.site_maps() or [])
+
+
+def parse_sitemap(data: bytes, base_url: str = "") -> "tuple[List[SitemapEntry], List[str]]":
+    """
+    Parse a sitemap or sitemap index.
+
+    Elements are streamed and cleared as they are read, so large sitemaps
+    (up to 50,000 URLs each) do not build a full tree.
+
+    :return: Tuple of (page entries, nested sitemap URLs)
+    """
+    entries: List[SitemapEntry] = []
+    sitemaps: List[str] = []
+    loc = lastmod = priority = None
+    try:
+        for _, element in ET.iterparse(io.BytesIO(data), events=("end",)):
+            # Strip the namespace: {http://www.sitemaps.org/schemas/sitemap/0.9}loc -> loc
+            tag = element.tag.rsplit("}", 1)[-1]
+            if tag == "loc":
+                loc = (element.text or "").strip()
+            elif tag == "lastmod":
+                lastmod = element.text
+            elif tag == "priority":
+                priority = element.text
+            elif tag in ("url", "sitemap"):
+                if loc:
+                    if tag == "url":
+                        entries.append(SitemapEntry(urljoin(base_url, loc), parse_lastmod(lastmod),
+                                                    parse_priority(priority)))
+                    else:
+                        sitemaps.append(urljoin(base_url, loc))
+                loc = lastmod = priority = None
+                element.clear()
+    except ET.ParseError as e:
+        logging.warning(f"Invalid sitemap {base_url}: {str(e)}")
+    return entries, sitemaps
+
+
+def iter_sitemap_entries(sitemap_urls: Iterable[str], fetcher: Callable[[str], Optional[bytes]] = fetch,
+                         max_sitemaps: int = MAX_SITEMAPS) -> Iterator[SitemapEntry]:
+    """Walk sitemaps and sitemap indexes breadth-first, yielding every page entry once."""
+    pending = list(sitemap_urls)
+    seen = set()
+    while pending and len(seen) < max_sitemaps:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        data = fetcher(sitemap_url)
+        if not data:
+            continue
+        entries, nested = parse_sitemap(data, sitemap_url)
+        logging.info(f"Sitemap {sitemap_url}: {len(entries)} URLs, {len(nested)} nested sitemaps")
+        pending.extend(nested)
+        yield from entries
+
+
+def sitemap_seeds(base_url: str, robots: RobotsPolicy,
+                  fetcher: Callable[[str], Optional[bytes]] = fetch) -> List[SitemapEntry]:
+    """
+    Collect the URLs listed in a site's sitemaps, most recently modified first.
+
+    Sitemaps come from robots.txt, falling back to /sitemap.xml. URLs
+    robots.txt disallows are dropped; a URL listed twice keeps its newest entry.
+    """
+    parts = urlsplit(base_url)
+    sitemap_urls = robots.sitemaps or [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+    newest: Dict[str, SitemapEntry] = {}
+    for entry in iter_sitemap_entries(sitemap_urls, fetcher):
+        if not robots.allowed(entry.url):
+            continue
+        if entry.url not in newest or (entry.lastmod or 0) > (newest[entry.url].lastmod or 0):
+            newest[entry.url] = entry
+    # Undated URLs go last; everything else newest first.
+    return sorted(newest.values(), key=lambda entry: -(entry.lastmod or 0))
+
+
+def unchanged_since_render(record: Optional[PageRecord], lastmod: Optional[float]) -> bool:
+    """Whether a sitemap lastmod says a page has not changed since its stored PDF was written."""
+    if record is None or lastmod is None or record.updated_at is None:
+        return False
+    if not record.output_path or not os.path.exists(record.output_path):
+        return False
+    return record.updated_at >= lastmod
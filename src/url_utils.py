@@ -0,0 +1,151 @@
+import fnmatch
+import hashlib
+import math
+import posixpath
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change page content.
+DEFAULT_STRIP_PARAMS = ("utm_*", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_ga")
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str, strip_params: Optional[Iterable[str]] = None) -> str:
+    """
+    Normalize a URL so that equivalent spellings dedupe to one string.
+
+    Lowercases scheme and host, drops default ports, fragments, trailing
+    slashes and dot segments, sorts the query and removes ignored parameters.
+
+    :param url: Absolute URL
+    :param strip_params: Query parameter names (fnmatch patterns) to drop; defaults to DEFAULT_STRIP_PARAMS
+    :return: Canonical URL
+    """
+    patterns = DEFAULT_STRIP_PARAMS if strip_params is None else tuple(strip_params)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+
+    path = parts.path
+    if path:
+        path = posixpath.normpath(path)
+        # normpath keeps a leading "//" and turns "" into "."
+        path = "/" + path.lstrip("/") if path != "." else ""
+    path = path.rstrip("/")
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not any(fnmatch.fnmatchcase(key, pattern) for pattern in patterns)
+    ]
+    query.sort()
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def is_in_scope(url: str, domain: str, include_subdomains: bool = False) -> bool:
+    """
+    Check whether a URL belongs to the site being crawled.
+
+    Compares hostnames, so external URLs that merely contain the domain in
+    their path or query do not match.
+
+    :param url: Absolute URL
+    :param domain: Host of the site (a netloc; any port is ignored)
+    :param include_subdomains: Also accept subdomains of domain
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in _DEFAULT_PORTS:
+        return False
+    host = (parts.hostname or "").rstrip(".")
+    site = (urlsplit(f"//{domain}").hostname or "").rstrip(".")
+    return host == site or (include_subdomains and host.endswith("." + site))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte strings using double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        :param capacity: Expected number of items
+        :param error_rate: Target false-positive rate at capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: bytes):
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: bytes) -> bool:
+        """Add an item; return True if it was (probably) not present before."""
+        added = False
+        for pos in self._positions(item):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        return added
+
+    def __contains__(self, item: bytes) -> bool:
+        return all(self._bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(item))
+
+
+class SeenSet:
+    """
+    Memory-compact set of URLs.
+
+    Stores 64-bit fingerprints instead of URL strings. With bloom_capacity
+    it uses a Bloom filter instead, trading a small false-positive rate
+    (a URL wrongly treated as seen) for constant memory.
+    """
+
+    def __init__(self, bloom_capacity: Optional[int] = None, error_rate: float = 0.001):
+        """
+        :param bloom_capacity: Expected URL count; enables the Bloom filter
+        :param error_rate: Bloom filter false-positive rate at capacity
+        """
+        self._bloom = BloomFilter(bloom_capacity, error_rate) if bloom_capacity else None
+        self._fingerprints = set()
+        self._count = 0
+
+    @staticmethod
+    def _digest(url: str) -> bytes:
+        return hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+
+    def add(self, url: str) -> bool:
+        """Add a URL; return True if it was not already present."""
+        digest = self._digest(url)
+        if self._bloom is not None:
+            added = self._bloom.add(digest)
+        else:
+            fingerprint = int.from_bytes(digest, "big")
+            added = fingerprint not in self._fingerprints
+            self._fingerprints.add(fingerprint)
+        self._count += added
+        return added
+
+    def update(self, urls: Iterable[str]):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url: str) -> bool:
+        digest = self._digest(url)
+        if self._bloom is not None:
+            return digest in self._bloom
+        return int.from_bytes(digest, "big") in self._fingerprints
+
+    def __len__(self) -> int:
+        return self._count
@@ -1,14 +1,53 @@
+import argparse
 import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import itertools
 import logging
-from typing import List, Optional, Dict
-from urllib.parse import urljoin, urlparse
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional, Dict
+from urllib.parse import urldefrag, urljoin, urlparse
 from playwright.async_api import async_playwright, Page
 from aiolimiter import AsyncLimiter
+from batch import DeadLetters, ResultLog, is_url_list, iter_urls
+from browser_daemon import resolve_endpoint
+from browser_pool import PagePool
+from crawl_policy import PRIORITY_MODES, CrawlPolicy, UrlRules, build_scorer
+from crawl_store import DONE, CrawlStore, PageRecord
+from dedup import DEDUP_MODES, PAGE_TEXT_JS, ContentDeduplicator
+from frontier import BatchFrontier, Frontier
+from host_limiter import HostLimiters, parse_retry_after, response_latency
+from link_discovery import DISCOVERY_MODES, HttpLinkDiscoverer
+from metrics import Metrics
+from pdf_output import MergedPdfOutput, PdfOutput, output_filename
+from process_memory import tree_rss
+from progress import ProgressReporter, ProgressSnapshot
+from readiness import ReadinessPolicy, ReadinessResult
+from request_filter import RequestFilter, build_filter
+from response_cache import ResponseCache
+from retry_policy import HOST_DOWN_STATUSES, RETRY_STATUSES, CircuitBreakers, ErrorClass, RetryPolicy, classify
+from sitemaps import RobotsPolicy, sitemap_seeds, unchanged_since_render
+from url_utils import canonicalize_url, is_in_scope
 
 class NetworkError(Exception):
     """Exception raised for network-related errors."""
     pass
 
+class HTTPStatusError(NetworkError):
+    """Exception raised when a page answers with a status worth retrying (429, 5xx)."""
+
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class HostUnavailableError(NetworkError):
+    """Exception raised instead of loading a page while its host's circuit breaker is open."""
+    pass
+
 class RenderingError(Exception):
     """Exception raised for page rendering errors."""
     pass
@@ -18,134 +57,1098 @@ class PDFConversionError(Exception):
     pass
 
 class WebToPDFConverter:
-    def __init__(self, concurrency_limit: int = 5, rate_limit: float = 1.0):
+    def __init__(self, concurrency_limit: int = 5, rate_limit: float = 1.0, pool_size: Optional[int] = None,
+                 store: Optional[CrawlStore] = None, incremental: bool = False,
+                 strip_params: Optional[Iterable[str]] = None, bloom_capacity: Optional[int] = None,
+                 discovery: str = "browser", pipeline: bool = False, discovery_concurrency: int = 5,
+                 discovery_rate: Optional[float] = None, render_queue_size: int = 100,
+                 readiness: Optional[ReadinessPolicy] = None, block_requests: bool = True,
+                 block_types: Optional[Iterable[str]] = None, block_hosts: Optional[Iterable[str]] = None,
+                 cache_dir: Optional[str] = None, cache_size_mb: int = 1024, merge: bool = False,
+                 volume_max_pages: Optional[int] = None, volume_max_mb: Optional[int] = 256, output_name: str = "site",
+                 dedup: Optional[str] = None, dedup_distance: int = 3, adaptive: bool = False,
+                 max_rate: float = 10.0, max_host_concurrency: Optional[int] = None, trace_path: Optional[str] = None,
+                 chrome_trace_path: Optional[str] = None, metrics_port: Optional[int] = None,
+                 recycle_pages: Optional[int] = None, recycle_rss_mb: Optional[int] = None,
+                 result_log: Optional[str] = None, sitemaps: bool = False, obey_robots: bool = False,
+                 robots: Optional[RobotsPolicy] = None, max_attempts: int = 3, retry_delay: float = 1.0,
+                 retry_max_delay: float = 60.0, breaker_threshold: Optional[int] = 5, breaker_reset: float = 60.0,
+                 dead_letters: Optional[str] = None, render: bool = True, pdf_options: Optional[dict] = None,
+                 request_filter: Optional[RequestFilter] = None, response_cache: Optional[ResponseCache] = None,
+                 on_outcome: Optional[Callable[[str, str, Optional[str]], None]] = None,
+                 browser_endpoint: Optional[str] = None, max_depth: Optional[int] = None,
+                 max_pages: Optional[int] = None, time_budget: Optional[float] = None,
+                 include: Optional[Iterable[str]] = None, exclude: Optional[Iterable[str]] = None,
+                 priority: str = "bfs", priority_prefixes: Optional[Iterable[str]] = None,
+                 progress: Optional[Callable[[ProgressSnapshot], None]] = None, progress_interval: float = 0.25,
+                 cancel_event: Optional[threading.Event] = None):
         """
         Initialize the WebToPDFConverter.
 
         :param concurrency_limit: Maximum number of concurrent tasks
         :param rate_limit: Maximum number of requests per second
+        :param pool_size: Number of pooled browser pages (defaults to concurrency_limit)
+        :param store: Persistent crawl state; enables resuming and incremental runs
+        :param incremental: Skip rendering pages unchanged since the stored crawl
+        :param strip_params: Query parameter patterns dropped when canonicalizing URLs
+        :param bloom_capacity: Expected URL count; dedupes through a Bloom filter
+        :param discovery: Link discovery mode: "browser", "http" or "auto" (HTTP with browser fallback)
+        :param pipeline: Run discovery and rendering as separate stages joined by a bounded queue
+        :param discovery_concurrency: Number of discovery workers in pipeline mode
+        :param discovery_rate: Discovery requests per second in pipeline mode (defaults to rate_limit)
+        :param render_queue_size: Discovered pages that may wait for rendering before discovery blocks
+        :param readiness: Decides when a loaded page is ready (defaults to networkidle within 30s)
+        :param block_requests: Abort ad/tracker and heavy subresource requests
+        :param block_types: Extra resource types to block
+        :param block_hosts: Extra host patterns to block
+        :param cache_dir: Directory of an on-disk HTTP cache shared across runs
+        :param cache_size_mb: Size cap of the HTTP cache
+        :param merge: Merge pages into bookmarked volumes instead of writing one PDF per page
+        :param volume_max_pages: Page cap per merged volume
+        :param volume_max_mb: Size cap per merged volume
+        :param output_name: Base name of the manifest and of merged volumes
+        :param dedup: Skip rendering pages whose text repeats an earlier page: "exact" or "near" (simhash)
+        :param dedup_distance: Largest simhash distance treated as a near-duplicate
+        :param adaptive: Adapt rate and concurrency per host (AIMD) instead of using one fixed rate
+        :param max_rate: Per-host ceiling on requests per second in adaptive mode
+        :param max_host_concurrency: Per-host ceiling on pages in flight in adaptive mode (defaults to concurrency_limit)
+        :param trace_path: JSON-lines file receiving a span per page stage
+        :param chrome_trace_path: Chrome trace-event file of the page stages
+        :param metrics_port: Serve Prometheus metrics on this port
+        :param recycle_pages: Restart the browser after this many pages
+        :param recycle_rss_mb: Restart the browser once its process tree uses more memory than this
+        :param result_log: JSON-lines file receiving the outcome of every URL
+        :param sitemaps: Seed the frontier from the site's sitemaps (implies obey_robots)
+        :param obey_robots: Skip URLs robots.txt disallows and respect its Crawl-delay
+        :param robots: Already loaded robots.txt rules, instead of fetching them per crawl
+        :param max_attempts: Attempts per URL on transient network errors, including the first
+        :param retry_delay: Backoff before the first retry; doubles with every further attempt
+        :param retry_max_delay: Cap on the retry backoff
+        :param breaker_threshold: Consecutive host failures that stop requests to the host (None or 0 disables)
+        :param breaker_reset: Seconds before a stopped host is probed again
+        :param dead_letters: File listing permanently failed URLs, in a form that can be converted again
+        :param render: Print pages to PDF; when False the crawl only loads pages and follows links
+        :param pdf_options: Keyword arguments for Playwright's page.pdf(), e.g. format or margin
+        :param request_filter: Filter for rendering pages, instead of one built from the block_* options
+        :param response_cache: HTTP cache owned by the caller, instead of one opened from cache_dir
+        :param on_outcome: Called with (url, status, output path) whenever a URL is finished
+        :param browser_endpoint: CDP endpoint of a running browser to attach to instead of launching one
+        :param max_depth: Links followed from the start URL; deeper pages are not crawled
+        :param max_pages: Pages started before the crawl stops; the rest stay pending for a resumed crawl
+        :param time_budget: Seconds after which no new page is started
+        :param include: Regular expressions; when given, only URLs matching one of them are crawled
+        :param exclude: Regular expressions of URLs never crawled
+        :param priority: Crawl order: "bfs", "sitemap" (highest sitemap priority first) or "path"
+        :param priority_prefixes: Path prefixes crawled first in "path" order
+        :param progress: Called with a ProgressSnapshot every progress_interval seconds while a crawl runs
+        :param progress_interval: Seconds between progress snapshots
+        :param cancel_event: Setting it, from any thread, cancels the running crawl (see cancel())
         """
+        self.concurrency_limit = concurrency_limit
+        self.pipeline = pipeline
+        self.discovery_concurrency = discovery_concurrency
+        self.render_queue_size = render_queue_size
+        self.pool_size = pool_size or concurrency_limit
+        self.store = store
+        self.incremental = incremental
+        self.strip_params = strip_params
+        self.bloom_capacity = bloom_capacity
+        self.discovery = discovery
+        self.readiness = readiness or ReadinessPolicy()
+        self.request_filter = request_filter
+        if request_filter is None and block_requests:
+            self.request_filter = build_filter("render", block_types, block_hosts)
+        self.discovery_filter = build_filter("discovery", block_types, block_hosts) if block_requests else None
+        self.cache_dir = cache_dir
+        self.cache_size_mb = cache_size_mb
+        self.response_cache = response_cache
+        self._owns_cache = False
+        self.render = render
+        self.pdf_options = pdf_options or {}
+        self.on_outcome = on_outcome
+        self.browser_endpoint = browser_endpoint
+        self.progress = ProgressReporter(progress, progress_interval) if progress is not None else None
+        self.cancel_event = cancel_event or threading.Event()
+        self.crawl_policy = CrawlPolicy(max_depth, max_pages, time_budget, UrlRules(include, exclude),
+                                        build_scorer(priority, list(priority_prefixes or ())))
+        self.merge = merge
+        self.volume_max_pages = volume_max_pages
+        self.volume_max_mb = volume_max_mb
+        self.output_name = output_name
+        self.output = None
+        self.result_log_path = result_log
+        self.result_log = None
+        self.retry_policy = RetryPolicy(max_attempts, retry_delay, retry_max_delay)
+        self.circuit_breakers = CircuitBreakers(breaker_threshold, breaker_reset) if breaker_threshold else None
+        self.dead_letters_path = dead_letters
+        self.dead_letters = None
+        # Failed attempts so far of URLs waiting for a retry.
+        self._attempts: Dict[str, int] = {}
+        self.deduplicator = ContentDeduplicator(dedup == "near", dedup_distance) if dedup else None
+        self.metrics = Metrics.from_options(trace_path, chrome_trace_path, metrics_port)
+        self.recycle_pages = recycle_pages
+        self.recycle_rss_mb = recycle_rss_mb
+        self._pages_on_browser = 0
+        self._last_rss_check = 0.0
+        self._recycling: Optional[asyncio.Task] = None
+        self._fatal: Optional[asyncio.Future] = None
         self.semaphore = asyncio.Semaphore(concurrency_limit)
-        self.rate_limiter = AsyncLimiter(rate_limit)
+        # One request per 1/rate seconds; AsyncLimiter's default period is a minute.
+        self.rate_limiter = AsyncLimiter(1, 1.0 / rate_limit)
+        self.discovery_rate_limiter = AsyncLimiter(1, 1.0 / (discovery_rate or rate_limit))
+        self.host_limiters = HostLimiters(
+            initial_rate=rate_limit, max_rate=max_rate, max_concurrency=max_host_concurrency or concurrency_limit,
+            latency_target=self.readiness.budget / 4,
+        ) if adaptive else None
+        self.sitemaps = sitemaps
+        self.obey_robots = obey_robots or sitemaps
+        self.robots = None
+        if robots is not None:
+            self._apply_robots(robots)
+        self.playwright = None
         self.browser = None
+        self.page_pool = None
+        self.discovery_pool = None
+        self.link_discoverer = None
 
     async def __aenter__(self):
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch()
+        self.playwright = await async_playwright().start()
+        self.browser = await self._launch_browser()
+        if self.cache_dir and self.response_cache is None:
+            self.response_cache = ResponseCache(self.cache_dir, self.cache_size_mb * 1024 * 1024)
+            self._owns_cache = True
+        self.page_pool = PagePool(self.browser, self.pool_size, request_filter=self.request_filter,
+                                  response_cache=self.response_cache)
+        await self.page_pool.start()
+        if self.pipeline and self.discovery != "http":
+            # Browser-based discovery gets its own pages with the aggressive blocking profile.
+            self.discovery_pool = PagePool(self.browser, self.discovery_concurrency, request_filter=self.discovery_filter,
+                                           response_cache=self.response_cache)
+            await self.discovery_pool.start()
+        if self.discovery != "browser":
+            self.link_discoverer = HttpLinkDiscoverer(self.discovery)
+            await self.link_discoverer.start(self.playwright)
         return self
 
+    async def _launch_browser(self):
+        if self.browser_endpoint:
+            try:
+                # Pages get their own contexts, which close() removes again; the browser keeps running.
+                return await self.playwright.chromium.connect_over_cdp(self.browser_endpoint, timeout=10000)
+            except Exception as e:
+                logging.warning(f"Could not attach to the browser at {self.browser_endpoint}, launching one: {str(e)}")
+        return await self.playwright.chromium.launch()
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._recycling is not None:
+            await asyncio.gather(self._recycling, return_exceptions=True)
+        if self.link_discoverer is not None:
+            await self.link_discoverer.close()
+        if self.discovery_pool is not None:
+            await self.discovery_pool.close()
+        await self.page_pool.close()
         await self.browser.close()
+        await self.playwright.stop()
+        if self.response_cache is not None:
+            logging.info(f"Response cache: {self.response_cache.stats()}")
+            if self._owns_cache:
+                self.response_cache.close()
+        logging.info(f"Metrics: {self.metrics.snapshot()}")
+        self.metrics.close()
 
-    async def crawl_and_convert(self, base_url: str, output_dir: str, css_selector: Optional[str] = None) -> List[str]:
+    async def crawl_and_convert(self, base_url: str, output_dir: str, css_selector: Optional[str] = None,
+                                resume: bool = False) -> List[str]:
         """
         Crawl the website and convert pages to PDF.
 
         :param base_url: The starting URL for crawling
         :param output_dir: Directory to save PDF files
         :param css_selector: CSS selector for selective rendering
+        :param resume: Continue the crawl recorded in the store
         :return: List of processed URLs
         """
+        start_url = urldefrag(base_url.strip())[0]
+        base_url = canonicalize_url(start_url, self.strip_params)
         domain = urlparse(base_url).netloc
-        to_visit = set([base_url])
-        visited = set()
+        frontier = Frontier(self.store, self.bloom_capacity, self.crawl_policy)
+        if self.store is not None:
+            self.store.begin(resume)
+            if resume:
+                frontier.restore()
+        if self.obey_robots and self.robots is None:
+            # Before any worker starts, so the first requests already honour Crawl-delay.
+            loop = asyncio.get_running_loop()
+            self._apply_robots(await loop.run_in_executor(None, RobotsPolicy.load, base_url))
+        if self._allowed(base_url):
+            frontier.add(base_url, location=start_url)
+        else:
+            logging.warning(f"robots.txt disallows the start URL {base_url}")
+        until = self._seed_from_sitemaps(frontier, base_url, domain) if self.sitemaps else None
+        await self._run_workers(frontier, domain, output_dir, css_selector, until=until)
+        return frontier.visited_urls()
+
+    def _apply_robots(self, robots: RobotsPolicy):
+        """Obey robots.txt rules from now on, slowing the rate limits down to its Crawl-delay."""
+        self.robots = robots
+        delay = robots.crawl_delay
+        if not delay:
+            return
+        logging.info(f"robots.txt asks for a crawl delay of {delay}s")
+        if delay > self.rate_limiter.time_period:
+            self.rate_limiter = AsyncLimiter(1, delay)
+        if delay > self.discovery_rate_limiter.time_period:
+            self.discovery_rate_limiter = AsyncLimiter(1, delay)
+        if self.host_limiters is not None:
+            options = self.host_limiters.controller_options
+            options["max_rate"] = min(options["max_rate"], 1.0 / delay)
 
-        while to_visit:
-            url = to_visit.pop()
-            if url in visited:
+    def _allowed(self, url: str) -> bool:
+        return self.robots is None or self.robots.allowed(url)
+
+    async def _seed_from_sitemaps(self, frontier: Frontier, base_url: str, domain: str):
+        """
+        Queue every in-scope sitemap URL, newest lastmod first, then wait for the crawl to finish.
+
+        Runs alongside the workers, which start on the base URL while the
+        sitemaps download. In incremental mode, URLs whose lastmod is older
+        than their stored PDF are marked unchanged without being loaded.
+        """
+        loop = asyncio.get_running_loop()
+        seeds = await loop.run_in_executor(None, sitemap_seeds, base_url, self.robots)
+        queued = unchanged = 0
+        for entry in seeds:
+            url = canonicalize_url(entry.url, self.strip_params)
+            if not is_in_scope(url, domain) or url in frontier.enqueued or not self.crawl_policy.admits(url, 1):
                 continue
+            record = self.store.get(url) if self.incremental and not self.merge and self.store is not None else None
+            if unchanged_since_render(record, entry.lastmod):
+                frontier.enqueued.add(url)
+                frontier.mark_visited(url)
+                self.store.enqueue(url)
+                self.store.mark_done(url, record.output_path, record.content_hash, record.etag, record.last_modified)
+                self._page_outcome(url, "unchanged", record.output_path)
+                unchanged += 1
+            elif frontier.add(url, depth=1, sitemap_priority=entry.priority, location=urldefrag(entry.url)[0]):
+                queued += 1
+        logging.info(f"Sitemaps: {len(seeds)} URLs, {queued} queued, {unchanged} unchanged since last crawl")
+        await frontier.join()
+
+    async def convert_urls(self, urls: Iterable[str], output_dir: str, css_selector: Optional[str] = None,
+                           resume: bool = False, read_ahead: int = 1000) -> int:
+        """
+        Convert exactly the given URLs, without following links.
+
+        The iterable is consumed lazily from an executor, so it may be a
+        generator over a huge file or stdin.
+
+        :param urls: URLs to convert, used as given
+        :param output_dir: Directory to save PDF files
+        :param css_selector: CSS selector for selective rendering
+        :param resume: Skip URLs the store already records as done
+        :param read_ahead: URLs buffered ahead of the workers
+        :return: Number of URLs processed
+        """
+        frontier = BatchFrontier(self.store, read_ahead)
+        if self.store is not None:
+            self.store.begin(resume)
+        await self._run_workers(frontier, "", output_dir, css_selector,
+                                until=self._feed_batch(frontier, urls, resume))
+        return frontier.processed
+
+    async def _feed_batch(self, frontier: BatchFrontier, urls: Iterable[str], resume: bool):
+        loop = asyncio.get_running_loop()
+        iterator = iter(urls)
+        while True:
+            chunk = await loop.run_in_executor(None, lambda: list(itertools.islice(iterator, 100)))
+            if not chunk:
+                break
+            for url in chunk:
+                if resume and self.store is not None:
+                    record = self.store.get(url)
+                    if record is not None and record.status == DONE:
+                        self._page_outcome(url, "skipped", record.output_path)
+                        continue
+                await frontier.feed(url)
+        await frontier.join()
+
+    async def _run_workers(self, frontier: Frontier, domain: str, output_dir: str, css_selector: Optional[str],
+                           until: Optional[Awaitable] = None):
+        """
+        Run workers against the frontier until it is drained.
+
+        In pipeline mode, discovery workers feed a bounded render queue that
+        render workers drain; a frontier entry is only marked done once its
+        page has been rendered, so joining the frontier covers both stages.
+
+        :param frontier: Frontier to drain
+        :param domain: Domain of the website being crawled
+        :param output_dir: Directory to save PDF files
+        :param css_selector: CSS selector for selective rendering
+        :param until: Awaitable that ends the run (defaults to the frontier joining)
+        """
+        self.output = self._open_output(output_dir, frontier)
+        if self.result_log_path:
+            self.result_log = ResultLog(self.result_log_path)
+        if self.dead_letters_path:
+            self.dead_letters = DeadLetters(self.dead_letters_path)
+        # Without link following there is nothing for a discovery stage to do.
+        if self.pipeline and frontier.follows_links:
+            render_queue = asyncio.Queue(self.render_queue_size)
+            coroutines = [
+                (f"discovery-{i}", self._discovery_worker(frontier, render_queue, domain))
+                for i in range(self.discovery_concurrency)
+            ] + [
+                (f"render-{i}", self._render_worker(frontier, render_queue, domain, output_dir, css_selector))
+                for i in range(self.concurrency_limit)
+            ]
+        else:
+            coroutines = [
+                (f"worker-{i}", self._worker(frontier, domain, output_dir, css_selector))
+                for i in range(self.concurrency_limit)
+            ]
+        # Named tasks give each worker its own track in traces.
+        workers = [asyncio.create_task(coroutine, name=name) for name, coroutine in coroutines]
+        # Set when a browser restart fails; the workers could never get a page again.
+        self._fatal = asyncio.get_running_loop().create_future()
+        finished = asyncio.ensure_future(until if until is not None else frontier.join())
+        cancelled = asyncio.ensure_future(self._drain_on_cancel(frontier))
+        reporting = asyncio.ensure_future(self._report_progress(frontier)) if self.progress is not None else None
+        try:
+            await asyncio.wait([finished, cancelled, self._fatal], return_when=asyncio.FIRST_COMPLETED)
+            if self._fatal.done():
+                raise self._fatal.exception()
+            if finished.done() and not finished.cancelled():
+                # A failing feeder (URL list, sitemap seeding, shard inbox) ends the run with its error.
+                finished.result()
+        finally:
+            finished.cancel()
+            cancelled.cancel()
+            frontier.cancel_retries()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if reporting is not None:
+                reporting.cancel()
+                self.progress.emit(len(frontier), 0, finished=True)
+            if self.output is not None:
+                await asyncio.get_running_loop().run_in_executor(None, self.output.close)
+            if self.result_log is not None:
+                self.result_log.close()
+                self.result_log = None
+            if self.dead_letters is not None:
+                if self.dead_letters.count:
+                    logging.warning(f"{self.dead_letters.count} URLs failed; retry them with {self.dead_letters.path}")
+                self.dead_letters.close()
+                self.dead_letters = None
+
+    def _open_output(self, output_dir: str, frontier: Frontier) -> Optional[PdfOutput]:
+        if not self.render:
+            return None
+        if not self.merge:
+            return PdfOutput(output_dir, self.output_name)
+        frontier.track_parents()
+        max_bytes = self.volume_max_mb * 1024 * 1024 if self.volume_max_mb else None
+        return MergedPdfOutput(output_dir, self.output_name, self.volume_max_pages, max_bytes, frontier.parent_of)
 
+    async def _worker(self, frontier: Frontier, domain: str, output_dir: str, css_selector: Optional[str]):
+        """
+        Drain the frontier until cancelled.
+
+        Links are queued before the current URL is marked done, so the
+        frontier only joins once the queue is empty and every worker is idle.
+
+        :param frontier: Shared crawl frontier
+        :param domain: Domain of the website being crawled
+        :param output_dir: Directory to save PDF files
+        :param css_selector: CSS selector for selective rendering
+        """
+        while True:
+            url = await self._next_url(frontier)
+            try:
+                self._check_circuit(url)
+                async with self.metrics.waiting(url, "semaphore_wait", self.semaphore):
+                    async with self.metrics.waiting(url, "rate_wait", self._rate_slot(url)):
+                        async with self.metrics.waiting(url, "page_wait", self.page_pool.page()) as page:
+                            # Pages that were still waiting for a slot are not loaded after a cancel.
+                            if not self.cancel_event.is_set():
+                                await self._process_page(page, url, domain, frontier, output_dir, css_selector)
+            except Exception as e:
+                self._handle_failure(frontier, url, e)
+            finally:
+                frontier.task_done(url)
+                self._check_recycle()
+
+    def cancel(self):
+        """
+        Cancel the running crawl; safe to call from any thread.
+
+        No new page is loaded, pages already loading finish and the crawl
+        then returns as if the frontier had drained, closing outputs
+        normally. URLs not yet converted stay pending in the store.
+        """
+        self.cancel_event.set()
+
+    async def _drain_on_cancel(self, frontier: Frontier):
+        """Return once the crawl has been cancelled and its pages in flight are done."""
+        # Polled, since the event may be set from another thread.
+        while not self.cancel_event.is_set():
+            await asyncio.sleep(0.1)
+        frontier.stop("cancelled")
+        frontier.cancel_retries()
+        await frontier.join()
+
+    async def _report_progress(self, frontier: Frontier):
+        while True:
+            await asyncio.sleep(self.progress.interval)
+            self.progress.emit(len(frontier), frontier.in_flight)
+
+    async def _discovery_worker(self, frontier: Frontier, render_queue: asyncio.Queue, domain: str):
+        """
+        Pipeline stage 1: find the links on each frontier URL and hand it to rendering.
+
+        Blocks on the bounded render queue when rendering falls behind. When
+        HTTP discovery cannot fetch a page and there is no discovery pool to
+        load it in, the render worker extracts its links from the rendered page.
+
+        :param frontier: Shared crawl frontier
+        :param render_queue: Bounded queue feeding the render workers
+        :param domain: Domain of the website being crawled
+        """
+        while True:
+            url = await self._next_url(frontier)
+            extract_links = False
             try:
-                async with self.semaphore:
-                    async with self.rate_limiter:
-                        page = await self.browser.new_page()
-                        await self._process_page(page, url, domain, to_visit, visited, output_dir, css_selector)
-                        await page.close()
+                async with self.metrics.waiting(url, "rate_wait", self.discovery_rate_limiter):
+                    links = None
+                    if self.link_discoverer is not None:
+                        with self.metrics.span(url, "links"):
+                            links = await self.link_discoverer.discover(frontier.location(url))
+                    if links is None and self.discovery_pool is None:
+                        extract_links = True
+                    elif links is None:
+                        async with self.metrics.waiting(url, "page_wait", self.discovery_pool.page()) as page:
+                            await self._navigate(page, url, frontier.location(url))
+                            with self.metrics.span(url, "links"):
+                                links = await page.eval_on_selector_all("a[href]",
+                                                                        "elements => elements.map(el => el.href)")
+                if links is not None:
+                    self._enqueue_links(links, url, domain, frontier)
             except Exception as e:
-                logging.error(f"Error processing {url}: {str(e)}")
+                logging.warning(f"Error discovering links on {url}: {str(e)}")
+            # Rendering still gets a chance when discovery fails; it records the failure.
+            await render_queue.put((url, time.monotonic(), extract_links))
 
-        return list(visited)
+    async def _render_worker(self, frontier: Frontier, render_queue: asyncio.Queue, domain: str, output_dir: str,
+                             css_selector: Optional[str]):
+        """
+        Pipeline stage 2: load and print pages handed over by discovery.
 
-    async def _process_page(self, page: Page, url: str, domain: str, to_visit: set, visited: set, output_dir: str, css_selector: Optional[str]):
+        :param frontier: Shared crawl frontier
+        :param render_queue: Bounded queue fed by the discovery workers
+        :param domain: Domain of the website being crawled
+        :param output_dir: Directory to save PDF files
+        :param css_selector: CSS selector for selective rendering
+        """
+        while True:
+            url, handed_over, extract_links = await render_queue.get()
+            self._record_wait(url, "render_queue_wait", time.monotonic() - handed_over)
+            if self.cancel_event.is_set():
+                # Left pending in the store; a resumed crawl renders it.
+                render_queue.task_done()
+                frontier.task_done(url)
+                continue
+            try:
+                self._check_circuit(url)
+                async with self.metrics.waiting(url, "semaphore_wait", self.semaphore):
+                    async with self.metrics.waiting(url, "rate_wait", self._rate_slot(url)):
+                        async with self.metrics.waiting(url, "page_wait", self.page_pool.page()) as page:
+                            ready = await self._navigate(page, url, frontier.location(url))
+                            frontier.mark_visited(url)
+                            if extract_links:
+                                await self._extract_links(page, url, domain, frontier)
+                            await self._render_page(page, url, ready, output_dir, css_selector)
+            except Exception as e:
+                self._handle_failure(frontier, url, e)
+            finally:
+                render_queue.task_done()
+                frontier.task_done(url)
+                self._check_recycle()
+
+    async def _next_url(self, frontier: Frontier) -> str:
+        url, waited = await frontier.get_timed()
+        self._record_wait(url, "queue_wait", waited)
+        return url
+
+    def _record_wait(self, url: str, stage: str, waited: float):
+        self.metrics.record(url, stage, time.time() - waited, waited)
+
+    def _check_recycle(self):
+        """Start a browser restart once the page count or the memory ceiling is reached."""
+        if self._recycling is not None and not self._recycling.done():
+            return
+        self._pages_on_browser += 1
+        reason = None
+        if self.recycle_pages and self._pages_on_browser >= self.recycle_pages:
+            reason = f"{self._pages_on_browser} pages"
+        elif self.recycle_rss_mb and time.monotonic() - self._last_rss_check >= 1.0:
+            # Walking /proc costs a few syscalls per process; once a second is plenty.
+            self._last_rss_check = time.monotonic()
+            rss_mb = tree_rss(include_self=False) / (1024 * 1024)
+            if rss_mb > self.recycle_rss_mb:
+                reason = f"browser RSS {rss_mb:.0f} MB"
+        if reason is not None:
+            # Runs outside the worker: the drain has to wait for this worker's page too.
+            self._recycling = asyncio.create_task(self._recycle_browser(reason), name="browser-recycler")
+
+    async def _recycle_browser(self, reason: str):
+        """
+        Replace the browser with a fresh one.
+
+        Pools stop lending pages and wait for pages in use to be returned;
+        workers block on the pools meanwhile, so queued URLs simply wait.
+        """
+        logging.info(f"Restarting browser after {reason}")
+        pools = [pool for pool in (self.page_pool, self.discovery_pool) if pool is not None]
+        try:
+            await asyncio.gather(*(pool.drain() for pool in pools))
+            try:
+                await self.browser.close()
+            except Exception as e:
+                logging.warning(f"Closing the old browser failed: {str(e)}")
+            self.browser = await self._launch_browser()
+            for pool in pools:
+                await pool.restart(self.browser)
+        except Exception as e:
+            logging.error(f"Browser restart failed: {str(e)}")
+            if self._fatal is not None and not self._fatal.done():
+                self._fatal.set_exception(e)
+            raise
+        self._pages_on_browser = 0
+        self.metrics.count("browser_restarts")
+
+    def _rate_slot(self, url: str):
+        """Rate limiting context for a render navigation: per host in adaptive mode, else global."""
+        if self.host_limiters is not None:
+            return self.host_limiters.slot(url)
+        return self.rate_limiter
+
+    def _page_outcome(self, url: str, status: str, output_path: Optional[str] = None, **details):
+        """Count a page's final status and append it to the result log."""
+        self.metrics.count(f"pages_{status}")
+        failed_attempts = self._attempts.pop(url, 0)
+        if failed_attempts:
+            details.setdefault("attempts", failed_attempts + 1)
+        if self.result_log is not None:
+            self.result_log.write(url, status, output_path, **details)
+        if self.on_outcome is not None:
+            self.on_outcome(url, status, output_path)
+        if self.progress is not None:
+            self.progress.record(url, status, output_path)
+
+    def _check_circuit(self, url: str):
+        """Fail fast, without taking a page or a rate slot, while url's host is considered down."""
+        if self.circuit_breakers is not None and not self.circuit_breakers.allow(url):
+            raise HostUnavailableError(f"Host of {url} is failing; not loading it for "
+                                       f"{self.circuit_breakers.retry_in(url):.0f}s")
+
+    @staticmethod
+    def _classify(error: Exception) -> ErrorClass:
+        if isinstance(error, HostUnavailableError):
+            # Retried like a network error, but it says nothing new about the host.
+            return ErrorClass("circuit_open", True, False)
+        if isinstance(error, NetworkError):
+            return classify(str(error), getattr(error, "status", None))
+        return ErrorClass("render", False, False)
+
+    def _handle_failure(self, frontier: Frontier, url: str, error: Exception):
+        """Queue a failed URL again after a backoff when its error is transient, else record it as failed."""
+        error_class = self._classify(error)
+        attempt = self._attempts.pop(url, 0) + 1
+        if not self.retry_policy.should_retry(error_class, attempt):
+            self._record_failure(url, error, error_class.kind, attempt)
+            return
+        delay = self.retry_policy.delay(attempt, getattr(error, "retry_after", None))
+        if error_class.kind == "circuit_open":
+            delay = max(delay, self.circuit_breakers.retry_in(url))
+        self._attempts[url] = attempt
+        self.metrics.count("retries")
+        logging.warning(f"{str(error)} ({error_class.kind}); retrying in {delay:.1f}s "
+                        f"(attempt {attempt + 1} of {self.retry_policy.max_attempts})")
+        frontier.retry_later(url, delay)
+
+    def _record_failure(self, url: str, error: Exception, kind: str = "render", attempts: int = 1):
+        logging.error(f"Error processing {url}: {str(error)}")
+        self._page_outcome(url, "failed", error=str(error), error_class=kind, attempts=attempts)
+        if self.store is not None:
+            self.store.mark_failed(url, str(error))
+        if self.dead_letters is not None:
+            self.dead_letters.write(url, str(error), kind, attempts)
+
+    async def _navigate(self, page: Page, url: str, location: Optional[str] = None) -> ReadinessResult:
+        """
+        Load a URL in the page and wait until the readiness policy deems it ready.
+
+        :param url: Canonical URL, used to key metrics, limits and errors
+        :param location: The URL as discovered, loaded in its place when given
+        :return: The readiness outcome, including the main resource response
+        """
+        try:
+            with self.metrics.span(url, "goto"):
+                ready = await self.readiness.navigate(page, location or url)
+        except Exception as e:
+            if self.host_limiters is not None:
+                self.host_limiters.record(url, error=True)
+            error = NetworkError(f"Failed to load {url}: {str(e)}")
+            if self.circuit_breakers is not None:
+                self.circuit_breakers.record(url, classify(str(error)).host_failure)
+            raise error
+        if self.host_limiters is not None:
+            self.host_limiters.record(url, ready.response, response_latency(ready.response))
+        status = getattr(ready.response, "status", None)
+        if not isinstance(status, int) or status not in RETRY_STATUSES:
+            status = None
+        if self.circuit_breakers is not None:
+            self.circuit_breakers.record(url, status in HOST_DOWN_STATUSES)
+        if status is not None:
+            retry_after = parse_retry_after(ready.response.headers.get("retry-after"))
+            raise HTTPStatusError(f"HTTP {status} for {url}", status, retry_after)
+        logging.info(f"Crawled: {url} ({ready.strategy} ready in {ready.time_to_ready:.2f}s"
+                     f"{', budget exceeded' if ready.timed_out else ''})")
+        return ready
+
+    async def _process_page(self, page: Page, url: str, domain: str, frontier: Frontier, output_dir: str, css_selector: Optional[str]):
         """
         Process a single page: load, extract links, and convert to PDF.
 
         :param page: Playwright Page object
         :param url: URL to process
         :param domain: Domain of the website being crawled
-        :param to_visit: Set of URLs to visit
-        :param visited: Set of visited URLs
+        :param frontier: Crawl frontier receiving discovered links
         :param output_dir: Directory to save PDF files
         :param css_selector: CSS selector for selective rendering
         """
-        try:
-            await page.goto(url, wait_until="networkidle")
-        except Exception as e:
-            raise NetworkError(f"Failed to load {url}: {str(e)}")
+        http_links = None
+        if self.link_discoverer is not None and frontier.follows_links:
+            # Queue links before the slow browser navigation so other workers can start on them.
+            with self.metrics.span(url, "links"):
+                http_links = await self.link_discoverer.discover(frontier.location(url))
+            if http_links is not None:
+                self._enqueue_links(http_links, url, domain, frontier)
+
+        ready = await self._navigate(page, url, frontier.location(url))
+        frontier.mark_visited(url)
+
+        if http_links is None and frontier.follows_links:
+            await self._extract_links(page, url, domain, frontier)
 
-        visited.add(url)
-        logging.info(f"Crawled: {url}")
+        await self._render_page(page, url, ready, output_dir, css_selector)
 
+    async def _extract_links(self, page: Page, url: str, domain: str, frontier: Frontier):
+        """Queue the links of a page loaded in the browser; a failure only costs the links."""
         try:
-            links = await page.eval_on_selector_all("a[href]", "elements => elements.map(el => el.href)")
-            for link in links:
-                full_url = urljoin(url, link)
-                if domain in full_url and full_url not in visited:
-                    to_visit.add(full_url)
+            with self.metrics.span(url, "links"):
+                links = await page.eval_on_selector_all("a[href]", "elements => elements.map(el => el.href)")
+            self._enqueue_links(links, url, domain, frontier)
         except Exception as e:
             logging.warning(f"Error extracting links from {url}: {str(e)}")
 
+    async def _render_page(self, page: Page, url: str, ready: ReadinessResult, output_dir: str,
+                           css_selector: Optional[str]):
+        """
+        Convert a loaded page to PDF, unless incremental mode finds it unchanged
+        or its text duplicates a page already rendered in this crawl.
+
+        :param page: Playwright Page object, already at url
+        :param url: URL of the page
+        :param ready: Readiness outcome of the navigation
+        :param output_dir: Directory to save PDF files
+        :param css_selector: CSS selector for selective rendering
+        """
+        if not self.render:
+            self._page_outcome(url, "ok")
+            return
+        content_hash = etag = last_modified = None
+        if self.store is not None:
+            headers = ready.response.headers if ready.response is not None else {}
+            etag = headers.get("etag")
+            last_modified = headers.get("last-modified")
+            content_hash = hashlib.sha256((await page.content()).encode("utf-8")).hexdigest()
+            previous = self.store.get(url)
+            # Merged volumes are rebuilt on every run, so there is no earlier output to keep.
+            if self.incremental and not self.merge and self._is_unchanged(previous, content_hash, etag, last_modified):
+                logging.info(f"Unchanged since last crawl, skipping PDF: {url}")
+                self._page_outcome(url, "unchanged", previous.output_path)
+                self.store.mark_done(url, previous.output_path, content_hash, etag, last_modified,
+                                     ready.strategy, ready.time_to_ready)
+                return
+
+        fingerprint = None
+        if self.deduplicator is not None:
+            fingerprint = self.deduplicator.fingerprint(await page.evaluate(PAGE_TEXT_JS))
+            duplicate_of = self.deduplicator.find(fingerprint) if fingerprint is not None else None
+            if duplicate_of is not None:
+                logging.info(f"Duplicate of {duplicate_of}, skipping PDF: {url}")
+                self._page_outcome(url, "duplicate", alias_of=duplicate_of)
+                if self.output is not None:
+                    self.output.alias(url, duplicate_of)
+                if self.store is not None:
+                    original = self.store.get(duplicate_of)
+                    self.store.mark_done(url, original.output_path if original else None, content_hash, etag,
+                                         last_modified, ready.strategy, ready.time_to_ready)
+                return
+
         try:
-            await self._generate_pdf(page, url, output_dir, css_selector)
+            output_path = await self._generate_pdf(page, url, output_dir, css_selector)
         except PDFConversionError as e:
-            logging.error(f"PDF conversion failed for {url}: {str(e)}")
+            self._record_failure(url, e)
+            return
+        # Only a page with a PDF may become the original that later copies point to.
+        if fingerprint is not None:
+            self.deduplicator.add(url, fingerprint)
+
+        self._page_outcome(url, "ok", output_path)
+        if self.store is not None:
+            self.store.mark_done(url, output_path, content_hash, etag, last_modified, ready.strategy, ready.time_to_ready)
+
+    def _enqueue_links(self, links: Iterable[str], url: str, domain: str, frontier: Frontier):
+        """
+        Queue the links found on url that lie within the crawled domain.
 
-    async def _generate_pdf(self, page: Page, url: str, output_dir: str, css_selector: Optional[str]):
+        Relative links resolve against the page's address as loaded, not its
+        canonical form; the canonical URL only keys deduplication and the store.
+        """
+        base = frontier.location(url)
+        for link in links:
+            found = urldefrag(urljoin(base, link))[0]
+            full_url = canonicalize_url(found, self.strip_params)
+            if is_in_scope(full_url, domain) and self._allowed(full_url):
+                frontier.add(full_url, url, location=found)
+
+    @staticmethod
+    def _is_unchanged(previous: Optional[PageRecord], content_hash: str, etag: Optional[str],
+                      last_modified: Optional[str]) -> bool:
+        """Whether a page still matches the PDF rendered for it by an earlier crawl."""
+        if previous is None or not previous.output_path or not os.path.exists(previous.output_path):
+            return False
+        if etag and etag == previous.etag:
+            return True
+        if last_modified and last_modified == previous.last_modified:
+            return True
+        return content_hash == previous.content_hash
+
+    async def _generate_pdf(self, page: Page, url: str, output_dir: str, css_selector: Optional[str]) -> str:
         """
         Generate a PDF from the given page.
 
+        Renders to memory, then writes the page's own file or hands the bytes
+        to the merged output, and records the result in the manifest.
+
         :param page: Playwright Page object
         :param url: URL of the page
         :param output_dir: Directory to save the PDF
         :param css_selector: CSS selector for selective rendering
+        :return: Path of the written PDF (the volume, when merging)
         """
+        merged = self.output is not None and self.output.merged
         try:
-            if css_selector:
-                await page.wait_for_selector(css_selector, state="attached")
-                element_handle = await page.query_selector(css_selector)
-                if not element_handle:
-                    raise RenderingError(f"Element not found: {css_selector}")
-                await element_handle.screenshot(path=f"{output_dir}/{urlparse(url).path.strip('/').replace('/', '_') or 'index'}.pdf", type="pdf")
-            else:
-                await page.pdf(path=f"{output_dir}/{urlparse(url).path.strip('/').replace('/', '_') or 'index'}.pdf")
+            with self.metrics.span(url, "pdf_render"):
+                if css_selector:
+                    await page.wait_for_selector(css_selector, state="attached")
+                    element_handle = await page.query_selector(css_selector)
+                    if not element_handle:
+                        raise RenderingError(f"Element not found: {css_selector}")
+                    data = await element_handle.screenshot(type="pdf")
+                else:
+                    data = await page.pdf(**self.pdf_options)
+            title = await page.title() if merged else None
+            loop = asyncio.get_running_loop()
+            with self.metrics.span(url, "file_write"):
+                if merged:
+                    output_path = await loop.run_in_executor(None, self.output.add, url, data, title)
+                else:
+                    output_path = os.path.join(output_dir, output_filename(url))
+                    await loop.run_in_executor(None, _write_file, output_path, data)
+                    if self.output is not None:
+                        self.output.record(url, output_path)
+            self.metrics.count("bytes_written", len(data))
             logging.info(f"Generated PDF for {url}")
+            return output_path
+        except RenderingError:
+            raise
         except Exception as e:
             raise PDFConversionError(f"Failed to generate PDF for {url}: {str(e)}")
 
-async def main(url: str, output_dir: str, concurrency_limit: int = 5, rate_limit: float = 1.0, css_selector: Optional[str] = None):
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+def run_sync(coroutine: Awaitable):
+    """
+    Run an engine coroutine to completion from synchronous code.
+
+    Uses a helper thread when this thread already has a running event loop
+    (Jupyter, or Playwright's sync API), where asyncio.run() would fail.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+async def main(url: str, output_dir: str, concurrency_limit: int = 5, rate_limit: float = 1.0, css_selector: Optional[str] = None,
+               pool_size: Optional[int] = None, processes: int = 1, state_path: Optional[str] = None,
+               resume: bool = False, incremental: bool = False, strip_params: Optional[Iterable[str]] = None,
+               bloom_capacity: Optional[int] = None, discovery: str = "browser", pipeline: bool = False,
+               discovery_concurrency: int = 5, discovery_rate: Optional[float] = None, render_queue_size: int = 100,
+               ready: Optional[str] = None, ready_rules: Optional[List[str]] = None, ready_budget: float = 30.0,
+               block_requests: bool = True, block_types: Optional[List[str]] = None,
+               block_hosts: Optional[List[str]] = None, cache_dir: Optional[str] = None, cache_size_mb: int = 1024,
+               merge: bool = False, volume_max_pages: Optional[int] = None, volume_max_mb: Optional[int] = 256,
+               dedup: Optional[str] = None, dedup_distance: int = 3, adaptive: bool = False, max_rate: float = 10.0,
+               max_host_concurrency: Optional[int] = None, trace_path: Optional[str] = None,
+               chrome_trace_path: Optional[str] = None, metrics_port: Optional[int] = None,
+               recycle_pages: Optional[int] = None, recycle_rss_mb: Optional[int] = None,
+               result_log: Optional[str] = None, sitemaps: bool = False, obey_robots: bool = False,
+               max_attempts: int = 3, retry_delay: float = 1.0, retry_max_delay: float = 60.0,
+               breaker_threshold: Optional[int] = 5, breaker_reset: float = 60.0, dead_letters: Optional[str] = None,
+               browser_endpoint: Optional[str] = None, max_depth: Optional[int] = None,
+               max_pages: Optional[int] = None, time_budget: Optional[float] = None,
+               include: Optional[List[str]] = None, exclude: Optional[List[str]] = None, priority: str = "bfs",
+               priority_prefixes: Optional[List[str]] = None,
+               progress: Optional[Callable[[ProgressSnapshot], None]] = None,
+               cancel_event: Optional[threading.Event] = None):
     """
     Main function to run the web-to-PDF converter.
 
-    :param url: The starting URL for crawling
+    When url is "-" or the path of a file, it is read as a list of URLs
+    (one per line) that are converted as given, without crawling.
+
+    :param url: The starting URL for crawling, or a URL list
     :param output_dir: Directory to save PDF files
     :param concurrency_limit: Maximum number of concurrent tasks
     :param rate_limit: Maximum number of requests per second
     :param css_selector: CSS selector for selective rendering
+    :param pool_size: Number of pooled browser pages
+    :param processes: Number of worker processes, each with its own browser
+    :param state_path: SQLite crawl store (defaults to output_dir/crawl_state.db with resume or incremental)
+    :param resume: Continue the crawl recorded in the store
+    :param incremental: Skip rendering pages unchanged since the stored crawl
+    :param strip_params: Query parameter patterns dropped when canonicalizing URLs
+    :param bloom_capacity: Expected URL count; dedupes through a Bloom filter
+    :param discovery: Link discovery mode: "browser", "http" or "auto"
+    :param pipeline: Run discovery and rendering as separate stages
+    :param discovery_concurrency: Number of discovery workers in pipeline mode
+    :param discovery_rate: Discovery requests per second in pipeline mode
+    :param render_queue_size: Bound on pages waiting between the stages
+    :param ready: Default readiness strategy spec (e.g. "load", "selector:#main", "quiet:500")
+    :param ready_rules: "regex=strategy" readiness overrides per URL pattern
+    :param ready_budget: Seconds allowed per page from navigation start to ready
+    :param block_requests: Abort ad/tracker and heavy subresource requests
+    :param block_types: Extra resource types to block
+    :param block_hosts: Extra host patterns to block
+    :param cache_dir: Directory of an on-disk HTTP cache shared across runs
+    :param cache_size_mb: Size cap of the HTTP cache
+    :param merge: Merge pages into bookmarked volumes instead of one PDF per page
+    :param volume_max_pages: Page cap per merged volume
+    :param volume_max_mb: Size cap per merged volume
+    :param dedup: Skip pages whose text repeats an earlier page: "exact" or "near"
+    :param dedup_distance: Largest simhash distance treated as a near-duplicate
+    :param adaptive: Adapt rate and concurrency per host (AIMD), starting from rate_limit
+    :param max_rate: Per-host ceiling on requests per second in adaptive mode
+    :param max_host_concurrency: Per-host ceiling on pages in flight in adaptive mode
+    :param trace_path: JSON-lines file receiving a span per page stage
+    :param chrome_trace_path: Chrome trace-event file of the page stages
+    :param metrics_port: Serve Prometheus metrics on this port
+    :param recycle_pages: Restart the browser after this many pages
+    :param recycle_rss_mb: Restart the browser above this much browser memory
+    :param result_log: JSON-lines log of every URL's outcome (defaults to output_dir/results.jsonl for URL lists)
+    :param sitemaps: Seed the crawl from robots.txt sitemaps, newest lastmod first (implies obey_robots)
+    :param obey_robots: Skip URLs robots.txt disallows and respect its Crawl-delay
+    :param max_attempts: Attempts per URL on transient network errors
+    :param retry_delay: Backoff before the first retry, doubled per attempt
+    :param retry_max_delay: Cap on the retry backoff
+    :param breaker_threshold: Consecutive host failures that pause the host (0 disables)
+    :param breaker_reset: Seconds before a paused host is probed again
+    :param dead_letters: URL list of permanently failed URLs (defaults to output_dir/dead_letters.txt)
+    :param browser_endpoint: CDP endpoint to attach to, or "auto" for the running browser daemon's
+    :param max_depth: Links followed from the start URL
+    :param max_pages: Pages started before the crawl stops; --resume continues from there
+    :param time_budget: Seconds after which no new page is started
+    :param include: Regular expressions of the URLs to crawl
+    :param exclude: Regular expressions of URLs never crawled
+    :param priority: Crawl order: "bfs", "sitemap" or "path"
+    :param priority_prefixes: Path prefixes crawled first in "path" order
+    :param progress: Receives a ProgressSnapshot a few times per second (single-process runs)
+    :param cancel_event: Set it from another thread to cancel the run (single-process runs)
     """
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-    async with WebToPDFConverter(concurrency_limit, rate_limit) as converter:
-        processed_urls = await converter.crawl_and_convert(url, output_dir, css_selector)
+    if merge and resume:
+        # A resumed run skips finished pages, so rewritten volumes would lose them.
+        raise ValueError("--merge cannot be combined with --resume; rerun the whole crawl to rebuild the volumes")
+    if browser_endpoint is not None and (recycle_pages or recycle_rss_mb):
+        # An attached browser belongs to the daemon: its memory is not ours to measure and reconnecting frees nothing.
+        raise ValueError("--recycle-pages and --recycle-rss-mb cannot be combined with --connect; "
+                         "restart the browser daemon instead")
+    if state_path is None and (resume or incremental):
+        state_path = os.path.join(output_dir, "crawl_state.db")
+    url_list = is_url_list(url)
+    if url_list and result_log is None:
+        result_log = os.path.join(output_dir, "results.jsonl")
+    if dead_letters is None:
+        dead_letters = os.path.join(output_dir, "dead_letters.txt")
+    if browser_endpoint is not None:
+        endpoint = resolve_endpoint(browser_endpoint)
+        if endpoint is None:
+            logging.warning("No browser daemon is running; launching a browser")
+        browser_endpoint = endpoint
+
+    converter_kwargs = dict(concurrency_limit=concurrency_limit, rate_limit=rate_limit, pool_size=pool_size,
+                            incremental=incremental, strip_params=strip_params, bloom_capacity=bloom_capacity,
+                            discovery=discovery, pipeline=pipeline, discovery_concurrency=discovery_concurrency,
+                            discovery_rate=discovery_rate, render_queue_size=render_queue_size,
+                            readiness=ReadinessPolicy.from_specs(ready, ready_rules, ready_budget),
+                            block_requests=block_requests, block_types=block_types, block_hosts=block_hosts,
+                            cache_dir=cache_dir, cache_size_mb=cache_size_mb, merge=merge,
+                            volume_max_pages=volume_max_pages, volume_max_mb=volume_max_mb, dedup=dedup,
+                            dedup_distance=dedup_distance, adaptive=adaptive, max_rate=max_rate,
+                            max_host_concurrency=max_host_concurrency, trace_path=trace_path,
+                            chrome_trace_path=chrome_trace_path, metrics_port=metrics_port,
+                            recycle_pages=recycle_pages, recycle_rss_mb=recycle_rss_mb, result_log=result_log,
+                            sitemaps=sitemaps, obey_robots=obey_robots, max_attempts=max_attempts,
+                            retry_delay=retry_delay, retry_max_delay=retry_max_delay,
+                            breaker_threshold=breaker_threshold, breaker_reset=breaker_reset,
+                            dead_letters=dead_letters, browser_endpoint=browser_endpoint, max_depth=max_depth,
+                            max_pages=max_pages, time_budget=time_budget, include=include, exclude=exclude,
+                            priority=priority, priority_prefixes=priority_prefixes)
+
+    if processes > 1 and (progress is not None or cancel_event is not None):
+        logging.warning("Progress reporting and cancellation need a single process; ignoring --processes")
+        processes = 1
+    if url_list and processes > 1:
+        logging.warning("URL lists are converted in a single process; use --concurrency to scale")
+        processes = 1
+
+    if processes > 1:
+        from sharding import crawl_sharded
+        processed_urls = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(crawl_sharded, url, output_dir, processes, css_selector, state_path, resume,
+                                    **converter_kwargs))
         logging.info(f"Processed {len(processed_urls)} URLs")
+        return
 
-if __name__ == "__main__":
-    import argparse
+    store = CrawlStore(state_path) if state_path else None
+    try:
+        async with WebToPDFConverter(store=store, progress=progress, cancel_event=cancel_event,
+                                     **converter_kwargs) as converter:
+            if url_list:
+                processed = await converter.convert_urls(iter_urls(url), output_dir, css_selector, resume)
+                logging.info(f"Processed {processed} URLs, results in {result_log}")
+                return
+            processed_urls = await converter.crawl_and_convert(url, output_dir, css_selector, resume)
+            logging.info(f"Processed {len(processed_urls)} URLs")
+    finally:
+        if store is not None:
+            store.close()
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Command-line options of a conversion run.
+
+    Every option's dest is a parameter of main(), so parsed arguments are passed on as keywords.
+    """
     parser = argparse.ArgumentParser(description="Convert web pages to PDF")
-    parser.add_argument("url", help="The base URL to crawl and convert")
-    parser.add_argument("--output", "-o", default="output", help="Output directory for PDFs")
-    parser.add_argument("--concurrency", "-c", type=int, default=5, help="Maximum number of concurrent tasks")
-    parser.add_argument("--rate", "-r", type=float, default=1.0, help="Maximum number of requests per second")
-    parser.add_argument("--selector", "-s", help="CSS selector for selective rendering")
-    args = parser.parse_args()
-
-    asyncio.run(main(args.url, args.output, args.concurrency, args.rate, args.selector))
\ No newline at end of file
+    parser.add_argument("url", help="The base URL to crawl and convert, or a file of URLs to convert as-is ('-' for stdin)")
+    parser.add_argument("--output", "-o", default="output", dest="output_dir", metavar="OUTPUT", help="Output directory for PDFs")
+    parser.add_argument("--concurrency", "-c", type=int, default=5, dest="concurrency_limit", metavar="CONCURRENCY",
+                        help="Maximum number of concurrent tasks")
+    parser.add_argument("--rate", "-r", type=float, default=1.0, dest="rate_limit", metavar="RATE", help="Maximum number of requests per second")
+    parser.add_argument("--selector", "-s", dest="css_selector", metavar="SELECTOR", help="CSS selector for selective rendering")
+    parser.add_argument("--pool-size", type=int, help="Number of pooled browser pages (default: concurrency)")
+    parser.add_argument("--processes", "-p", type=int, default=1, help="Number of worker processes, each with its own browser")
+    parser.add_argument("--state", dest="state_path", metavar="STATE", help="SQLite file holding crawl state (default: <output>/crawl_state.db)")
+    parser.add_argument("--resume", action="store_true", help="Resume the crawl recorded in the state file")
+    parser.add_argument("--incremental", action="store_true", help="Skip rendering pages unchanged since the last crawl")
+    parser.add_argument("--strip-param", action="append", dest="strip_params",
+                        help="Query parameter pattern to ignore when deduplicating URLs (repeatable; replaces the defaults)")
+    parser.add_argument("--bloom-capacity", type=int, help="Track seen URLs in a Bloom filter sized for this many URLs")
+    parser.add_argument("--discovery", choices=DISCOVERY_MODES, default="browser",
+                        help="Find links in the browser, over plain HTTP, or over HTTP with browser fallback (auto)")
+    parser.add_argument("--pipeline", action="store_true", help="Run link discovery and PDF rendering as separate stages")
+    parser.add_argument("--discovery-concurrency", type=int, default=5, help="Discovery workers in pipeline mode")
+    parser.add_argument("--discovery-rate", type=float, help="Discovery requests per second in pipeline mode (default: --rate)")
+    parser.add_argument("--render-queue-size", type=int, default=100, help="Pages allowed to wait for rendering in pipeline mode")
+    parser.add_argument("--ready", help="Readiness strategy: load, domcontentloaded, networkidle (default), fonts, "
+                                        "selector:CSS or quiet[:MS]")
+    parser.add_argument("--ready-rule", action="append", dest="ready_rules",
+                        help="Per-URL readiness override as REGEX=STRATEGY (repeatable)")
+    parser.add_argument("--ready-budget", type=float, default=30.0, help="Seconds allowed per page to become ready")
+    parser.add_argument("--no-block", action="store_false", dest="block_requests",
+                        help="Load every subresource, including ads, trackers and media")
+    parser.add_argument("--block-type", action="append", dest="block_types",
+                        help="Extra resource type to block, e.g. image or font (repeatable)")
+    parser.add_argument("--block-host", action="append", dest="block_hosts",
+                        help="Extra host pattern to block, e.g. *.cdn.example (repeatable)")
+    parser.add_argument("--cache-dir", help="Serve repeat requests from an on-disk HTTP cache in this directory")
+    parser.add_argument("--cache-size-mb", type=int, default=1024, help="Size cap of the HTTP cache")
+    parser.add_argument("--merge", action="store_true",
+                        help="Merge pages into bookmarked volumes (<output>/site-NNNN.pdf); requires pypdf")
+    parser.add_argument("--volume-pages", type=int, dest="volume_max_pages", help="Page cap per merged volume")
+    parser.add_argument("--volume-mb", type=int, default=256, dest="volume_max_mb", help="Size cap per merged volume")
+    parser.add_argument("--dedup", choices=DEDUP_MODES,
+                        help="Skip rendering pages whose text repeats an earlier page, exactly or nearly (simhash)")
+    parser.add_argument("--dedup-distance", type=int, default=3, help="Simhash bits two near-duplicates may differ by")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Adapt rate and concurrency per host from latency, 429/503 and Retry-After, starting at --rate")
+    parser.add_argument("--max-rate", type=float, default=10.0, help="Per-host requests per second ceiling with --adaptive")
+    parser.add_argument("--max-host-concurrency", type=int,
+                        help="Per-host pages in flight ceiling with --adaptive (default: --concurrency)")
+    parser.add_argument("--trace", dest="trace_path", help="Write a JSON-lines span per page stage to this file")
+    parser.add_argument("--chrome-trace", dest="chrome_trace_path",
+                        help="Write page stages as a Chrome trace (chrome://tracing, Perfetto) to this file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--recycle-pages", type=int, help="Restart the browser after this many pages")
+    parser.add_argument("--recycle-rss-mb", type=int,
+                        help="Restart the browser when its processes use more than this much memory")
+    parser.add_argument("--result-log", help="JSON-lines outcome per URL (default for URL lists: <output>/results.jsonl)")
+    parser.add_argument("--sitemaps", action="store_true",
+                        help="Seed the crawl from the sitemaps listed in robots.txt (or /sitemap.xml); implies --obey-robots")
+    parser.add_argument("--obey-robots", action="store_true", help="Skip URLs disallowed by robots.txt and honour Crawl-delay")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Attempts per URL on timeouts, connection errors, 429 and 5xx responses")
+    parser.add_argument("--retry-delay", type=float, default=1.0, help="Seconds before the first retry, doubled per attempt")
+    parser.add_argument("--retry-max-delay", type=float, default=60.0, help="Cap on the retry backoff")
+    parser.add_argument("--breaker-threshold", type=int, default=5,
+                        help="Consecutive failures after which a host is paused (0 disables)")
+    parser.add_argument("--breaker-reset", type=float, default=60.0, help="Seconds before a paused host is probed again")
+    parser.add_argument("--dead-letters",
+                        help="List of URLs that failed for good (default: <output>/dead_letters.txt); pass it as the URL to retry them")
+    parser.add_argument("--connect", nargs="?", const="auto", dest="browser_endpoint", metavar="ENDPOINT",
+                        help="Attach to a running browser instead of launching one: the browser daemon's "
+                             "(started with main.py --browser-daemon) or the given CDP endpoint")
+    parser.add_argument("--max-depth", type=int, help="Links to follow from the start URL (0 converts only the start URL)")
+    parser.add_argument("--max-pages", type=int, help="Stop after this many pages; --resume continues from there")
+    parser.add_argument("--time-budget", type=float, help="Seconds after which no new page is started")
+    parser.add_argument("--include", action="append", help="Only crawl URLs matching this regular expression (repeatable)")
+    parser.add_argument("--exclude", action="append", help="Never crawl URLs matching this regular expression (repeatable)")
+    parser.add_argument("--priority", choices=PRIORITY_MODES, default="bfs",
+                        help="Crawl order: breadth-first, highest sitemap priority first, or --priority-prefix paths first")
+    parser.add_argument("--priority-prefix", action="append", dest="priority_prefixes",
+                        help="Path prefix crawled first with --priority path, e.g. /docs/ (repeatable, in order)")
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse and check the command line; the result is main()'s keyword arguments."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.merge and args.resume:
+        parser.error("--merge cannot be combined with --resume")
+    if args.browser_endpoint and (args.recycle_pages or args.recycle_rss_mb):
+        parser.error("--recycle-pages and --recycle-rss-mb cannot be combined with --connect")
+    if args.priority == "path" and not args.priority_prefixes:
+        parser.error("--priority path needs at least one --priority-prefix")
+    return args
+
+if __name__ == "__main__":
+    asyncio.run(main(**vars(parse_args())))
@@ -0,0 +1,50 @@
+import io
+import json
+from src.batch import ResultLog, is_url_list, iter_urls
+
+def test_is_url_list(tmp_path):
+    url_file = tmp_path / 'urls.txt'
+    url_file.write_text('https://example.com\n')
+    assert is_url_list('-')
+    assert is_url_list(str(url_file))
+    assert not is_url_list('https://example.com')
+    assert not is_url_list(str(tmp_path / 'missing.txt'))
+
+def test_iter_urls_skips_blank_and_comment_lines(tmp_path):
+    url_file = tmp_path / 'urls.txt'
+    url_file.write_text('https://e.com/a\n\n  # comment\n  https://e.com/b  \n')
+    urls = iter_urls(str(url_file))
+    assert next(urls) == 'https://e.com/a'
+    assert list(urls) == ['https://e.com/b']
+
+def test_iter_urls_reads_stdin(monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('https://e.com/a\nhttps://e.com/b\n'))
+    assert list(iter_urls('-')) == ['https://e.com/a', 'https://e.com/b']
+
+def test_result_log_appends_json_lines(tmp_path):
+    log = ResultLog(str(tmp_path / 'out' / 'results.jsonl'))
+    log.write('https://e.com/a', 'ok', 'out/a.pdf')
+    log.write('https://e.com/b', 'failed', error='timeout')
+    log.close()
+
+    entries = [json.loads(line) for line in (tmp_path / 'out' / 'results.jsonl').read_text().splitlines()]
+    assert [(e['url'], e['status'], e.get('output'), e.get('error')) for e in entries] == [
+        ('https://e.com/a', 'ok', 'out/a.pdf', None), ('https://e.com/b', 'failed', None, 'timeout')]
+
+def test_dead_letters_round_trip_through_iter_urls(tmp_path):
+    from src.batch import DeadLetters
+
+    path = tmp_path / 'dead_letters.txt'
+    path.write_text('https://e.com/old\n')
+    letters = DeadLetters(str(path))
+    # The previous list stays readable until the new one is complete.
+    assert list(iter_urls(str(path))) == ['https://e.com/old']
+    letters.write('https://e.com/a', 'Failed to load:\nnet::ERR_NAME_NOT_RESOLVED', 'permanent', 1)
+    letters.write('https://e.com/b', 'Timeout 30000ms exceeded.', 'timeout', 3)
+    letters.close()
+
+    assert list(iter_urls(str(path))) == ['https://e.com/a', 'https://e.com/b']
+    assert '# timeout after 3 attempts: Timeout 30000ms exceeded.' in path.read_text()
+
+    DeadLetters(str(path)).close()
+    assert not path.exists()
@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+from src.browser_daemon import read_endpoint, resolve_endpoint, write_endpoint
+
+def test_endpoint_file_round_trip(tmp_path):
+    path = str(tmp_path / 'daemon' / 'browser.json')
+    assert read_endpoint(path) is None
+
+    write_endpoint(path, 'http://127.0.0.1:9333')
+
+    info = read_endpoint(path)
+    assert info['endpoint'] == 'http://127.0.0.1:9333'
+    assert info['pid'] == os.getpid()
+    assert resolve_endpoint('auto', path) == 'http://127.0.0.1:9333'
+    assert resolve_endpoint('http://10.0.0.5:9222', path) == 'http://10.0.0.5:9222'
+
+def test_endpoint_of_dead_daemon_is_ignored(tmp_path):
+    finished = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+    path = tmp_path / 'browser.json'
+    path.write_text(json.dumps({'endpoint': 'http://127.0.0.1:9333', 'pid': int(finished.stdout)}))
+
+    assert read_endpoint(str(path)) is None
+    assert resolve_endpoint('auto', str(path)) is None
+
+def test_cli_does_not_import_gui():
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    code = "import sys; import main; print('gui' in sys.modules or 'PyQt6' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=src)
+    assert result.stdout.strip() == 'False', result.stderr
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from src.crawl_policy import CrawlPolicy, UrlRules, build_scorer
+from src.crawl_store import CrawlStore
+from src.frontier import Frontier
+
+def test_url_rules_include_and_exclude():
+    rules = UrlRules(include=[r'/docs/', r'/blog/'], exclude=[r'\.pdf$', r'/docs/old/'])
+    assert rules.allows('https://e.com/docs/a')
+    assert rules.allows('https://e.com/blog/b')
+    assert not rules.allows('https://e.com/about')
+    assert not rules.allows('https://e.com/docs/a.pdf')
+    assert not rules.allows('https://e.com/docs/old/a')
+    assert UrlRules().allows('https://e.com/anything')
+
+def test_scorers():
+    assert build_scorer('bfs')('https://e.com/a', 2, 0.9) == (2,)
+    sitemap = build_scorer('sitemap')
+    assert sitemap('https://e.com/a', 3, 0.9) < sitemap('https://e.com/b', 1, None) < sitemap('https://e.com/c', 1, 0.1)
+    path = build_scorer('path', ['/docs/', '/blog/'])
+    assert path('https://e.com/docs/a', 5) < path('https://e.com/blog/a', 1) < path('https://e.com/', 0)
+    with pytest.raises(ValueError):
+        build_scorer('path')
+    with pytest.raises(ValueError):
+        build_scorer('dfs')
+
+def test_policy_depth_and_budgets():
+    now = [0.0]
+    policy = CrawlPolicy(max_depth=1, max_pages=2, time_budget=10, clock=lambda: now[0])
+    assert policy.admits('https://e.com/a', 1)
+    assert not policy.admits('https://e.com/a', 2)
+    assert policy.exhausted(1) is None
+    assert 'page budget' in policy.exhausted(2)
+    now[0] = 10
+    assert 'time budget' in policy.exhausted(0)
+
+@pytest.mark.asyncio
+async def test_frontier_orders_by_score_then_discovery():
+    frontier = Frontier(policy=CrawlPolicy(scorer=build_scorer('path', ['/docs/'])))
+    frontier.add('https://e.com')
+    assert await frontier.get() == 'https://e.com'
+    for url in ('https://e.com/about', 'https://e.com/docs/b', 'https://e.com/news', 'https://e.com/docs/a'):
+        frontier.add(url, 'https://e.com')
+    frontier.task_done('https://e.com')
+
+    order = []
+    while len(frontier):
+        url = await frontier.get()
+        order.append(url)
+        frontier.task_done(url)
+    assert order == ['https://e.com/docs/b', 'https://e.com/docs/a', 'https://e.com/about', 'https://e.com/news']
+
+@pytest.mark.asyncio
+async def test_frontier_tracks_depth_and_refuses_out_of_scope_links():
+    frontier = Frontier(policy=CrawlPolicy(max_depth=1, rules=UrlRules(exclude=['/private/'])))
+    frontier.add('https://e.com')
+    root = await frontier.get()
+    assert frontier.add('https://e.com/a', root)
+    assert not frontier.add('https://e.com/private/x', root)
+    frontier.task_done(root)
+
+    child = await frontier.get()
+    assert not frontier.add('https://e.com/a/b', child)
+    frontier.task_done(child)
+    await frontier.join()
+
+@pytest.mark.asyncio
+async def test_frontier_stops_at_page_budget_and_leaves_rest_pending(tmp_path):
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    store.begin()
+    frontier = Frontier(store, policy=CrawlPolicy(max_pages=2))
+    frontier.add('https://e.com')
+    for _ in range(2):
+        url = await frontier.get()
+        frontier.add(f'{url}/a', url)
+        frontier.add(f'{url}/b', url)
+        frontier.mark_visited(url)
+        store.mark_done(url, None, None)
+        frontier.task_done(url)
+
+    # The next worker to ask finds the budget spent: the queue is dropped and the crawl ends.
+    waiting = asyncio.ensure_future(frontier.get())
+    await asyncio.wait_for(frontier.join(), 1)
+    waiting.cancel()
+    assert 'page budget' in frontier.stopped
+    assert not frontier.add('https://e.com/late', 'https://e.com')
+    assert sorted(url for url, _, _ in store.pending_entries()) == [
+        'https://e.com/a/a', 'https://e.com/a/b', 'https://e.com/b', 'https://e.com/late']
+    assert {url: depth for url, depth, _ in store.pending_entries()}['https://e.com/a/a'] == 2
+    store.close()
+
+@pytest.mark.asyncio
+async def test_frontier_with_store_reads_visited_urls_back(tmp_path):
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    store.begin()
+    frontier = Frontier(store)
+    frontier.add('https://e.com/docs', location='https://e.com/docs/')
+    url = await frontier.get()
+    assert frontier.location(url) == 'https://e.com/docs/'
+    frontier.mark_visited(url)
+    store.mark_done(url, None, None)
+    frontier.task_done(url)
+
+    assert frontier.visited is None and frontier.visited_count == 1
+    assert frontier.visited_urls() == ['https://e.com/docs']
+    assert frontier.location(url) == url
+    store.close()
@@ -0,0 +1,66 @@
+import pytest
+from src.crawl_store import CrawlStore, PENDING, DONE, FAILED, STALE
+
+@pytest.fixture
+def store(tmp_path):
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    yield store
+    store.close()
+
+def test_enqueue_is_idempotent_within_a_crawl(store):
+    store.begin()
+    assert store.enqueue('https://example.com') is True
+    assert store.enqueue('https://example.com') is False
+    assert list(store.pending_entries()) == [('https://example.com', None, None)]
+
+def test_mark_done_and_failed(store):
+    store.enqueue('https://example.com/a')
+    store.enqueue('https://example.com/b')
+    store.mark_done('https://example.com/a', 'out/a.pdf', 'hash', etag='"v1"')
+    store.mark_failed('https://example.com/b', 'timeout')
+
+    record = store.get('https://example.com/a')
+    assert record.status == DONE
+    assert record.output_path == 'out/a.pdf'
+    assert record.etag == '"v1"'
+    assert store.get('https://example.com/b').status == FAILED
+    assert list(store.pending_entries()) == []
+
+def test_fresh_crawl_keeps_validators_but_requeues(store):
+    store.enqueue('https://example.com')
+    store.mark_done('https://example.com', 'out/index.pdf', 'hash')
+
+    store.begin(resume=False)
+    record = store.get('https://example.com')
+    assert record.status == STALE
+    assert record.content_hash == 'hash'
+    assert store.enqueue('https://example.com') is True
+    assert store.get('https://example.com').status == PENDING
+
+def test_resume_keeps_frontier(tmp_path):
+    path = str(tmp_path / 'state.db')
+    store = CrawlStore(path)
+    store.enqueue('https://example.com')
+    store.enqueue('https://example.com/page1')
+    store.mark_done('https://example.com', 'out/index.pdf', 'hash')
+    store.close()
+
+    store = CrawlStore(path)
+    store.begin(resume=True)
+    assert list(store.pending_entries()) == [('https://example.com/page1', None, None)]
+    assert sorted(store.crawl_urls()) == ['https://example.com', 'https://example.com/page1']
+    store.close()
+
+def test_resume_keeps_location_of_pending_urls(tmp_path):
+    path = str(tmp_path / 'state.db')
+    store = CrawlStore(path)
+    store.enqueue('https://example.com', 0)
+    store.enqueue('https://example.com/docs', 1, 'https://example.com/docs/')
+    store.mark_failed('https://example.com', 'timeout')
+    store.close()
+
+    store = CrawlStore(path)
+    store.begin(resume=True)
+    assert list(store.pending_entries()) == [('https://example.com/docs', 1, 'https://example.com/docs/')]
+    assert list(store.processed_urls()) == ['https://example.com']
+    store.close()
@@ -1,14 +1,22 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.crawler import Crawler
 
 @pytest.fixture
-def mock_playwright():
-    with patch('src.crawler.sync_playwright') as mock_playwright:
-        mock_browser = MagicMock()
-        mock_page = MagicMock()
-        mock_browser.new_page.return_value = mock_page
-        mock_playwright.return_value.__enter__.return_value.chromium.launch.return_value = mock_browser
+def mock_playwright(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mock_page = AsyncMock()
+    mock_page.is_closed = MagicMock(return_value=False)
+    mock_page.on = MagicMock()
+    context = AsyncMock()
+    context.new_page = AsyncMock(return_value=mock_page)
+    mock_browser = AsyncMock()
+    mock_browser.new_context = AsyncMock(return_value=context)
+    # The crawler runs on the async engine, imported by flat name like the rest of src/.
+    with patch('web_to_pdf_converter.async_playwright') as mock_playwright:
+        mock_playwright.return_value.start = AsyncMock(return_value=mock_playwright.return_value)
+        mock_playwright.return_value.chromium.launch = AsyncMock(return_value=mock_browser)
+        mock_playwright.return_value.stop = AsyncMock()
         yield mock_page
 
 def test_crawler_initialization():
@@ -16,15 +24,19 @@ def test_crawler_initialization():
     assert crawler.base_url == 'https://example.com'
     assert crawler.domain == 'example.com'
 
-def test_crawler_crawl(mock_playwright):
+def test_crawler_crawl(mock_playwright, tmp_path):
     mock_playwright.eval_on_selector_all.return_value = [
         'https://example.com/page1',
         'https://example.com/page2',
         'https://external.com'
     ]
 
-    crawler = Crawler('https://example.com')
+    crawler = Crawler('https://example.com', rate_limit=0)
     result = crawler.crawl()
 
     assert set(result) == {'https://example.com', 'https://example.com/page1', 'https://example.com/page2'}
-    assert mock_playwright.goto.call_count == 3
\ No newline at end of file
+    navigations = [c.args[0] for c in mock_playwright.goto.call_args_list if c.args[0] != 'about:blank']
+    assert len(navigations) == 3
+    # Crawling never prints or writes anything.
+    assert mock_playwright.pdf.call_count == 0
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,39 @@
+from src.dedup import ContentDeduplicator, normalize_text, simhash
+
+ARTICLE = ' '.join(f'word{i}' for i in range(300))
+
+def test_normalize_text_ignores_case_and_whitespace():
+    assert normalize_text('  Hello\n\tWorld ') == normalize_text('hello world')
+
+def test_simhash_is_close_for_small_edits():
+    edited = ARTICLE.replace('word150', 'changed')
+    assert bin(simhash(ARTICLE) ^ simhash(edited)).count('1') <= 3
+    assert bin(simhash(ARTICLE) ^ simhash(' '.join(f'other{i}' for i in range(300)))).count('1') > 10
+
+def test_exact_duplicates_alias_first_url():
+    dedup = ContentDeduplicator()
+    assert dedup.check('https://e.com/a', ARTICLE) is None
+    assert dedup.check('https://e.com/a?print=1', ARTICLE.upper()) == 'https://e.com/a'
+    assert dedup.check('https://e.com/b', ARTICLE.replace('word150', 'changed')) is None
+    assert dedup.duplicates == 1
+
+def test_near_duplicates_match_only_in_near_mode():
+    dedup = ContentDeduplicator(near=True)
+    assert dedup.check('https://e.com/a', ARTICLE) is None
+    assert dedup.check('https://e.com/b', ARTICLE.replace('word150', 'changed')) == 'https://e.com/a'
+    assert dedup.check('https://e.com/c', ' '.join(f'other{i}' for i in range(300))) is None
+
+def test_empty_pages_are_never_duplicates():
+    dedup = ContentDeduplicator()
+    assert dedup.check('https://e.com/a', '') is None
+    assert dedup.check('https://e.com/b', '  ') is None
+
+def test_find_does_not_register_until_added():
+    dedup = ContentDeduplicator(near=True)
+    fingerprint = dedup.fingerprint(ARTICLE)
+    assert dedup.find(fingerprint) is None
+    # The first page's render failed, so it was never added: the next copy is new.
+    assert dedup.check('https://e.com/b', ARTICLE) is None
+    dedup.add('https://e.com/a', fingerprint)
+    assert dedup.find(dedup.fingerprint(ARTICLE.replace('word150', 'changed'))) == 'https://e.com/b'
+    assert dedup.fingerprint(' ') is None
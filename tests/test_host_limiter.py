@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from src.host_limiter import AIMDController, HostLimiters, parse_retry_after
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', now=1445412470.0) == 10.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+def test_reserve_spaces_requests_by_rate():
+    clock = FakeClock()
+    controller = AIMDController(initial_rate=2.0, clock=clock)
+    assert [controller.reserve() for _ in range(3)] == [0.0, 0.5, 1.0]
+
+def test_additive_increase_up_to_ceiling():
+    controller = AIMDController(initial_rate=1.0, max_rate=3.0, max_concurrency=4, clock=FakeClock())
+    for _ in range(100):
+        controller.record(latency=0.1, status=200)
+    assert controller.rate == 3.0
+    assert controller.slots == 4
+
+def test_multiplicative_decrease_once_per_round_trip():
+    clock = FakeClock()
+    controller = AIMDController(initial_rate=4.0, max_concurrency=8, clock=clock)
+    controller.concurrency = 8.0
+    controller.record(status=429)
+    controller.record(status=503)
+    assert (controller.rate, controller.concurrency) == (2.0, 4.0)
+    clock.now += 1.0
+    controller.record(error=True)
+    assert (controller.rate, controller.concurrency) == (1.0, 2.0)
+
+def test_slow_responses_count_as_congestion():
+    controller = AIMDController(initial_rate=4.0, latency_target=2.0, clock=FakeClock())
+    controller.record(latency=3.0, status=200)
+    assert controller.rate == 2.0
+
+def test_retry_after_pauses_host():
+    clock = FakeClock()
+    controller = AIMDController(initial_rate=10.0, clock=clock)
+    controller.record(status=429, retry_after=30)
+    assert controller.reserve() == 30.0
+
+def test_hosts_are_limited_independently():
+    limiters = HostLimiters(initial_rate=1.0)
+    limiters.record('https://slow.example/a', MagicMock(status=429, headers={}))
+    assert limiters.controller('https://slow.example/b').rate == 0.5
+    assert limiters.controller('https://fast.example/').rate == 1.0
+
+@pytest.mark.asyncio
+async def test_slot_caps_pages_in_flight():
+    limiters = HostLimiters(initial_rate=1000.0, max_concurrency=2)
+    in_flight = peak = 0
+
+    async def fetch():
+        nonlocal in_flight, peak
+        async with limiters.slot('https://example.com/'):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(fetch() for _ in range(6)))
+    assert peak == 1
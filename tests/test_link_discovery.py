@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.link_discovery import HttpLinkDiscoverer, extract_links
+
+STATIC_PAGE = """
+<html><head><base href="/docs/"></head><body>
+<a href="intro">Intro</a> <a href="https://example.com/about">About</a> <a>no href</a>
+<p>""" + "Plenty of server-rendered text. " * 20 + """</p>
+<script>console.log('analytics')</script>
+</body></html>
+"""
+
+APP_SHELL = '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+
+def test_extract_links_resolves_against_base():
+    links, js_rendered = extract_links(STATIC_PAGE, 'https://example.com/start')
+    assert links == ['https://example.com/docs/intro', 'https://example.com/about']
+    assert js_rendered is False
+
+def test_extract_links_flags_app_shell():
+    links, js_rendered = extract_links(APP_SHELL, 'https://example.com/')
+    assert links == []
+    assert js_rendered is True
+
+def _discoverer(mode, body, content_type='text/html; charset=utf-8', ok=True):
+    response = MagicMock(ok=ok, url='https://example.com/start', headers={'content-type': content_type})
+    response.text = AsyncMock(return_value=body)
+    response.dispose = AsyncMock()
+    discoverer = HttpLinkDiscoverer(mode)
+    discoverer.request = MagicMock()
+    discoverer.request.get = AsyncMock(return_value=response)
+    return discoverer
+
+@pytest.mark.asyncio
+async def test_discover_returns_links_for_static_page():
+    links = await _discoverer('auto', STATIC_PAGE).discover('https://example.com/start')
+    assert 'https://example.com/docs/intro' in links
+
+@pytest.mark.asyncio
+async def test_auto_mode_falls_back_for_js_rendered_page():
+    assert await _discoverer('auto', APP_SHELL).discover('https://example.com/') is None
+    assert await _discoverer('http', APP_SHELL).discover('https://example.com/') == []
+
+@pytest.mark.asyncio
+async def test_discover_handles_errors_and_non_html():
+    assert await _discoverer('auto', '', ok=False).discover('https://example.com/') is None
+    assert await _discoverer('auto', '%PDF', content_type='application/pdf').discover('https://example.com/') == []
+
+@pytest.mark.asyncio
+async def test_discover_disposes_every_response():
+    for discoverer in (_discoverer('auto', STATIC_PAGE), _discoverer('auto', '', ok=False),
+                       _discoverer('auto', '%PDF', content_type='application/pdf')):
+        await discoverer.discover('https://example.com/')
+        discoverer.request.get.return_value.dispose.assert_awaited_once()
@@ -0,0 +1,62 @@
+import asyncio
+import json
+import urllib.request
+import pytest
+from src.metrics import ChromeTraceSink, JsonlTraceSink, Metrics, MetricsSink, PrometheusSink, prometheus_text
+
+class ListSink(MetricsSink):
+    def __init__(self):
+        self.spans = []
+
+    def on_span(self, span):
+        self.spans.append(span)
+
+def test_span_aggregates_and_forwards():
+    sink = ListSink()
+    metrics = Metrics([sink])
+    with metrics.span('https://e.com', 'goto'):
+        pass
+    metrics.count('pages_ok')
+    metrics.count('bytes_written', 100)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['stages']['goto']['count'] == 1
+    assert snapshot['counters']['pages_ok'] == 1
+    assert snapshot['counters']['bytes_written'] == 100
+    assert [(span.url, span.stage) for span in sink.spans] == [('https://e.com', 'goto')]
+
+@pytest.mark.asyncio
+async def test_waiting_times_only_entry():
+    metrics = Metrics()
+    lock = asyncio.Lock()
+    async with metrics.waiting('https://e.com', 'semaphore_wait', lock):
+        assert lock.locked()
+        await asyncio.sleep(0.05)
+    assert metrics.stage_seconds['semaphore_wait'] < 0.05
+
+def test_jsonl_and_chrome_trace_files(tmp_path):
+    metrics = Metrics([JsonlTraceSink(str(tmp_path / 'trace.jsonl')), ChromeTraceSink(str(tmp_path / 'trace.json'))])
+    metrics.record('https://e.com', 'pdf_render', 1000.0, 0.5)
+    metrics.count('pages_ok')
+    metrics.close()
+
+    lines = [json.loads(line) for line in (tmp_path / 'trace.jsonl').read_text().splitlines()]
+    assert lines[0]['stage'] == 'pdf_render' and lines[0]['duration'] == 0.5
+    assert lines[-1]['summary']['counters']['pages_ok'] == 1
+    events = json.loads((tmp_path / 'trace.json').read_text())
+    span = next(event for event in events if event.get('ph') == 'X')
+    assert (span['name'], span['ts'], span['dur']) == ('pdf_render', 1000000000, 500000)
+
+def test_prometheus_text_and_endpoint():
+    sink = PrometheusSink(0)
+    metrics = Metrics([sink])
+    metrics.record('https://e.com', 'goto', 0.0, 1.5)
+    metrics.count('pages_failed', 2)
+
+    text = prometheus_text(metrics)
+    assert 'webtopdf_pages_failed_total 2' in text
+    assert 'webtopdf_stage_seconds_sum{stage="goto"} 1.500000' in text
+    port = sink.server.server_address[1]
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as response:
+        assert response.read().decode() == text
+    metrics.close()
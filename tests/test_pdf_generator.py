@@ -1,23 +1,77 @@
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from src.pdf_generator import PDFGenerator
 
+@pytest.fixture
+def mock_playwright():
+    with patch('src.pdf_generator.sync_playwright') as mock_playwright:
+        mock_browser = MagicMock()
+        mock_page = MagicMock()
+        mock_page.is_closed.return_value = False
+        mock_browser.new_page.return_value = mock_page
+        mock_playwright.return_value.start.return_value.chromium.launch.return_value = mock_browser
+        yield mock_playwright
+
 @pytest.fixture
 def pdf_generator():
     return PDFGenerator()
 
+def _page(mock_playwright):
+    return mock_playwright.return_value.start.return_value.chromium.launch.return_value.new_page.return_value
+
 def test_pdf_generator_initialization():
     generator = PDFGenerator({'option1': 'value1'})
     assert generator.options == {'option1': 'value1'}
 
-@patch('src.pdf_generator.pdfkit.from_url')
-def test_generate_pdf_success(mock_from_url, pdf_generator):
+def test_generate_pdf_success(mock_playwright, pdf_generator):
     result = pdf_generator.generate_pdf('https://example.com', 'output.pdf')
     assert result is True
-    mock_from_url.assert_called_once_with('https://example.com', 'output.pdf', options={})
+    _page(mock_playwright).pdf.assert_called_once_with(path='output.pdf')
 
-@patch('src.pdf_generator.pdfkit.from_url')
-def test_generate_pdf_failure(mock_from_url, pdf_generator):
-    mock_from_url.side_effect = Exception("PDF generation failed")
+def test_generate_pdf_failure(mock_playwright, pdf_generator):
+    _page(mock_playwright).pdf.side_effect = Exception("PDF generation failed")
     result = pdf_generator.generate_pdf('https://example.com', 'output.pdf')
-    assert result is False
\ No newline at end of file
+    assert result is False
+    _page(mock_playwright).close.assert_called_once()
+
+def test_generate_pdf_reuses_browser(mock_playwright, pdf_generator):
+    with pdf_generator:
+        pdf_generator.generate_pdf('https://example.com/a', 'a.pdf')
+        pdf_generator.generate_pdf('https://example.com/b', 'b.pdf')
+
+    launch = mock_playwright.return_value.start.return_value.chromium.launch
+    assert launch.call_count == 1
+    assert launch.return_value.new_page.call_count == 1
+    assert _page(mock_playwright).pdf.call_count == 2
+    launch.return_value.close.assert_called_once()
+
+def test_generate_many_uses_async_engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    page = AsyncMock()
+    page.is_closed = MagicMock(return_value=False)
+    page.on = MagicMock()
+    page.pdf = AsyncMock(return_value=b'%PDF-1.4')
+
+    def goto(url, **kwargs):
+        if url.endswith('/broken'):
+            raise Exception('net::ERR_NAME_NOT_RESOLVED')
+
+    page.goto.side_effect = goto
+    context = AsyncMock()
+    context.new_page = AsyncMock(return_value=page)
+    browser = AsyncMock()
+    browser.new_context = AsyncMock(return_value=context)
+    with patch('web_to_pdf_converter.async_playwright') as async_playwright:
+        async_playwright.return_value.start = AsyncMock(return_value=async_playwright.return_value)
+        async_playwright.return_value.chromium.launch = AsyncMock(return_value=browser)
+        async_playwright.return_value.stop = AsyncMock()
+
+        results = PDFGenerator({'format': 'A4'}).generate_many(
+            ['https://example.com/a', 'https://example.com/b', 'https://example.com/broken'], str(tmp_path),
+            rate_limit=100)
+
+        assert async_playwright.return_value.chromium.launch.call_count == 1
+    assert results['https://example.com/broken'] is None
+    assert (tmp_path / 'a.pdf').exists()
+    assert results['https://example.com/a'] == str(tmp_path / 'a.pdf')
+    page.pdf.assert_called_with(format='A4')
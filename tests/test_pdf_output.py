@@ -0,0 +1,69 @@
+import io
+import json
+import pytest
+from src.pdf_output import MergedPdfOutput, PdfOutput, output_filename
+
+pypdf = pytest.importorskip('pypdf')
+
+def _pdf(pages=1):
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=72, height=72)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def _manifest(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_output_filename_keeps_query_variants_apart():
+    assert output_filename('https://example.com') == 'index.pdf'
+    assert output_filename('https://example.com/docs/a') == 'docs_a.pdf'
+    assert output_filename('https://example.com/list?page=1') != output_filename('https://example.com/list?page=2')
+
+def test_per_page_output_records_manifest(tmp_path):
+    output = PdfOutput(str(tmp_path))
+    output.record('https://example.com', output.path_for('https://example.com'))
+    output.alias('https://example.com/print', 'https://example.com')
+    output.close()
+
+    assert _manifest(tmp_path / 'site.manifest.jsonl') == [
+        {'url': 'https://example.com', 'file': 'index.pdf', 'first_page': None, 'last_page': None},
+        {'url': 'https://example.com/print', 'alias_of': 'https://example.com'},
+    ]
+
+def test_merged_output_orders_by_crawl_tree(tmp_path):
+    parents = {'https://e.com/a': 'https://e.com', 'https://e.com/b': 'https://e.com',
+               'https://e.com/a/1': 'https://e.com/a'}
+    output = MergedPdfOutput(str(tmp_path), parent_of=parents.get)
+    for url in ['https://e.com', 'https://e.com/a', 'https://e.com/b', 'https://e.com/a/1']:
+        output.add(url, _pdf(2 if url.endswith('/a') else 1), title=url)
+    output.close()
+
+    manifest = _manifest(tmp_path / 'site.manifest.jsonl')
+    assert [(e['url'], e['first_page'], e['last_page']) for e in manifest] == [
+        ('https://e.com', 1, 1), ('https://e.com/a', 2, 3), ('https://e.com/a/1', 4, 4), ('https://e.com/b', 5, 5)]
+    reader = pypdf.PdfReader(str(tmp_path / 'site-0001.pdf'))
+    assert len(reader.pages) == 5
+    root, children = reader.outline
+    assert root.title == 'https://e.com'
+    assert [item.title for item in children if not isinstance(item, list)] == ['https://e.com/a', 'https://e.com/b']
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith('.site-spool')]
+
+def test_merged_output_splits_volumes(tmp_path):
+    output = MergedPdfOutput(str(tmp_path), max_pages=2)
+    paths = [output.add(f'https://e.com/{i}', _pdf()) for i in range(5)]
+    output.close()
+
+    assert [p.rsplit('-', 1)[1] for p in paths] == ['0001.pdf', '0001.pdf', '0002.pdf', '0002.pdf', '0003.pdf']
+    assert output.volumes == [str(tmp_path / f'site-000{i}.pdf') for i in (1, 2, 3)]
+    assert [e['file'] for e in _manifest(tmp_path / 'site.manifest.jsonl')][-1] == 'site-0003.pdf'
+
+def test_merged_output_rewrites_manifest_per_run(tmp_path):
+    for urls in (['https://e.com/old1', 'https://e.com/old2'], ['https://e.com/new']):
+        output = MergedPdfOutput(str(tmp_path))
+        for url in urls:
+            output.add(url, _pdf())
+        output.close()
+
+    assert [e['url'] for e in _manifest(tmp_path / 'site.manifest.jsonl')] == ['https://e.com/new']
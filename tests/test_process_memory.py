@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from src.process_memory import descendant_pids, tree_rss
+
+pytestmark = pytest.mark.skipif(not os.path.isdir('/proc/self/task'), reason='needs /proc')
+
+def test_descendants_include_children_forked_by_other_threads():
+    started = {}
+    spawned = threading.Event()
+    release = threading.Event()
+
+    def spawn():
+        started['child'] = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        spawned.set()
+        # The forking thread must stay alive: its children are listed under its own task entry.
+        release.wait(30)
+
+    thread = threading.Thread(target=spawn)
+    thread.start()
+    spawned.wait(10)
+    child = started['child']
+    try:
+        assert child.pid in descendant_pids(os.getpid())
+        assert tree_rss() > tree_rss(include_self=False) > 0
+    finally:
+        child.kill()
+        child.wait()
+        release.set()
+        thread.join()
@@ -0,0 +1,61 @@
+import logging
+from src.progress import LogBuffer, ProgressReporter, ProgressSnapshot, install_log_buffer
+
+def test_reporter_counts_outcomes_and_measures_recent_throughput():
+    now = [0.0]
+    snapshots = []
+    reporter = ProgressReporter(snapshots.append, interval=0.25, window=5.0, clock=lambda: now[0])
+
+    for i in range(10):
+        reporter.record(f'https://e.com/{i}', 'failed' if i == 3 else 'ok')
+    now[0] = 5.0
+    reporter.emit(queued=7, in_flight=3)
+    assert snapshots[-1] == ProgressSnapshot(10, 1, 7, 3, 2.0, 5.0, 'https://e.com/9')
+    assert snapshots[-1].fraction == 0.5
+
+    # Only the last window counts: a stall shows up as a falling rate.
+    now[0] = 10.0
+    reporter.emit(queued=7, in_flight=3)
+    assert snapshots[-1].pages_per_second == 0.0
+    now[0] = 12.0
+    reporter.record('https://e.com/10', 'ok')
+    reporter.emit(finished=True)
+    assert snapshots[-1].pages_per_second == 1 / 7
+    assert snapshots[-1].finished and snapshots[-1].fraction == 1.0
+    assert '11 pages (1 failed)' in snapshots[-1].summary()
+
+def test_log_buffer_keeps_newest_lines_between_drains():
+    logger = logging.getLogger('test_progress')
+    logger.propagate = False
+    buffer = LogBuffer(max_lines=3)
+    logger.addHandler(buffer)
+    logger.setLevel(logging.INFO)
+    try:
+        for i in range(5):
+            logger.info(f'page {i}')
+        lines = buffer.drain()
+    finally:
+        logger.removeHandler(buffer)
+
+    assert lines[0] == '... 2 earlier lines skipped'
+    assert [line.rsplit(' - ', 1)[1] for line in lines[1:]] == ['page 2', 'page 3', 'page 4']
+    assert buffer.drain() == []
+
+def test_installed_log_buffer_receives_info_records():
+    root = logging.getLogger()
+    level, handlers = root.level, root.handlers[:]
+    root.handlers = []
+    root.setLevel(logging.WARNING)
+    buffer = LogBuffer()
+    try:
+        install_log_buffer(buffer)
+        # What the converter's main() does once the GUI thread has installed the buffer.
+        logging.basicConfig(level=logging.INFO)
+        logging.getLogger('web_to_pdf').info('Generated PDF for https://e.com')
+        lines = buffer.drain()
+    finally:
+        root.removeHandler(buffer)
+        root.handlers = handlers
+        root.setLevel(level)
+
+    assert len(lines) == 1 and lines[0].endswith('Generated PDF for https://e.com')
@@ -0,0 +1,60 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from src.readiness import (FontsReady, LoadState, QuietWindow, ReadinessPolicy, WaitForSelector,
+                           parse_strategy)
+
+@pytest.mark.parametrize('spec, cls, name', [
+    ('load', LoadState, 'load'),
+    ('networkidle', LoadState, 'networkidle'),
+    ('fonts', FontsReady, 'fonts'),
+    ('selector:#main', WaitForSelector, 'selector:#main'),
+    ('quiet', QuietWindow, 'quiet:500'),
+    ('quiet:250', QuietWindow, 'quiet:250'),
+])
+def test_parse_strategy(spec, cls, name):
+    strategy = parse_strategy(spec)
+    assert isinstance(strategy, cls)
+    assert strategy.name == name
+
+def test_parse_strategy_rejects_unknown():
+    with pytest.raises(ValueError):
+        parse_strategy('whenever')
+
+def test_policy_matches_rules_in_order():
+    policy = ReadinessPolicy.from_specs('load', [r'/app/=selector:#root', r'/blog/=quiet:300'])
+    assert policy.strategy_for('https://example.com/app/x').name == 'selector:#root'
+    assert policy.strategy_for('https://example.com/blog/post').name == 'quiet:300'
+    assert policy.strategy_for('https://example.com/about').name == 'load'
+
+@pytest.mark.asyncio
+async def test_networkidle_stall_costs_budget_not_page():
+    page = AsyncMock()
+    page.wait_for_load_state.side_effect = PlaywrightTimeoutError('stalled')
+    policy = ReadinessPolicy(budget=5)
+
+    result = await policy.navigate(page, 'https://example.com')
+
+    page.goto.assert_awaited_once_with('https://example.com', wait_until='load', timeout=5000)
+    assert result.strategy == 'networkidle'
+    assert result.timed_out is True
+    assert result.response is page.goto.return_value
+
+@pytest.mark.asyncio
+async def test_quiet_window_reports_budget_exhaustion():
+    page = AsyncMock()
+    page.evaluate.return_value = False
+
+    result = await ReadinessPolicy(QuietWindow(200)).navigate(page, 'https://example.com')
+
+    assert page.goto.call_args.kwargs['wait_until'] == 'domcontentloaded'
+    assert page.evaluate.call_args.args[1]['quietMs'] == 200
+    assert result.timed_out is True
+
+def test_navigate_sync_uses_same_strategies():
+    page = MagicMock()
+    result = ReadinessPolicy(WaitForSelector('#main')).navigate_sync(page, 'https://example.com')
+
+    page.wait_for_selector.assert_called_once()
+    assert page.wait_for_selector.call_args.args[0] == '#main'
+    assert result.timed_out is False
@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.request_filter import RequestFilter, build_filter
+
+def _request(url, resource_type='script', navigation=False):
+    request = MagicMock(url=url, resource_type=resource_type)
+    request.is_navigation_request.return_value = navigation
+    return request
+
+def test_render_profile_blocks_trackers_and_media_only():
+    request_filter = RequestFilter.render_profile()
+    assert request_filter.should_block(_request('https://www.google-analytics.com/analytics.js'))
+    assert request_filter.should_block(_request('https://stats.g.doubleclick.net/x'))
+    assert request_filter.should_block(_request('https://example.com/intro.mp4', 'media'))
+    assert not request_filter.should_block(_request('https://example.com/logo.png', 'image'))
+    assert not request_filter.should_block(_request('https://notdoubleclick.net/app.js'))
+
+def test_discovery_profile_blocks_visual_resources():
+    request_filter = build_filter('discovery')
+    for resource_type in ('image', 'media', 'font'):
+        assert request_filter.should_block(_request('https://example.com/asset', resource_type))
+    assert not request_filter.should_block(_request('https://example.com/app.js', 'script'))
+
+def test_navigation_and_wildcard_hosts():
+    request_filter = RequestFilter(['document'], ['*.cdn.example'])
+    assert not request_filter.should_block(_request('https://example.com/', 'document', navigation=True))
+    assert request_filter.should_block(_request('https://img.cdn.example/a.js'))
+
+@pytest.mark.asyncio
+async def test_route_handler_aborts_or_falls_back():
+    request_filter = RequestFilter(['image'])
+    blocked = MagicMock(request=_request('https://example.com/a.png', 'image'))
+    blocked.abort = AsyncMock()
+    allowed = MagicMock(request=_request('https://example.com/a.js'))
+    allowed.fallback = AsyncMock()
+
+    await request_filter._handle(blocked)
+    await request_filter._handle(allowed)
+
+    blocked.abort.assert_awaited_once_with('blockedbyclient')
+    allowed.fallback.assert_awaited_once()
+    assert request_filter.blocked == 1
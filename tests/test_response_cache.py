@@ -0,0 +1,149 @@
+import threading
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.response_cache import ResponseCache, freshness_lifetime
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache'))
+    yield cache
+    cache.close()
+
+def test_freshness_lifetime():
+    now = time.time()
+    assert freshness_lifetime({'cache-control': 'public, max-age=600'}, now) == 600
+    assert freshness_lifetime({'cache-control': 'no-store'}, now) is None
+    assert freshness_lifetime({'cache-control': 'no-cache, max-age=600'}, now) == 0
+    assert freshness_lifetime({}, now) == 0
+
+def test_store_and_lookup_respects_vary(cache):
+    headers = {'cache-control': 'max-age=600', 'vary': 'Accept-Language', 'content-encoding': 'gzip'}
+    cache.store('https://example.com/a.css', {'accept-language': 'en'}, 200, headers, b'body { }')
+
+    entry = cache.lookup('https://example.com/a.css', {'accept-language': 'en'})
+    assert entry is not None
+    assert cache.read_body(entry) == b'body { }'
+    assert 'content-encoding' not in entry.headers
+    assert cache.lookup('https://example.com/a.css', {'accept-language': 'de'}) is None
+
+def test_uncacheable_responses_are_not_stored(cache):
+    cache.store('https://example.com/a', {}, 200, {'cache-control': 'no-store'}, b'x')
+    cache.store('https://example.com/b', {}, 500, {'cache-control': 'max-age=60'}, b'x')
+    cache.store('https://example.com/c', {}, 200, {}, b'x')
+    assert cache.stats()['stored'] == 0
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache'), max_bytes=10)
+    cache.store('https://example.com/old', {}, 200, {'cache-control': 'max-age=60'}, b'123456')
+    time.sleep(0.01)
+    cache.store('https://example.com/new', {}, 200, {'cache-control': 'max-age=60'}, b'abcdef')
+    assert cache.lookup('https://example.com/old', {}) is None
+    assert cache.lookup('https://example.com/new', {}) is not None
+    cache.close()
+
+def test_cache_is_usable_from_other_threads(cache):
+    import concurrent.futures
+
+    headers = {'cache-control': 'max-age=600'}
+    cache.store('https://example.com/a.css', {}, 200, headers, b'a')
+
+    def use(i):
+        cache.store(f'https://example.com/{i}.css', {}, 200, headers, b'x' * i)
+        return cache.lookup('https://example.com/a.css', {}) is not None
+
+    # What run_sync's helper thread does under Playwright's sync API.
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        assert all(executor.map(use, range(20)))
+    assert cache.stats()['bytes'] == 1 + sum(range(20))
+
+def test_size_is_tracked_without_summing_the_index(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache'), max_bytes=20)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    headers = {'cache-control': 'max-age=60'}
+    cache.store('https://example.com/a', {}, 200, headers, b'12345678')
+    cache.store('https://example.com/a', {}, 200, headers, b'1234')
+    time.sleep(0.01)
+    cache.store('https://example.com/b', {}, 200, headers, b'abcdefgh')
+    assert not any('SUM' in statement for statement in statements)
+    assert cache._total_size == 12
+
+    # Over the cap, the index is recounted once and the oldest entries go.
+    time.sleep(0.01)
+    cache.store('https://example.com/c', {}, 200, headers, b'ABCDEFGHIJ')
+    assert sum('SUM' in statement for statement in statements) == 1
+    assert cache.lookup('https://example.com/a', {}) is None
+    assert cache._total_size == cache.stats()['bytes'] == 18
+    cache.close()
+
+    # A reopened cache starts from what is on disk.
+    cache = ResponseCache(str(tmp_path / 'cache'), max_bytes=20)
+    assert cache._total_size == 18
+    cache.close()
+
+def _route(url):
+    route = MagicMock()
+    route.request = MagicMock(url=url, method='GET', headers={})
+    route.fulfill = AsyncMock()
+    route.fallback = AsyncMock()
+    response = MagicMock(status=200, headers={'cache-control': 'max-age=600', 'etag': '"v1"'})
+    response.body = AsyncMock(return_value=b'payload')
+    route.fetch = AsyncMock(return_value=response)
+    return route
+
+@pytest.mark.asyncio
+async def test_second_request_is_served_from_disk(cache):
+    first = _route('https://example.com/app.js')
+    await cache._handle(first)
+    second = _route('https://example.com/app.js')
+    await cache._handle(second)
+
+    first.fetch.assert_awaited_once()
+    second.fetch.assert_not_awaited()
+    assert second.fulfill.call_args.kwargs['body'] == b'payload'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_revalidated(cache):
+    cache.store('https://example.com/page', {}, 200, {'cache-control': 'no-cache', 'etag': '"v1"'}, b'cached')
+    route = _route('https://example.com/page')
+    route.fetch.return_value = MagicMock(status=304, headers={})
+
+    await cache._handle(route)
+
+    assert route.fetch.call_args.kwargs['headers']['if-none-match'] == '"v1"'
+    assert route.fulfill.call_args.kwargs['body'] == b'cached'
+    assert cache.revalidated == 1
+
+@pytest.mark.asyncio
+async def test_handler_reads_and_writes_bodies_off_the_event_loop(cache, monkeypatch):
+    loop_thread = threading.get_ident()
+    threads = []
+    for name in ('_write_body', 'read_body'):
+        def traced(*args, method=getattr(cache, name)):
+            threads.append(threading.get_ident())
+            return method(*args)
+        monkeypatch.setattr(cache, name, traced)
+
+    await cache._handle(_route('https://example.com/app.js'))
+    second = _route('https://example.com/app.js')
+    await cache._handle(second)
+
+    assert second.fulfill.call_args.kwargs['body'] == b'payload'
+    assert len(threads) == 2 and loop_thread not in threads
+
+@pytest.mark.asyncio
+async def test_redirects_are_cached_and_fulfilled_unfollowed(cache):
+    first = _route('https://example.com/docs')
+    redirect = MagicMock(status=301, headers={'location': '/docs/', 'cache-control': 'max-age=600'})
+    redirect.body = AsyncMock(return_value=b'')
+    first.fetch.return_value = redirect
+    await cache._handle(first)
+    second = _route('https://example.com/docs')
+    await cache._handle(second)
+
+    assert first.fetch.call_args.kwargs['max_redirects'] == 0
+    second.fetch.assert_not_awaited()
+    assert second.fulfill.call_args.kwargs['status'] == 301
+    assert second.fulfill.call_args.kwargs['headers']['location'] == '/docs/'
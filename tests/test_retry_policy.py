@@ -0,0 +1,57 @@
+from src.retry_policy import CircuitBreakers, RetryPolicy, classify
+
+def test_classify_navigation_errors():
+    assert classify('net::ERR_NAME_NOT_RESOLVED at https://e.com') == ('permanent', False, True)
+    assert classify('net::ERR_ABORTED at https://e.com/file.zip') == ('permanent', False, False)
+    assert classify('net::ERR_CONNECTION_REFUSED at https://e.com') == ('network', True, True)
+    assert classify('Timeout 30000ms exceeded.') == ('timeout', True, True)
+    assert classify('Target page, context or browser has been closed') == ('network', True, False)
+
+def test_classify_http_statuses():
+    assert classify('HTTP 503', 503) == ('http', True, True)
+    assert classify('HTTP 429', 429) == ('http', True, False)
+    assert classify('HTTP 500', 500) == ('http', True, False)
+
+def test_retry_policy_backoff_with_jitter():
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=3.0, rng=lambda: 0.5)
+    assert policy.delay(1) == 0.75
+    assert policy.delay(2) == 1.5
+    assert policy.delay(5) == 2.25
+    assert policy.delay(1, retry_after=120) == 120
+    assert RetryPolicy(rng=lambda: 0.0).delay(1) == 0.5
+
+    transient = classify('Timeout 30000ms exceeded.')
+    assert policy.should_retry(transient, 2)
+    assert not policy.should_retry(transient, 3)
+    assert not policy.should_retry(classify('net::ERR_NAME_NOT_RESOLVED'), 1)
+
+def test_circuit_breaker_opens_probes_and_closes():
+    now = [0.0]
+    breakers = CircuitBreakers(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    url = 'https://e.com/a'
+
+    breakers.record(url, True)
+    assert breakers.allow(url)
+    breakers.record(url, True)
+    assert not breakers.allow(url)
+    assert breakers.allow('https://other.com/a')
+    assert breakers.retry_in(url) == 10
+
+    now[0] = 10
+    assert breakers.allow(url)
+    assert not breakers.allow('https://e.com/b')
+    breakers.record(url, True)
+    assert not breakers.allow(url)
+
+    now[0] = 20
+    assert breakers.allow(url)
+    breakers.record(url, False)
+    assert breakers.allow('https://e.com/b')
+    assert not breakers.is_open(url)
+
+def test_circuit_breaker_success_resets_failure_count():
+    breakers = CircuitBreakers(failure_threshold=2)
+    breakers.record('https://e.com/a', True)
+    breakers.record('https://e.com/b', False)
+    breakers.record('https://e.com/c', True)
+    assert breakers.allow('https://e.com/d')
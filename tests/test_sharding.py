@@ -0,0 +1,120 @@
+import queue
+import pytest
+from src.sharding import shard_for, ShardFrontier, _coordinate
+
+def test_shard_for_is_stable_and_in_range():
+    shards = {shard_for(f'https://example.com/page{i}', 4) for i in range(100)}
+    assert shards == {0, 1, 2, 3}
+    assert shard_for('https://example.com/a', 4) == shard_for('https://example.com/a#top', 4)
+
+def test_shard_frontier_reports_links_before_done():
+    outbox = queue.Queue()
+    frontier = ShardFrontier(outbox)
+    frontier.feed('https://example.com')
+    frontier.mark_visited('https://example.com')
+    frontier.add('https://example.com/page1', 'https://example.com')
+    frontier.task_done()
+
+    messages = [outbox.get_nowait() for _ in range(3)]
+    assert messages == [('visited', 'https://example.com'),
+                        ('link', ('https://example.com/page1', 'https://example.com', 1, None)),
+                        ('done', None)]
+
+def test_coordinate_routes_and_dedupes_until_done():
+    inboxes = [queue.Queue(), queue.Queue()]
+    outbox = queue.Queue()
+    for message in [
+        ('visited', 'https://example.com'),
+        ('link', ('https://example.com/page1', 'https://example.com', 1)),
+        ('link', ('https://example.com', 'https://example.com/page1', 2)),
+        ('done', None),
+        ('visited', 'https://example.com/page1'),
+        ('done', None),
+    ]:
+        outbox.put(message)
+
+    visited = _coordinate('https://example.com', inboxes, outbox, lambda: True)
+
+    assert visited == ['https://example.com', 'https://example.com/page1']
+    routed = [inbox.get_nowait() for inbox in inboxes for _ in range(inbox.qsize())]
+    assert sorted(routed) == [('https://example.com', None, 0, None),
+                              ('https://example.com/page1', 'https://example.com', 1, None)]
+
+def test_shard_frontier_checks_depth_and_rules_before_reporting():
+    from src.crawl_policy import CrawlPolicy, UrlRules
+
+    outbox = queue.Queue()
+    frontier = ShardFrontier(outbox, CrawlPolicy(max_depth=1, rules=UrlRules(exclude=['/private/'])))
+
+    assert not frontier.add('https://example.com/private/a', 'https://example.com')
+    assert not frontier.add('https://example.com/deep', depth=2)
+    assert frontier.add('https://example.com/a', 'https://example.com')
+    assert outbox.get_nowait() == ('link', ('https://example.com/a', 'https://example.com', 1, None))
+    assert outbox.empty()
+
+def test_coordinate_stops_routing_at_page_budget(tmp_path):
+    from src.crawl_store import CrawlStore
+
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    inboxes = [queue.Queue()]
+    outbox = queue.Queue()
+    for message in [
+        ('link', ('https://example.com/page1', 'https://example.com', 1)),
+        ('link', ('https://example.com/page2', 'https://example.com', 1)),
+        ('done', None),
+        ('done', None),
+    ]:
+        outbox.put(message)
+
+    _coordinate('https://example.com', inboxes, outbox, lambda: True, store, max_pages=2)
+
+    routed = [inboxes[0].get_nowait()[0] for _ in range(inboxes[0].qsize())]
+    assert routed == ['https://example.com', 'https://example.com/page1']
+    # Left for a resumed crawl, at its depth.
+    assert ('https://example.com/page2', 1, None) in list(store.pending_entries())
+    store.close()
+
+def test_coordinate_fails_when_shard_dies():
+    with pytest.raises(RuntimeError):
+        _coordinate('https://example.com', [queue.Queue()], queue.Queue(), lambda: False)
+
+def test_coordinate_routes_sitemap_seeds_and_skips_unchanged(tmp_path):
+    from src.crawl_store import CrawlStore
+    from src.sitemaps import SitemapEntry
+
+    output_path = tmp_path / 'old.pdf'
+    output_path.write_bytes(b'%PDF')
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    store.begin(False)
+    store.enqueue('https://example.com/old')
+    store.mark_done('https://example.com/old', str(output_path), 'hash')
+    inboxes = [queue.Queue()]
+    outbox = queue.Queue()
+    for message in [('done', None), ('done', None)]:
+        outbox.put(message)
+
+    seeds = [SitemapEntry('https://example.com/new', 2e9), SitemapEntry('https://example.com/old', 1e9)]
+    _coordinate('https://example.com', inboxes, outbox, lambda: True, store, seeds=seeds, skip_unchanged=True)
+
+    routed = [inboxes[0].get_nowait() for _ in range(inboxes[0].qsize())]
+    assert routed == [('https://example.com', None, 0, None), ('https://example.com/new', None, 1, None)]
+    store.close()
+
+def test_coordinate_loads_urls_as_given_and_reads_visited_from_store(tmp_path):
+    from src.crawl_store import CrawlStore
+
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    inboxes = [queue.Queue()]
+
+    class Shard(queue.Queue):
+        def get(self, block=True, timeout=None):
+            # Converts the routed URL, recording the result as a shard's converter does.
+            url, _, _, location = inboxes[0].get_nowait()
+            assert (url, location) == ('https://example.com/docs', 'https://Example.com/docs/')
+            store.mark_done(url, None, None)
+            return ('done', None)
+
+    visited = _coordinate('https://Example.com/docs/#intro', inboxes, Shard(), lambda: True, store)
+
+    assert visited == ['https://example.com/docs']
+    store.close()
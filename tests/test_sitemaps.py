@@ -0,0 +1,103 @@
+import gzip
+from src.crawl_store import PageRecord
+from src.sitemaps import (RobotsPolicy, iter_sitemap_entries, parse_lastmod, parse_sitemap, sitemap_seeds,
+                          unchanged_since_render)
+
+URLSET = b'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://e.com/old</loc><lastmod>2023-01-01</lastmod><priority>0.8</priority></url>
+  <url><loc> https://e.com/new </loc><lastmod>2024-05-01T10:00:00Z</lastmod></url>
+  <url><loc>https://e.com/undated</loc><priority>high</priority></url>
+  <url><loc>https://e.com/private/page</loc><lastmod>2024-06-01</lastmod></url>
+</urlset>'''
+
+INDEX = b'''<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://e.com/pages.xml.gz</loc></sitemap>
+  <sitemap><loc>https://e.com/sitemap.xml</loc></sitemap>
+</sitemapindex>'''
+
+def test_parse_lastmod():
+    assert parse_lastmod('2024-05-01T10:00:00Z') == parse_lastmod('2024-05-01T12:00:00+02:00')
+    assert parse_lastmod('2024-05-01') < parse_lastmod('2024-05-01T10:00:00Z')
+    assert parse_lastmod('yesterday') is None
+    assert parse_lastmod(None) is None
+
+def test_parse_sitemap_and_index():
+    entries, nested = parse_sitemap(URLSET)
+    assert [e.url for e in entries] == ['https://e.com/old', 'https://e.com/new', 'https://e.com/undated',
+                                        'https://e.com/private/page']
+    assert entries[2].lastmod is None
+    assert [e.priority for e in entries] == [0.8, None, None, None]
+    assert nested == []
+
+    entries, nested = parse_sitemap(INDEX)
+    assert entries == []
+    assert nested == ['https://e.com/pages.xml.gz', 'https://e.com/sitemap.xml']
+
+def test_parse_sitemap_tolerates_garbage():
+    assert parse_sitemap(b'<html><body>Not found') == ([], [])
+
+def test_iter_sitemap_entries_follows_indexes_once():
+    fetched = []
+    documents = {'https://e.com/sitemap.xml': INDEX, 'https://e.com/pages.xml.gz': URLSET}
+
+    def fetcher(url):
+        fetched.append(url)
+        return documents.get(url)
+
+    entries = list(iter_sitemap_entries(['https://e.com/sitemap.xml'], fetcher))
+    assert len(entries) == 4
+    assert fetched == ['https://e.com/sitemap.xml', 'https://e.com/pages.xml.gz']
+
+def test_robots_policy():
+    robots = RobotsPolicy('https://e.com/robots.txt', [
+        'User-agent: *', 'Disallow: /private/', 'Crawl-delay: 2', 'Sitemap: https://e.com/pages.xml.gz'])
+    assert robots.allowed('https://e.com/docs')
+    assert not robots.allowed('https://e.com/private/page')
+    assert robots.crawl_delay == 2.0
+    assert robots.sitemaps == ['https://e.com/pages.xml.gz']
+
+    unrestricted = RobotsPolicy('https://e.com/robots.txt')
+    assert unrestricted.allowed('https://e.com/private/page')
+    assert unrestricted.crawl_delay is None
+
+def test_sitemap_seeds_newest_first_without_disallowed():
+    robots = RobotsPolicy('https://e.com/robots.txt', ['User-agent: *', 'Disallow: /private/'])
+    documents = {'https://e.com/sitemap.xml': URLSET}
+
+    seeds = sitemap_seeds('https://e.com/', robots, documents.get)
+
+    assert [s.url for s in seeds] == ['https://e.com/new', 'https://e.com/old', 'https://e.com/undated']
+    assert seeds[1].priority == 0.8
+
+def test_sitemap_seeds_uses_robots_sitemaps():
+    robots = RobotsPolicy('https://e.com/robots.txt', ['Sitemap: https://e.com/pages.xml.gz'])
+    documents = {'https://e.com/pages.xml.gz': URLSET}
+    assert len(sitemap_seeds('https://e.com/', robots, documents.get)) == 4
+
+def test_fetch_decompresses_gzip(monkeypatch):
+    from src import sitemaps
+
+    class Response:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def read(self):
+            return gzip.compress(URLSET)
+
+    monkeypatch.setattr(sitemaps.urllib.request, 'urlopen', lambda request, timeout: Response())
+    assert sitemaps.fetch('https://e.com/pages.xml.gz') == URLSET
+
+def test_unchanged_since_render(tmp_path):
+    output = tmp_path / 'page.pdf'
+    output.write_bytes(b'%PDF')
+    record = PageRecord('https://e.com/a', 'done', str(output), 'hash', None, None, 1000.0)
+    assert unchanged_since_render(record, 900.0)
+    assert not unchanged_since_render(record, 1100.0)
+    assert not unchanged_since_render(record, None)
+    assert not unchanged_since_render(None, 900.0)
+    assert not unchanged_since_render(record._replace(output_path=str(tmp_path / 'gone.pdf')), 900.0)
@@ -0,0 +1,47 @@
+import pytest
+from src.url_utils import BloomFilter, SeenSet, canonicalize_url, is_in_scope
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://example.com', 'https://example.com'),
+    ('https://example.com/', 'https://example.com'),
+    ('HTTPS://Example.COM:443/docs/', 'https://example.com/docs'),
+    ('http://example.com:80/a/./b/../c#section', 'http://example.com/a/c'),
+    ('https://example.com:8443/x', 'https://example.com:8443/x'),
+    ('https://example.com/p?b=2&a=1&utm_source=feed', 'https://example.com/p?a=1&b=2'),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+def test_canonicalize_url_custom_strip_params():
+    assert canonicalize_url('https://example.com/p?session=1&page=2', ['session']) == 'https://example.com/p?page=2'
+    assert canonicalize_url('https://example.com/p?utm_source=x', []) == 'https://example.com/p?utm_source=x'
+
+def test_is_in_scope_matches_host_not_substring():
+    assert is_in_scope('https://example.com/page', 'example.com')
+    assert is_in_scope('http://example.com:8080/page', 'example.com:8080')
+    assert not is_in_scope('https://evil.com/?ref=example.com', 'example.com')
+    assert not is_in_scope('https://example.com.evil.com/', 'example.com')
+    assert not is_in_scope('mailto:someone@example.com', 'example.com')
+    assert not is_in_scope('https://docs.example.com/', 'example.com')
+    assert is_in_scope('https://docs.example.com/', 'example.com', include_subdomains=True)
+
+def test_seen_set_dedupes():
+    seen = SeenSet()
+    assert seen.add('https://example.com/a') is True
+    assert seen.add('https://example.com/a') is False
+    assert 'https://example.com/a' in seen
+    assert 'https://example.com/b' not in seen
+    assert len(seen) == 1
+
+def test_bloom_seen_set_has_no_false_negatives():
+    seen = SeenSet(bloom_capacity=1000)
+    urls = [f'https://example.com/page{i}' for i in range(1000)]
+    seen.update(urls)
+    assert all(url in seen for url in urls)
+    false_positives = sum(f'https://example.com/other{i}' in seen for i in range(1000))
+    assert false_positives < 20
+
+def test_bloom_filter_sizing():
+    bloom = BloomFilter(1000, 0.01)
+    assert bloom.size > 1000
+    assert bloom.hashes >= 1
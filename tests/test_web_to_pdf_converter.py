@@ -1,28 +1,42 @@
 import pytest
+import pytest_asyncio
 import asyncio
+import threading
 from unittest.mock import AsyncMock, MagicMock, patch
 from src.web_to_pdf_converter import WebToPDFConverter, NetworkError, RenderingError, PDFConversionError
+from src.frontier import Frontier
 
 @pytest.fixture
 def mock_page():
     page = AsyncMock()
+    page.is_closed = MagicMock(return_value=False)
+    page.on = MagicMock()
     page.goto = AsyncMock()
     page.eval_on_selector_all = AsyncMock(return_value=['https://example.com/page1', 'https://example.com/page2'])
-    page.pdf = AsyncMock()
+    page.pdf = AsyncMock(return_value=b'%PDF-1.4')
+    page.content = AsyncMock(return_value='<html><body>content</body></html>')
     page.query_selector = AsyncMock()
     return page
 
 @pytest.fixture
 def mock_browser(mock_page):
+    context = AsyncMock()
+    context.new_page = AsyncMock(return_value=mock_page)
     browser = AsyncMock()
-    browser.new_page = AsyncMock(return_value=mock_page)
+    browser.new_context = AsyncMock(return_value=context)
     return browser
 
-@pytest.fixture
-async def converter(mock_browser):
-    async with patch('src.web_to_pdf_converter.async_playwright') as mock_playwright:
-        mock_playwright.return_value.start = AsyncMock()
+def _navigations(page):
+    return [c.args[0] for c in page.goto.call_args_list if c.args[0] != 'about:blank']
+
+@pytest_asyncio.fixture
+async def converter(mock_browser, tmp_path, monkeypatch):
+    # Relative output directories and manifests land in a scratch directory.
+    monkeypatch.chdir(tmp_path)
+    with patch('src.web_to_pdf_converter.async_playwright') as mock_playwright:
+        mock_playwright.return_value.start = AsyncMock(return_value=mock_playwright.return_value)
         mock_playwright.return_value.chromium.launch = AsyncMock(return_value=mock_browser)
+        mock_playwright.return_value.stop = AsyncMock()
         converter = WebToPDFConverter()
         await converter.__aenter__()
         yield converter
@@ -32,14 +46,14 @@ async def converter(mock_browser):
 async def test_crawl_and_convert(converter, mock_page):
     result = await converter.crawl_and_convert('https://example.com', 'output')
     assert set(result) == {'https://example.com', 'https://example.com/page1', 'https://example.com/page2'}
-    assert mock_page.goto.call_count == 3
+    assert len(_navigations(mock_page)) == 3
     assert mock_page.pdf.call_count == 3
 
 @pytest.mark.asyncio
 async def test_crawl_and_convert_with_selector(converter, mock_page):
     mock_element = AsyncMock()
     mock_page.query_selector.return_value = mock_element
-    mock_element.screenshot = AsyncMock()
+    mock_element.screenshot = AsyncMock(return_value=b'%PDF-1.4')
 
     await converter.crawl_and_convert('https://example.com', 'output', css_selector='#content')
     
@@ -51,7 +65,7 @@ async def test_network_error(converter, mock_page):
     mock_page.goto.side_effect = Exception("Network error")
     
     with pytest.raises(NetworkError):
-        await converter._process_page(mock_page, 'https://example.com', 'example.com', set(), set(), 'output', None)
+        await converter._process_page(mock_page, 'https://example.com', 'example.com', Frontier(), 'output', None)
 
 @pytest.mark.asyncio
 async def test_rendering_error(converter, mock_page):
@@ -65,4 +79,440 @@ async def test_pdf_conversion_error(converter, mock_page):
     mock_page.pdf.side_effect = Exception("PDF conversion failed")
     
     with pytest.raises(PDFConversionError):
-        await converter._generate_pdf(mock_page, 'https://example.com', 'output', None)
\ No newline at end of file
+        await converter._generate_pdf(mock_page, 'https://example.com', 'output', None)
+
+@pytest.mark.asyncio
+async def test_crawl_and_convert_runs_pages_concurrently(converter, mock_page):
+    in_flight = 0
+    peak = 0
+
+    async def slow_goto(url, **kwargs):
+        nonlocal in_flight, peak
+        if url == 'about:blank':
+            return
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    mock_page.goto.side_effect = slow_goto
+    mock_page.eval_on_selector_all.return_value = [f'https://example.com/page{i}' for i in range(10)]
+    converter.rate_limiter = AsyncMock()
+
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+
+    assert len(result) == 11
+    assert len(_navigations(mock_page)) == 11
+    assert 1 < peak <= converter.concurrency_limit
+
+@pytest.mark.asyncio
+async def test_page_pool_replaces_crashed_page(mock_browser, mock_page):
+    from src.browser_pool import PagePool
+
+    pool = PagePool(mock_browser, size=1)
+    await pool.start()
+    async with pool.page() as page:
+        assert page is mock_page
+        mock_page.is_closed.return_value = True
+
+    mock_page.is_closed.return_value = False
+    async with pool.page():
+        pass
+
+    assert mock_browser.new_context.call_count == 2
+    assert mock_browser.new_context.return_value.close.call_count == 1
+
+@pytest.mark.asyncio
+async def test_incremental_crawl_skips_unchanged_pages(converter, mock_page, tmp_path):
+    from src.crawl_store import CrawlStore
+
+    mock_page.eval_on_selector_all.return_value = []
+    mock_page.goto.return_value = MagicMock(headers={'etag': '"v1"'})
+    output_path = tmp_path / 'index.pdf'
+    output_path.write_bytes(b'%PDF')
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    store.enqueue('https://example.com')
+    store.mark_done('https://example.com', str(output_path), 'old-hash', etag='"v1"')
+    converter.store = store
+    converter.incremental = True
+
+    result = await converter.crawl_and_convert('https://example.com', str(tmp_path))
+
+    assert result == ['https://example.com']
+    assert mock_page.pdf.call_count == 0
+    store.close()
+
+@pytest.mark.asyncio
+async def test_crawl_and_convert_dedupes_equivalent_urls(converter, mock_page):
+    mock_page.eval_on_selector_all.return_value = [
+        'https://example.com/page1#top',
+        'https://example.com/page1/',
+        'https://EXAMPLE.com:443/page1?utm_source=nav',
+        'https://external.com/?ref=example.com',
+    ]
+
+    result = await converter.crawl_and_convert('https://example.com/', 'output')
+
+    assert set(result) == {'https://example.com', 'https://example.com/page1'}
+    assert len(_navigations(mock_page)) == 2
+
+@pytest.mark.asyncio
+async def test_http_discovery_skips_browser_link_extraction(converter, mock_page):
+    converter.link_discoverer = AsyncMock()
+    converter.link_discoverer.discover.side_effect = (
+        lambda url: ['https://example.com/page1'] if url == 'https://example.com' else [])
+
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+
+    assert set(result) == {'https://example.com', 'https://example.com/page1'}
+    assert mock_page.eval_on_selector_all.call_count == 0
+
+@pytest.mark.asyncio
+async def test_pages_load_as_discovered_and_resolve_relative_links(converter, mock_page):
+    converter.link_discoverer = AsyncMock()
+    converter.link_discoverer.discover.side_effect = (
+        lambda url: ['intro', '/docs/#top'] if url == 'https://example.com/docs/' else [])
+
+    result = await converter.crawl_and_convert('https://example.com/docs/', 'output')
+
+    # Canonical URLs key the crawl; the server sees the URLs as written.
+    assert set(result) == {'https://example.com/docs', 'https://example.com/docs/intro'}
+    assert sorted(_navigations(mock_page)) == ['https://example.com/docs/', 'https://example.com/docs/intro']
+
+@pytest.mark.asyncio
+async def test_pipeline_bounds_render_backlog(converter, mock_page):
+    links = [f'https://example.com/page{i}' for i in range(20)]
+    converter.pipeline = True
+    converter.render_queue_size = 2
+    converter.discovery_rate_limiter = AsyncMock()
+    converter.rate_limiter = AsyncMock()
+    converter.link_discoverer = AsyncMock()
+    converter.link_discoverer.discover.side_effect = lambda url: links if url == 'https://example.com' else []
+
+    backlog = []
+    original_put = asyncio.Queue.put
+
+    async def tracking_put(queue, item):
+        await original_put(queue, item)
+        backlog.append(queue.qsize())
+
+    with patch.object(asyncio.Queue, 'put', tracking_put):
+        result = await converter.crawl_and_convert('https://example.com', 'output')
+
+    assert len(result) == 21
+    assert mock_page.pdf.call_count == 21
+    assert mock_page.eval_on_selector_all.call_count == 0
+    assert max(backlog) <= 2
+
+@pytest.mark.asyncio
+async def test_pipeline_http_discovery_falls_back_to_rendered_page_links(converter, mock_page):
+    converter.pipeline = True
+    converter.rate_limiter = AsyncMock()
+    # HTTP discovery mode: no discovery pages, and the fetch of the start page fails.
+    assert converter.discovery_pool is None
+    converter.link_discoverer = AsyncMock()
+    converter.link_discoverer.discover.side_effect = lambda url: None if url == 'https://example.com' else []
+
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+
+    assert set(result) == {'https://example.com', 'https://example.com/page1', 'https://example.com/page2'}
+    assert mock_page.eval_on_selector_all.call_count == 1
+
+@pytest.mark.asyncio
+async def test_merge_writes_bookmarked_volume_and_manifest(converter, mock_page, tmp_path):
+    import json
+    pypdf = pytest.importorskip('pypdf')
+    import io
+
+    def blank_pdf(**kwargs):
+        writer = pypdf.PdfWriter()
+        writer.add_blank_page(width=72, height=72)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    mock_page.pdf.side_effect = blank_pdf
+    mock_page.title = AsyncMock(return_value='Title')
+    mock_page.eval_on_selector_all.side_effect = (
+        lambda *args: ['https://example.com/a', 'https://example.com/b']
+        if mock_page.goto.call_args.args[0] == 'https://example.com' else [])
+    converter.merge = True
+
+    await converter.crawl_and_convert('https://example.com', str(tmp_path / 'out'))
+
+    reader = pypdf.PdfReader(str(tmp_path / 'out' / 'site-0001.pdf'))
+    assert len(reader.pages) == 3
+    assert len(reader.outline) == 2
+    manifest = [json.loads(line) for line in (tmp_path / 'out' / 'site.manifest.jsonl').read_text().splitlines()]
+    assert [entry['first_page'] for entry in manifest] == [1, 2, 3]
+    assert manifest[0]['url'] == 'https://example.com'
+
+@pytest.mark.asyncio
+async def test_dedup_skips_rendering_duplicate_pages(converter, mock_page, tmp_path):
+    import json
+    from src.dedup import ContentDeduplicator
+
+    mock_page.eval_on_selector_all.return_value = ['https://example.com/a', 'https://example.com/a?print=1']
+    mock_page.evaluate = AsyncMock(side_effect=lambda *args: (
+        'home' if mock_page.goto.call_args.args[0] == 'https://example.com' else 'same article'))
+    converter.deduplicator = ContentDeduplicator()
+
+    result = await converter.crawl_and_convert('https://example.com', str(tmp_path))
+
+    assert len(result) == 3
+    assert mock_page.pdf.call_count == 2
+    manifest = [json.loads(line) for line in (tmp_path / 'site.manifest.jsonl').read_text().splitlines()]
+    assert [entry for entry in manifest if 'alias_of' in entry] == [
+        {'url': 'https://example.com/a?print=1', 'alias_of': 'https://example.com/a'}]
+
+@pytest.mark.asyncio
+async def test_dedup_does_not_alias_pages_to_a_failed_render(converter, mock_page, tmp_path):
+    import json
+    from src.dedup import ContentDeduplicator
+
+    mock_page.eval_on_selector_all.return_value = ['https://example.com/a', 'https://example.com/a?print=1']
+    mock_page.evaluate = AsyncMock(side_effect=lambda *args: (
+        'home' if mock_page.goto.call_args.args[0] == 'https://example.com' else 'same article'))
+
+    async def pdf(**kwargs):
+        if mock_page.goto.call_args.args[0] == 'https://example.com/a':
+            raise Exception('Target crashed')
+        return b'%PDF-1.4'
+    mock_page.pdf = AsyncMock(side_effect=pdf)
+    converter.deduplicator = ContentDeduplicator()
+    converter.concurrency_limit = 1
+
+    await converter.crawl_and_convert('https://example.com', str(tmp_path))
+
+    manifest = [json.loads(line) for line in (tmp_path / 'site.manifest.jsonl').read_text().splitlines()]
+    assert not [entry for entry in manifest if 'alias_of' in entry]
+    assert 'https://example.com/a?print=1' in [entry['url'] for entry in manifest]
+
+@pytest.mark.asyncio
+async def test_crawl_records_stage_metrics(converter, mock_page):
+    await converter.crawl_and_convert('https://example.com', 'output')
+
+    snapshot = converter.metrics.snapshot()
+    assert snapshot['counters']['pages_ok'] == 3
+    assert snapshot['counters']['bytes_written'] == 3 * len(b'%PDF-1.4')
+    for stage in ('queue_wait', 'semaphore_wait', 'rate_wait', 'page_wait', 'goto', 'links', 'pdf_render', 'file_write'):
+        assert snapshot['stages'][stage]['count'] == 3
+
+@pytest.mark.asyncio
+async def test_browser_recycled_after_page_limit_without_losing_urls(converter, mock_page, mock_browser):
+    mock_page.eval_on_selector_all.return_value = [f'https://example.com/page{i}' for i in range(10)]
+    converter.rate_limiter = AsyncMock()
+    converter.recycle_pages = 4
+    contexts_before = mock_browser.new_context.call_count
+
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+    await converter._recycling
+
+    assert len(result) == 11
+    assert mock_page.pdf.call_count == 11
+    assert converter.metrics.counters['browser_restarts'] >= 1
+    assert mock_browser.close.call_count == converter.metrics.counters['browser_restarts']
+    assert mock_browser.new_context.call_count > contexts_before
+
+@pytest.mark.asyncio
+async def test_page_pool_drain_waits_for_borrowed_pages(mock_browser, mock_page):
+    from src.browser_pool import PagePool
+
+    pool = PagePool(mock_browser, size=1)
+    await pool.start()
+    async with pool.page():
+        drain = asyncio.create_task(pool.drain())
+        await asyncio.sleep(0)
+        assert not drain.done()
+    await drain
+    borrower = asyncio.create_task(pool.page().__aenter__())
+    await asyncio.sleep(0)
+    assert not borrower.done()
+    await pool.restart(mock_browser)
+    assert await borrower is mock_page
+
+@pytest.mark.asyncio
+async def test_convert_urls_raises_when_url_source_fails(converter, mock_page, tmp_path):
+    def urls():
+        yield from (f'https://example.com/p{i}' for i in range(3))
+        raise UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid start byte')
+
+    with pytest.raises(UnicodeDecodeError):
+        await converter.convert_urls(urls(), str(tmp_path))
+
+@pytest.mark.asyncio
+async def test_convert_urls_renders_list_without_following_links(converter, mock_page, tmp_path):
+    import itertools
+    import json
+
+    def goto(url, **kwargs):
+        if url.endswith('/broken'):
+            raise Exception('net::ERR_NAME_NOT_RESOLVED')
+
+    mock_page.goto.side_effect = goto
+    converter.result_log_path = str(tmp_path / 'results.jsonl')
+    urls = (f'https://example.com/p{i}' for i in range(5))
+
+    processed = await converter.convert_urls(
+        itertools.chain(urls, ['https://example.com/broken']), str(tmp_path), read_ahead=2)
+
+    assert processed == 5
+    assert mock_page.eval_on_selector_all.call_count == 0
+    assert mock_page.pdf.call_count == 5
+    results = [json.loads(line) for line in (tmp_path / 'results.jsonl').read_text().splitlines()]
+    assert sorted(r['status'] for r in results) == ['failed'] + ['ok'] * 5
+
+@pytest.mark.asyncio
+async def test_sitemaps_seed_frontier_and_skip_unchanged(converter, mock_page, tmp_path):
+    from src.crawl_store import CrawlStore
+    from src.sitemaps import RobotsPolicy, SitemapEntry
+
+    mock_page.eval_on_selector_all.return_value = ['https://example.com/private/x']
+    mock_page.goto.return_value = MagicMock(headers={})
+    output_path = tmp_path / 'old.pdf'
+    output_path.write_bytes(b'%PDF')
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    store.enqueue('https://example.com/old')
+    store.mark_done('https://example.com/old', str(output_path), 'hash')
+    converter.store = store
+    converter.incremental = True
+    converter.sitemaps = converter.obey_robots = True
+    robots = RobotsPolicy('https://example.com/robots.txt',
+                          ['User-agent: *', 'Disallow: /private/', 'Crawl-delay: 2'])
+    seeds = [SitemapEntry('https://example.com/new', 2e9), SitemapEntry('https://example.com/old', 1e9),
+             SitemapEntry('https://other.com/page', None)]
+
+    with patch('src.web_to_pdf_converter.RobotsPolicy.load', return_value=robots), \
+            patch('src.web_to_pdf_converter.sitemap_seeds', return_value=seeds):
+        result = await converter.crawl_and_convert('https://example.com', str(tmp_path))
+
+    assert converter.rate_limiter.time_period == 2
+    assert set(result) == {'https://example.com', 'https://example.com/new', 'https://example.com/old'}
+    assert set(_navigations(mock_page)) == {'https://example.com', 'https://example.com/new'}
+    assert converter.metrics.counters['pages_unchanged'] == 1
+    store.close()
+
+@pytest.mark.asyncio
+async def test_crawl_policy_limits_scope_and_pages(converter, mock_page):
+    from src.crawl_policy import CrawlPolicy, UrlRules
+
+    converter.crawl_policy = CrawlPolicy(rules=UrlRules(exclude=['page2']))
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+    assert set(result) == {'https://example.com', 'https://example.com/page1'}
+
+    converter.crawl_policy = CrawlPolicy(max_depth=0)
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+    assert result == ['https://example.com']
+
+    converter.crawl_policy = CrawlPolicy(max_pages=2)
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+    assert len(result) == 2
+
+@pytest.mark.asyncio
+async def test_cancel_drains_in_flight_pages_and_reports_progress(converter, mock_page, tmp_path):
+    from src.crawl_store import CrawlStore
+    from src.progress import ProgressReporter
+
+    mock_page.goto.return_value = MagicMock(headers={})
+    store = CrawlStore(str(tmp_path / 'state.db'))
+    converter.store = store
+    snapshots = []
+    converter.progress = ProgressReporter(snapshots.append, interval=0.01)
+    # Cancelled from another thread as soon as the first page is done.
+    converter.on_outcome = lambda url, status, path: threading.Thread(target=converter.cancel).start()
+
+    result = await asyncio.wait_for(converter.crawl_and_convert('https://example.com', 'output'), 5)
+
+    assert result == ['https://example.com']
+    assert mock_page.pdf.call_count == 1
+    assert sorted(url for url, _, _ in store.pending_entries()) == ['https://example.com/page1', 'https://example.com/page2']
+    assert snapshots[-1].finished and snapshots[-1].done == 1
+    store.close()
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried_and_permanent_ones_dead_lettered(converter, mock_page, tmp_path):
+    from src.retry_policy import RetryPolicy
+
+    attempts = {}
+
+    def goto(url, **kwargs):
+        attempts[url] = attempts.get(url, 0) + 1
+        if url.endswith('/page1') and attempts[url] == 1:
+            raise Exception('net::ERR_CONNECTION_RESET')
+        if url.endswith('/page2'):
+            raise Exception('net::ERR_NAME_NOT_RESOLVED')
+
+    mock_page.goto.side_effect = goto
+    converter.retry_policy = RetryPolicy(max_attempts=3, base_delay=0.01)
+    converter.dead_letters_path = str(tmp_path / 'dead_letters.txt')
+
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+
+    assert set(result) == {'https://example.com', 'https://example.com/page1'}
+    assert attempts['https://example.com/page1'] == 2
+    assert attempts['https://example.com/page2'] == 1
+    assert converter.metrics.counters['retries'] == 1
+    assert (tmp_path / 'dead_letters.txt').read_text().splitlines()[-1] == 'https://example.com/page2'
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_stops_loading_a_failing_host(converter, mock_page):
+    from src.retry_policy import CircuitBreakers, RetryPolicy
+
+    mock_page.eval_on_selector_all.return_value = [f'https://example.com/p{i}' for i in range(10)]
+
+    def goto(url, **kwargs):
+        if url != 'https://example.com':
+            raise Exception('net::ERR_CONNECTION_REFUSED')
+
+    mock_page.goto.side_effect = goto
+    converter.retry_policy = RetryPolicy(max_attempts=2, base_delay=0.01)
+    converter.circuit_breakers = CircuitBreakers(failure_threshold=2, reset_timeout=0.05)
+
+    result = await converter.crawl_and_convert('https://example.com', 'output')
+
+    assert result == ['https://example.com']
+    assert converter.metrics.counters['pages_failed'] == 10
+    # Ten URLs with two attempts each, yet most attempts never reached the browser.
+    assert len(_navigations(mock_page)) <= 1 + 10
+
+@pytest.mark.asyncio
+async def test_attaches_to_running_browser_and_falls_back_to_launch(mock_browser):
+    with patch('src.web_to_pdf_converter.async_playwright') as mock_playwright:
+        chromium = mock_playwright.return_value.chromium
+        mock_playwright.return_value.start = AsyncMock(return_value=mock_playwright.return_value)
+        mock_playwright.return_value.stop = AsyncMock()
+        chromium.connect_over_cdp = AsyncMock(return_value=mock_browser)
+        chromium.launch = AsyncMock(return_value=mock_browser)
+
+        async with WebToPDFConverter(browser_endpoint='http://127.0.0.1:9222') as converter:
+            assert converter.browser is mock_browser
+        chromium.connect_over_cdp.assert_awaited_once()
+        assert chromium.connect_over_cdp.call_args.args[0] == 'http://127.0.0.1:9222'
+        assert chromium.launch.call_count == 0
+
+        chromium.connect_over_cdp.side_effect = Exception('connect ECONNREFUSED')
+        async with WebToPDFConverter(browser_endpoint='http://127.0.0.1:9222'):
+            pass
+        assert chromium.launch.call_count == 1
+
+@pytest.mark.asyncio
+async def test_main_rejects_resuming_a_merged_crawl(tmp_path):
+    from src.web_to_pdf_converter import main
+    with pytest.raises(ValueError):
+        await main('https://example.com', str(tmp_path), resume=True, merge=True)
+
+@pytest.mark.asyncio
+async def test_main_rejects_recycling_an_attached_browser(tmp_path):
+    from src.web_to_pdf_converter import main
+    with pytest.raises(ValueError):
+        await main('https://example.com', str(tmp_path), browser_endpoint='auto', recycle_rss_mb=512)
+
+def test_parsed_arguments_are_main_keywords():
+    import inspect
+    from src.web_to_pdf_converter import main, parse_args
+
+    args = vars(parse_args(['https://example.com', '-o', 'out', '-c', '3', '--state', 's.db', '--max-depth', '2']))
+    assert set(args) <= set(inspect.signature(main).parameters)
+    assert (args['output_dir'], args['concurrency_limit'], args['state_path'], args['max_depth']) == ('out', 3, 's.db', 2)
+    with pytest.raises(SystemExit):
+        parse_args(['https://example.com', '--merge', '--resume'])